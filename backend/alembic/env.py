@@ -1,17 +1,21 @@
 # alembic/env.py
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
+from sqlalchemy import inspect
 from sqlalchemy import pool
 from alembic import context
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 import os
 import sys
 
 # Добавляем корень проекта в Python path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-# Импортируем модели и настройки
-from app.database import Base
+# Импортируем модели и настройки; models нужен, чтобы таблицы попали в metadata
+from app.database import Base, connect_args_for
 from app.config import settings
+from app import models  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -31,6 +35,19 @@ def get_url():
     return settings.DATABASE_URL
 
 
+def stamp_legacy_schema(connection) -> None:
+    """Базу, созданную create_all до появления миграций, помечаем ревизией 0001.
+
+    Иначе upgrade head попытается создать уже существующие таблицы.
+    """
+    tables = set(inspect(connection).get_table_names())
+    if "alembic_version" not in tables and "users" in tables:
+        print("🔖 Схема без alembic_version: помечаем ревизией 0001")
+        MigrationContext.configure(connection).stamp(ScriptDirectory.from_config(config), "0001")
+    # inspect() открыл транзакцию; закрываем ее, иначе миграции не закоммитятся
+    connection.commit()
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = get_url()
@@ -54,13 +71,16 @@ def run_migrations_online() -> None:
         settings.DATABASE_URL,
         poolclass=pool.NullPool,
         pool_pre_ping=True,
-        connect_args={'sslmode': 'require'} if "localhost" not in settings.DATABASE_URL else {}
+        connect_args=connect_args_for(settings.DATABASE_URL)
     )
 
     with connectable.connect() as connection:
+        stamp_legacy_schema(connection)
         context.configure(
             connection=connection,
-            target_metadata=target_metadata
+            target_metadata=target_metadata,
+            # SQLite не умеет ALTER COLUMN - пересоздаем таблицу
+            render_as_batch=connection.dialect.name == "sqlite"
         )
 
         with context.begin_transaction():
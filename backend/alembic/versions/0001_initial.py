@@ -0,0 +1,150 @@
+"""initial schema
+
+Схема в том виде, в каком ее раньше создавал Base.metadata.create_all.
+Существующую базу без alembic_version env.py помечает этой ревизией сам,
+поэтому alembic upgrade head для нее сразу переходит к 0002.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('passport_series', sa.String(length=4), nullable=True),
+        sa.Column('passport_number', sa.String(length=6), nullable=True),
+        sa.Column('passport_issued_by', sa.Text(), nullable=True),
+        sa.Column('passport_issue_date', sa.Date(), nullable=True),
+        sa.Column('registration_address', sa.Text(), nullable=True),
+        sa.Column('inn', sa.String(length=12), nullable=True),
+        sa.Column('snils', sa.String(length=14), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('bank_name', sa.String(), nullable=True),
+        sa.Column('bank_account', sa.String(length=20), nullable=True),
+        sa.Column('bik', sa.String(length=9), nullable=True),
+        sa.Column('landlord_type', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+
+    op.create_table(
+        'properties',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.Text(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('base_rent_rate', sa.Float(), nullable=False),
+        sa.Column('area', sa.Float(), nullable=True),
+        sa.Column('rooms', sa.Integer(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_properties_id', 'properties', ['id'], unique=False)
+
+    op.create_table(
+        'contracts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('tenant_name', sa.String(), nullable=False),
+        sa.Column('tenant_type', sa.String(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('rent_amount', sa.Float(), nullable=False),
+        sa.Column('payment_schedule', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('tenant_info', sa.JSON(), nullable=True),
+        sa.Column('additional_terms', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_contracts_id', 'contracts', ['id'], unique=False)
+
+    op.create_table(
+        'payments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('contract_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['contract_id'], ['contracts.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_payments_id', 'payments', ['id'], unique=False)
+
+    op.create_table(
+        'expenses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_expenses_id', 'expenses', ['id'], unique=False)
+
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('priority', sa.String(), nullable=False),
+        sa.Column('action', sa.JSON(), nullable=True),
+        sa.Column('read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_notifications_id', 'notifications', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_id', table_name='notifications')
+    op.drop_table('notifications')
+    op.drop_index('ix_expenses_id', table_name='expenses')
+    op.drop_table('expenses')
+    op.drop_index('ix_payments_id', table_name='payments')
+    op.drop_table('payments')
+    op.drop_index('ix_contracts_id', table_name='contracts')
+    op.drop_table('contracts')
+    op.drop_index('ix_properties_id', table_name='properties')
+    op.drop_table('properties')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,105 @@
+"""sync tombstones, analytics rollups, notification dedupe, list indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # updated_at заполняется и при вставке - на нем строится курсор /sync
+    for table in ('users', 'properties', 'contracts'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(timezone=True), server_default=sa.func.now())
+    for table in ('payments', 'expenses'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+
+    op.create_index('ix_properties_user_id', 'properties', ['user_id', 'id'])
+    op.create_index('ix_properties_user_updated', 'properties', ['user_id', 'updated_at'])
+    op.create_index('ix_contracts_user_id', 'contracts', ['user_id', 'id'])
+    op.create_index('ix_contracts_user_updated', 'contracts', ['user_id', 'updated_at'])
+    op.create_index('ix_contracts_end_date', 'contracts', ['end_date'])
+    op.create_index('ix_payments_user_date', 'payments', ['user_id', 'date', 'id'])
+    op.create_index('ix_payments_user_updated', 'payments', ['user_id', 'updated_at'])
+    op.create_index('ix_payments_contract_date', 'payments', ['contract_id', 'date'])
+    op.create_index('ix_expenses_user_date', 'expenses', ['user_id', 'date', 'id'])
+    op.create_index('ix_expenses_user_updated', 'expenses', ['user_id', 'updated_at'])
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tombstones_id', 'tombstones', ['id'])
+    op.create_index('ix_tombstones_user_deleted', 'tombstones', ['user_id', 'deleted_at'])
+
+    op.add_column('notifications', sa.Column('dedupe_key', sa.String(), nullable=True))
+    op.create_index('uq_notifications_user_dedupe', 'notifications', ['user_id', 'dedupe_key'], unique=True)
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id', 'id'])
+
+    op.create_table(
+        'monthly_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('income_physical', sa.Float(), nullable=False),
+        sa.Column('income_legal', sa.Float(), nullable=False),
+        sa.Column('expenses', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['property_id'], ['properties.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'property_id', 'month', name='uq_monthly_rollups_user_property_month'),
+    )
+    op.create_index('ix_monthly_rollups_id', 'monthly_rollups', ['id'])
+    op.create_index('ix_monthly_rollups_user_month', 'monthly_rollups', ['user_id', 'month'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_monthly_rollups_user_month', table_name='monthly_rollups')
+    op.drop_index('ix_monthly_rollups_id', table_name='monthly_rollups')
+    op.drop_table('monthly_rollups')
+
+    op.drop_index('ix_notifications_user_id', table_name='notifications')
+    op.drop_index('uq_notifications_user_dedupe', table_name='notifications')
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.drop_column('dedupe_key')
+
+    op.drop_index('ix_tombstones_user_deleted', table_name='tombstones')
+    op.drop_index('ix_tombstones_id', table_name='tombstones')
+    op.drop_table('tombstones')
+
+    op.drop_index('ix_expenses_user_updated', table_name='expenses')
+    op.drop_index('ix_expenses_user_date', table_name='expenses')
+    op.drop_index('ix_payments_contract_date', table_name='payments')
+    op.drop_index('ix_payments_user_updated', table_name='payments')
+    op.drop_index('ix_payments_user_date', table_name='payments')
+    op.drop_index('ix_contracts_end_date', table_name='contracts')
+    op.drop_index('ix_contracts_user_updated', table_name='contracts')
+    op.drop_index('ix_contracts_user_id', table_name='contracts')
+    op.drop_index('ix_properties_user_updated', table_name='properties')
+    op.drop_index('ix_properties_user_id', table_name='properties')
+
+    for table in ('payments', 'expenses'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+    for table in ('users', 'properties', 'contracts'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(timezone=True), server_default=None)
@@ -0,0 +1,27 @@
+"""indexes for payment and expense filters
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_expenses_property_date', 'expenses', ['property_id', 'date'])
+    op.create_index('ix_contracts_property_id', 'contracts', ['property_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contracts_property_id', table_name='contracts')
+    op.drop_index('ix_expenses_property_date', table_name='expenses')
@@ -0,0 +1,48 @@
+"""jsonb tenant info and search indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_INDEXES = [
+    ('ix_contracts_tenant_name_trgm', 'contracts', 'tenant_name', 'gin_trgm_ops'),
+    ('ix_properties_name_trgm', 'properties', 'name', 'gin_trgm_ops'),
+    ('ix_properties_address_trgm', 'properties', 'address', 'gin_trgm_ops'),
+    ('ix_contracts_tenant_info_gin', 'contracts', 'tenant_info', 'jsonb_path_ops'),
+    ('ix_contracts_additional_terms_gin', 'contracts', 'additional_terms', 'jsonb_path_ops'),
+]
+
+
+def upgrade() -> None:
+    # В SQLite JSON остается текстом, а поиск работает через LIKE без индексов
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gin')
+    for column in ('tenant_info', 'additional_terms'):
+        op.alter_column('contracts', column, type_=postgresql.JSONB(), postgresql_using=f'{column}::jsonb')
+    for name, table, column, ops in SEARCH_INDEXES:
+        op.create_index(name, table, ['user_id', column], postgresql_using='gin', postgresql_ops={column: ops})
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _, _ in reversed(SEARCH_INDEXES):
+        op.drop_index(name, table_name=table)
+    for column in ('tenant_info', 'additional_terms'):
+        op.alter_column('contracts', column, type_=sa.JSON(), postgresql_using=f'{column}::json')
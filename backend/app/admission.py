@@ -0,0 +1,265 @@
+# backend/app/admission.py
+# Защита от перегрузки: лимиты частоты входа (token bucket) и ограничение
+# числа одновременных запросов к тяжелым эндпоинтам со сбросом лишних.
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from .config import settings
+from .metrics import route_template
+
+try:
+    import redis
+except ImportError:  # redis нужен только для общих лимитов между процессами
+    redis = None
+
+
+class MemoryBuckets:
+    """Token bucket в памяти процесса; заменяет Redis в тестах."""
+
+    def __init__(self, maxsize: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self._clock = clock
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Списывает cost токенов; возвращает 0 или сколько секунд ждать."""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self._maxsize:
+                # Самые давно не тронутые корзины давно полные - их не жалко
+                self._buckets.popitem(last=False)
+            return wait
+
+
+# Атомарно в Redis: состояние корзины - hash {tokens, ts}, время - часы Redis
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_URL is set but the redis package is not installed")
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(TAKE_SCRIPT)
+        self._prefix = prefix
+        # Если Redis недоступен, лимитируем хотя бы в пределах процесса
+        self._fallback = MemoryBuckets()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        try:
+            return float(self._script(keys=[self._prefix + key], args=[rate, burst, cost]))
+        except redis.RedisError as e:
+            print(f"Rate limit backend error: {e}")
+            return self._fallback.take(key, rate, burst, cost)
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.rejected = 0
+
+    def check(self, key: str, per_minute: float, burst: float):
+        """429 с Retry-After, если корзина ключа пуста; per_minute=0 - без лимита."""
+        if per_minute <= 0:
+            return
+        wait = self.backend.take(key, per_minute / 60.0, max(1.0, burst))
+        if wait > 0:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+    def refund(self, key: str, per_minute: float, burst: float):
+        """Возвращает в корзину токен, списанный check()."""
+        if per_minute <= 0:
+            return
+        self.backend.take(key, per_minute / 60.0, max(1.0, burst), cost=-1.0)
+
+
+rate_limiter = RateLimiter(RedisBuckets(settings.RATE_LIMIT_URL) if settings.RATE_LIMIT_URL else MemoryBuckets())
+
+
+def _account_key(username: str) -> str:
+    return f"login:account:{username.strip().lower()}"
+
+
+def limit_login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    """Лимиты на /token до проверки пароля: каждая попытка стоит PBKDF2.
+
+    Синхронная зависимость: FastAPI выполнит ее в threadpool, поэтому
+    запрос в Redis не блокирует event loop. Форма та же, что у обработчика.
+    """
+    client = request.client.host if request.client else "unknown"
+    rate_limiter.check(f"login:ip:{client}", settings.LOGIN_IP_PER_MINUTE, settings.LOGIN_IP_BURST)
+    rate_limiter.check(_account_key(form_data.username), settings.LOGIN_ACCOUNT_PER_MINUTE, settings.LOGIN_ACCOUNT_BURST)
+
+
+def login_succeeded(username: str):
+    """Успешный вход возвращает токен в корзину аккаунта.
+
+    Лимит аккаунта считает только неудачные попытки: иначе частые входы
+    (или чужие входы с верным паролем) блокировали бы владельца.
+    """
+    rate_limiter.refund(_account_key(username), settings.LOGIN_ACCOUNT_PER_MINUTE, settings.LOGIN_ACCOUNT_BURST)
+
+
+class RouteGate:
+    """Не больше limit одновременных запросов к маршруту, остальные ждут.
+
+    Новый запрос сразу получает 503, если очередь полна или ожидаемое
+    ожидание (очередь x средняя латентность / limit) больше max_wait.
+    """
+
+    def __init__(self, limit: int, max_queue: int, max_wait: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.latency = 0.0  # скользящее среднее, секунды
+        self.shed = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def expected_wait(self) -> float:
+        return (self.waiting + 1) * self.latency / self.limit
+
+    def _reject(self) -> float:
+        self.shed += 1
+        return max(1.0, math.ceil(self.expected_wait()))
+
+    async def acquire(self) -> Optional[float]:
+        """None - можно выполнять, иначе Retry-After в секундах."""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue or self.expected_wait() > self.max_wait:
+                return self._reject()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                return self._reject()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        return None
+
+    def release(self, elapsed: float):
+        self.active -= 1
+        self._semaphore.release()
+        self.latency = elapsed if not self.latency else self.latency * 0.8 + elapsed * 0.2
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "latency_ms": round(self.latency * 1000, 1),
+            "shed": self.shed,
+        }
+
+
+def parse_limits(value: str) -> Dict[str, int]:
+    """'POST /token=8,GET /export=2' -> {'POST /token': 8, 'GET /export': 2}"""
+    limits = {}
+    for item in value.split(","):
+        if item.strip():
+            route, _, limit = item.rpartition("=")
+            limits[" ".join(route.split())] = int(limit)
+    return limits
+
+
+# Маршрут -> RouteGate работающего middleware, для /health
+gates: Dict[str, RouteGate] = {}
+
+
+class AdmissionMiddleware:
+    """ASGI-middleware с RouteGate на каждый ограниченный маршрут.
+
+    Перегрузка одного эндпоинта не занимает воркеры и соединения остальных:
+    лишние запросы к нему получают 503 сразу, а не ждут в общей очереди.
+    """
+
+    def __init__(self, app, limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        limits = parse_limits(settings.ADMISSION_LIMITS) if limits is None else limits
+        self.gates = {
+            route: RouteGate(limit, settings.ADMISSION_MAX_QUEUE, settings.ADMISSION_MAX_WAIT)
+            for route, limit in limits.items() if limit > 0
+        }
+        # Шаблон пути ищем перебором маршрутов, только если он вообще нужен
+        self._templated = any("{" in route for route in self.gates)
+        gates.update(self.gates)
+
+    def _gate(self, scope) -> Optional[RouteGate]:
+        gate = self.gates.get(f"{scope['method']} {scope['path']}")
+        if gate is None and self._templated:
+            gate = self.gates.get(f"{scope['method']} {route_template(scope)}")
+        return gate
+
+    async def __call__(self, scope, receive, send):
+        gate = self._gate(scope) if scope["type"] == "http" and self.gates else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+        retry_after = await gate.acquire()
+        if retry_after is not None:
+            await send({
+                "type": "http.response.start",
+                "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(int(retry_after)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server is busy, try again later"}'})
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.perf_counter() - started)
+
+
+def stats() -> dict:
+    return {
+        "login_rejected": rate_limiter.rejected,
+        "routes": {route: gate.stats() for route, gate in gates.items()},
+    }
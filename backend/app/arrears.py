@@ -0,0 +1,195 @@
+# backend/app/arrears.py
+# Ожидаемые платежи по договорам и задолженность по ним.
+# График строится из условий договора, фактические платежи сопоставляются
+# с ним слиянием двух отсортированных по дате последовательностей.
+from datetime import date
+from functools import lru_cache
+from itertools import groupby
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .notifications import add_months
+
+CHUNK_SIZE = 1000
+# Копейки от округления задолженностью не считаем
+EPSILON = 0.01
+
+Due = Tuple[date, float]
+
+
+def iter_schedule(start_date: date, end_date: date, schedule: str, rent_amount: float) -> Iterator[Due]:
+    """Ожидаемые платежи: в день начала договора и далее с шагом графика."""
+    step = 3 if schedule == "quarterly" else 1
+    amount = rent_amount * step
+    k = 0
+    due = start_date
+    while due <= end_date:
+        yield due, amount
+        k += 1
+        # От даты начала, а не от предыдущего платежа: 31.01 -> 28.02 -> 31.03
+        due = add_months(start_date, k * step)
+
+
+@lru_cache(maxsize=4096)
+def expected_schedule(start_date: date, end_date: date, schedule: str, rent_amount: float, as_of: date) -> Tuple[Due, ...]:
+    """График по as_of включительно; у многих договоров одинаковые условия."""
+    return tuple(
+        due for due in iter_schedule(start_date, min(end_date, as_of), schedule, rent_amount)
+    )
+
+
+def match(dues: Iterable[Due], payments: Iterable[Tuple[date, float]], as_of: date) -> dict:
+    """Сопоставляет график с платежами (оба по возрастанию даты).
+
+    Платежи гасят ожидаемые суммы по порядку: платеж закрывает самый старый
+    непогашенный период, переплата переходит на следующие.
+    """
+    payments = iter(payments)
+    available, paid_total, covered_on = 0.0, 0.0, None
+    items = []
+    for due_date, amount in dues:
+        while available < amount - EPSILON:
+            payment = next(payments, None)
+            if payment is None:
+                break
+            available += payment[1]
+            paid_total += payment[1]
+            covered_on = payment[0]
+        if available >= amount - EPSILON:
+            available -= amount
+            days_late = max(0, (covered_on - due_date).days)
+            items.append({
+                "due_date": due_date, "amount": amount, "paid": amount, "paid_on": covered_on,
+                "days_late": days_late, "status": "late" if days_late else "paid",
+            })
+        else:
+            items.append({
+                "due_date": due_date, "amount": amount, "paid": max(0.0, available), "paid_on": None,
+                "days_late": (as_of - due_date).days, "status": "partial" if available > EPSILON else "unpaid",
+            })
+            available = 0.0
+    for payment in payments:
+        paid_total += payment[1]
+
+    expected = sum(item["amount"] for item in items)
+    open_items = [item for item in items if item["paid_on"] is None]
+    balance = paid_total - expected
+    return {
+        "as_of": as_of,
+        "expected": round(expected, 2),
+        "paid": round(paid_total, 2),
+        "balance": round(balance, 2),
+        "arrears": round(max(0.0, -balance), 2),
+        "overpayment": round(max(0.0, balance), 2),
+        "overdue_count": len(open_items),
+        "oldest_overdue": open_items[0]["due_date"] if open_items else None,
+        "days_overdue": open_items[0]["days_late"] if open_items else 0,
+        "max_days_late": max((item["days_late"] for item in items), default=0),
+        "schedule": items,
+    }
+
+
+def contract_balance(db: Session, contract: models.Contract, as_of: Optional[date] = None) -> dict:
+    as_of = as_of or date.today()
+    payments = db.query(models.Payment.date, models.Payment.amount).filter(
+        models.Payment.contract_id == contract.id,
+        models.Payment.date <= as_of,
+    ).order_by(models.Payment.date, models.Payment.id)
+    dues = expected_schedule(contract.start_date, contract.end_date, contract.payment_schedule, contract.rent_amount, as_of)
+    return {"contract_id": contract.id, "tenant_name": contract.tenant_name, **match(dues, payments, as_of)}
+
+
+def iter_portfolio(db: Session, user_ids: Optional[List[int]] = None, as_of: Optional[date] = None) -> Iterator[dict]:
+    """Задолженность по всем действующим договорам пользователей (или всех).
+
+    Договоры идут пачками по id, платежи пачки - одним запросом, упорядоченным
+    по (contract_id, date) по индексу ix_payments_contract_date; дальше
+    слияние по contract_id без запросов на каждый договор.
+    """
+    as_of = as_of or date.today()
+    last_id = 0
+    while True:
+        query = db.query(
+            models.Contract.id,
+            models.Contract.user_id,
+            models.Contract.property_id,
+            models.Contract.tenant_name,
+            models.Contract.start_date,
+            models.Contract.end_date,
+            models.Contract.rent_amount,
+            models.Contract.payment_schedule,
+        ).filter(
+            models.Contract.id > last_id,
+            models.Contract.is_active == True,  # noqa: E712
+            models.Contract.start_date <= as_of,
+        )
+        if user_ids is not None:
+            query = query.filter(models.Contract.user_id.in_(user_ids))
+        contracts = query.order_by(models.Contract.id).limit(CHUNK_SIZE).all()
+        if not contracts:
+            break
+        payments = db.query(models.Payment.contract_id, models.Payment.date, models.Payment.amount).filter(
+            models.Payment.contract_id.in_([contract.id for contract in contracts]),
+            models.Payment.date <= as_of,
+        ).order_by(models.Payment.contract_id, models.Payment.date, models.Payment.id)
+        by_contract = groupby(payments, key=lambda row: row[0])
+        current = next(by_contract, None)
+        for contract in contracts:
+            while current is not None and current[0] < contract.id:
+                current = next(by_contract, None)
+            rows = ()
+            if current is not None and current[0] == contract.id:
+                rows = [(paid_on, amount) for _, paid_on, amount in current[1]]
+                current = next(by_contract, None)
+            dues = expected_schedule(contract.start_date, contract.end_date, contract.payment_schedule, contract.rent_amount, as_of)
+            result = match(dues, rows, as_of)
+            del result["schedule"]
+            yield {
+                "contract_id": contract.id,
+                "user_id": contract.user_id,
+                "property_id": contract.property_id,
+                "tenant_name": contract.tenant_name,
+                **result,
+            }
+        last_id = contracts[-1].id
+
+
+def portfolio_report(db: Session, user_id: int, as_of: Optional[date] = None, min_days: int = 0) -> dict:
+    """Отчет по задолженности арендаторов пользователя."""
+    as_of = as_of or date.today()
+    rows = list(iter_portfolio(db, [user_id], as_of))
+    debtors = [row for row in rows if row["arrears"] > 0 and row["days_overdue"] >= min_days]
+    debtors.sort(key=lambda row: (-row["days_overdue"], -row["arrears"]))
+    return {
+        "as_of": as_of,
+        "contracts": len(rows),
+        "arrears": round(sum(row["arrears"] for row in rows), 2),
+        "overpayment": round(sum(row["overpayment"] for row in rows), 2),
+        "debtors": debtors,
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.arrears [--as-of 2025-01-31] - сводка по всем пользователям
+    import argparse
+
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Tenant arrears across all users")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        contracts = debtors = 0
+        arrears = 0.0
+        for row in iter_portfolio(db, as_of=args.as_of):
+            contracts += 1
+            if row["arrears"] > 0:
+                debtors += 1
+                arrears += row["arrears"]
+        print(f"✅ Contracts: {contracts}, with arrears: {debtors}, total arrears: {arrears:,.2f}")
+    finally:
+        db.close()
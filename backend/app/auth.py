@@ -2,19 +2,25 @@
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from . import crud, schemas, models
-from .database import get_db
+from . import crud, crud_async, schemas, models
+from .database import get_db, get_async_db
 from .config import settings
+from .cache import principal_cache, principal_to_user, user_to_principal
+from .hashing import hashing_pool
 
 # Используем более надежную конфигурацию для паролей
 pwd_context = CryptContext(
     schemes=["pbkdf2_sha256"],  # Используем PBKDF2 вместо bcrypt
     deprecated="auto",
-    pbkdf2_sha256__default_rounds=30000
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    # Хэши с меньшим числом раундов считаются устаревшими и пересчитываются
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -40,6 +46,31 @@ def get_password_hash(password):
         )
 
 
+def verify_and_update_password(plain_password, hashed_password):
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        print(f"Password verification error: {e}")
+        return False, None
+
+
+async def get_password_hash_async(password):
+    return await hashing_pool.run(get_password_hash, password)
+
+
+async def authenticate_user_async(db: Session, email: str, password: str):
+    # Запросы к базе - в threadpool, PBKDF2 - в пуле хэширования
+    user = await run_in_threadpool(crud.get_user_by_email, db, email)
+    if not user:
+        return False
+    valid, new_hash = await hashing_pool.run(verify_and_update_password, password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        await run_in_threadpool(crud.update_password_hash, db, user, new_hash)
+    return user
+
+
 def authenticate_user(db: Session, email: str, password: str):
     user = crud.get_user_by_email(db, email)
     if not user:
@@ -60,22 +91,73 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = schemas.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return token_data.email
 
-    user = crud.get_user_by_email(db, email=token_data.email)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    email = decode_token_subject(token)
+
+    # Без похода в базу, если пользователь недавно уже был найден
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return principal_to_user(cached)
+
+    user = await run_in_threadpool(crud.get_user_by_email, db, email)
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    principal_cache.set(email, user_to_principal(user))
+    return user
+
+
+async def get_current_user_sse(request: Request, token: str = None, db: Session = Depends(get_db)):
+    # EventSource в браузере не умеет слать заголовки, поэтому токен
+    # можно передать и в query-параметре ?token=
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise _credentials_exception()
+    return await get_current_user(token=token, db=db)
+
+
+async def authenticate_user_async_db(db: AsyncSession, email: str, password: str):
+    user = await crud_async.get_user_by_email(db, email)
+    if not user:
+        return False
+    valid, new_hash = await hashing_pool.run(verify_and_update_password, password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        await crud_async.update_password_hash(db, user, new_hash)
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    email = decode_token_subject(token)
+
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return principal_to_user(cached)
+
+    user = await crud_async.get_user_by_email(db, email)
+    if user is None:
+        raise _credentials_exception()
+    principal_cache.set(email, user_to_principal(user))
+    return user
@@ -0,0 +1,250 @@
+# backend/app/backup.py
+import gzip
+import json
+import zlib
+from datetime import date, datetime
+from typing import BinaryIO, Callable, Iterator
+
+from sqlalchemy import Date, DateTime, delete, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, rollups, versioning
+from .database import SessionLocal
+
+FORMAT_VERSION = 1
+YIELD_PER = 1000
+IMPORT_BATCH_SIZE = 5000
+CHUNK_SIZE = 64 * 1024
+# empty - только в аккаунт без данных, replace - текущие данные удаляются
+IMPORT_MODES = ("empty", "replace")
+
+# Порядок важен: при импорте ссылки на объекты и договоры должны
+# встречаться после самих объектов и договоров
+EXPORT_TABLES = (
+    ("properties", models.Property),
+    ("contracts", models.Contract),
+    ("payments", models.Payment),
+    ("expenses", models.Expense),
+    ("notifications", models.Notification),
+)
+MODELS = dict(EXPORT_TABLES)
+
+# Сущность -> поле со ссылкой и сущность, на которую оно ссылается
+REFERENCES = {
+    "contracts": ("property_id", "properties"),
+    "payments": ("contract_id", "contracts"),
+    "expenses": ("property_id", "properties"),
+}
+# Сущности, новые id которых нужны для перепривязки ссылок
+MAPPED = {"properties", "contracts"}
+SKIP_COLUMNS = {"id", "user_id", "updated_at"}
+# Уведомления, в ключе которых есть id договора (см. notifications.py)
+CONTRACT_DEDUPE_KINDS = ("payment", "contract")
+
+
+class BackupError(ValueError):
+    pass
+
+
+class BackupConflict(BackupError):
+    """Аккаунт не пуст, а режим импорта не разрешает заменять данные."""
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def iter_export_lines(db: Session, user_id: int) -> Iterator[str]:
+    """NDJSON-строки резервной копии; строки читаются серверным курсором."""
+    yield json.dumps({"type": "header", "version": FORMAT_VERSION, "exported_at": datetime.utcnow().isoformat()}) + "\n"
+    for name, model in EXPORT_TABLES:
+        table = model.__table__
+        columns = [column for column in table.columns if column.name != "user_id"]
+        stmt = (
+            select(*columns)
+            .where(table.c.user_id == user_id)
+            .order_by(table.c.id)
+            .execution_options(yield_per=YIELD_PER)
+        )
+        for row in db.execute(stmt).mappings():
+            yield json.dumps({"type": name, "data": dict(row)}, default=_json_default, ensure_ascii=False) + "\n"
+
+
+def stream_export(user_id: int, compress: bool = False, open_session: Callable[[], Session] = SessionLocal) -> Iterator[bytes]:
+    # Сессия открывается здесь, а не через Depends: зависимость закрывается
+    # до того, как StreamingResponse начнет читать генератор
+    db = open_session()
+    try:
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer, size = [], 0
+        for line in iter_export_lines(db, user_id):
+            data = line.encode("utf-8")
+            buffer.append(data)
+            size += len(data)
+            if size >= CHUNK_SIZE:
+                chunk = b"".join(buffer)
+                buffer, size = [], 0
+                chunk = compressor.compress(chunk) if compressor else chunk
+                if chunk:
+                    yield chunk
+        chunk = b"".join(buffer)
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
+
+def _converters(model):
+    converters = {}
+    for column in model.__table__.columns:
+        if column.name in SKIP_COLUMNS:
+            continue
+        if isinstance(column.type, DateTime):
+            converters[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            converters[column.name] = date.fromisoformat
+        else:
+            converters[column.name] = None
+    return converters
+
+
+def _has_data(db: Session, user_id: int) -> bool:
+    # Уведомления не считаются: планировщик создает их и в пустом аккаунте
+    return any(
+        db.scalar(select(model.id).where(model.user_id == user_id).limit(1)) is not None
+        for name, model in EXPORT_TABLES if name != "notifications"
+    )
+
+
+def _clear_account(db: Session, user_id: int):
+    """Удаляет данные пользователя перед восстановлением (режим replace)."""
+    db.execute(delete(models.MonthlyRollup).where(models.MonthlyRollup.user_id == user_id))
+    # Дети раньше родителей; удаления получают tombstone для /sync
+    for name, model in reversed(EXPORT_TABLES):
+        if name != "notifications":
+            db.execute(insert(models.Tombstone).from_select(
+                ["user_id", "entity", "entity_id"],
+                select(literal(user_id), literal(name), model.id).where(model.user_id == user_id),
+            ))
+        db.execute(delete(model).where(model.user_id == user_id))
+
+
+def _remap_notification(values: dict, contracts: dict):
+    """Переводит id договора в action и dedupe_key на новые id."""
+    action = values.get("action")
+    if isinstance(action, dict) and "contractId" in action:
+        new_id = contracts.get(action["contractId"])
+        # Договора нет в копии: ссылка вела бы на чужую запись
+        values["action"] = {**action, "contractId": new_id} if new_id is not None else None
+    kind, _, rest = (values.get("dedupe_key") or "").partition(":")
+    if kind in CONTRACT_DEDUPE_KINDS:
+        old_id, _, tail = rest.partition(":")
+        if old_id.isdigit() and int(old_id) in contracts:
+            values["dedupe_key"] = f"{kind}:{contracts[int(old_id)]}:{tail}"
+
+
+def import_backup(db: Session, user_id: int, stream: BinaryIO, mode: str = "empty") -> dict:
+    """Восстанавливает копию в аккаунт пользователя одной транзакцией.
+
+    Записи получают новые id; ссылки между объектами, договорами и
+    платежами перепривязываются по ходу чтения файла. В режиме empty
+    аккаунт должен быть пуст, в режиме replace его данные заменяются.
+    При любой ошибке аккаунт остается в прежнем состоянии.
+    """
+    if mode not in IMPORT_MODES:
+        raise BackupError(f"Unknown import mode, expected one of: {', '.join(IMPORT_MODES)}")
+    magic = stream.read(2)
+    stream.seek(0)
+    if magic == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+
+    converters = {name: _converters(model) for name, model in EXPORT_TABLES}
+    id_map = {name: {} for name in MAPPED}
+    counts = {name: 0 for name in MODELS}
+    current, old_ids, batch = None, [], []
+
+    def flush():
+        if not batch:
+            return
+        model = MODELS[current]
+        if current == "notifications":
+            # Планировщик мог уже создать такие же уведомления - их пропускаем
+            keys = [values["dedupe_key"] for values in batch if values.get("dedupe_key")]
+            existing = set(db.scalars(select(model.dedupe_key).where(
+                model.user_id == user_id, model.dedupe_key.in_(keys)
+            ))) if keys else set()
+            batch[:] = [values for values in batch if values.get("dedupe_key") not in existing]
+        if current in MAPPED:
+            new_ids = db.scalars(
+                insert(model).returning(model.id, sort_by_parameter_order=True), batch
+            ).all()
+            id_map[current].update(zip(old_ids, new_ids))
+        elif batch:
+            db.execute(insert(model), batch)
+            if current in ("payments", "expenses"):
+                rollups.mark_dirty(db, user_id, (values["date"] for values in batch))
+        counts[current] += len(batch)
+        old_ids.clear()
+        batch.clear()
+
+    try:
+        if mode == "replace":
+            _clear_account(db, user_id)
+        elif _has_data(db, user_id):
+            raise BackupConflict("Account already has data, import with mode=replace to overwrite it")
+
+        for line_no, raw in enumerate(stream, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+                kind, data = record["type"], record.get("data") or {}
+                if kind == "header":
+                    if record.get("version") != FORMAT_VERSION:
+                        raise BackupError(f"Unsupported backup version: {record.get('version')}")
+                    continue
+                if kind not in MODELS:
+                    raise BackupError(f"Unknown record type: {kind}")
+                # Сначала сбрасываем предыдущую пачку, чтобы ее id попали в id_map
+                if kind != current or len(batch) >= IMPORT_BATCH_SIZE:
+                    flush()
+                    current = kind
+                values = {}
+                for field, value in data.items():
+                    if field not in converters[kind]:
+                        continue
+                    convert = converters[kind][field]
+                    values[field] = convert(value) if convert and isinstance(value, str) else value
+                if kind in REFERENCES:
+                    field, target = REFERENCES[kind]
+                    if values.get(field) not in id_map[target]:
+                        raise BackupError(f"{field}={values.get(field)} refers to a record missing from the backup")
+                    values[field] = id_map[target][values[field]]
+                if kind == "notifications":
+                    _remap_notification(values, id_map["contracts"])
+                values["user_id"] = user_id
+            except (KeyError, TypeError, ValueError) as e:
+                raise BackupError(f"Line {line_no}: {e}")
+
+            old_ids.append(data.get("id"))
+            batch.append(values)
+        flush()
+        # Core insert мимо ORM: версию данных помечаем сами
+        versioning.mark_changed(db, user_id)
+        db.commit()
+    except (OSError, EOFError) as e:
+        # Битый gzip-архив
+        db.rollback()
+        raise BackupError(f"Cannot read backup: {e}")
+    except IntegrityError as e:
+        db.rollback()
+        raise BackupError(f"Backup violates constraints: {e.orig}")
+    except Exception:
+        db.rollback()
+        raise
+    return counts
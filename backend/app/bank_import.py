@@ -0,0 +1,289 @@
+# backend/app/bank_import.py
+import codecs
+import csv
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models, rollups, versioning
+
+INSERT_BATCH_SIZE = 1000
+UNMATCHED_REPORT_LIMIT = 1000
+# Платеж может прийти немного раньше начала или позже окончания договора
+CONTRACT_GRACE = timedelta(days=31)
+
+# Организационно-правовые формы не годятся как ключ поиска арендатора
+LEGAL_FORMS = {"ооо", "ао", "зао", "пао", "оао", "нко", "ип"}
+
+DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d", "%d/%m/%Y", "%d.%m.%y")
+
+# Варианты заголовков CSV-выписок разных банков
+CSV_COLUMNS = {
+    "date": ("date", "дата", "дата операции", "дата платежа", "дата проводки"),
+    "amount": ("amount", "сумма", "сумма операции", "сумма платежа"),
+    "credit": ("credit", "приход", "поступление", "кредит", "зачисление"),
+    "debit": ("debit", "расход", "списание", "дебет"),
+    "payer": ("payer", "плательщик", "контрагент", "counterparty", "отправитель"),
+    "purpose": ("purpose", "description", "назначение платежа", "назначение", "описание"),
+}
+
+
+class StatementLine(NamedTuple):
+    line_no: int
+    date: date
+    amount: float
+    payer: str
+    purpose: str
+
+
+class StatementError(ValueError):
+    pass
+
+
+def parse_amount(value: str) -> float:
+    value = (value or "").replace("\xa0", "").replace(" ", "").replace(",", ".")
+    return float(value) if value else 0.0
+
+
+def parse_date(value: str) -> date:
+    value = (value or "").strip().split(" ")[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise StatementError(f"Unrecognized date: {value!r}")
+
+
+def normalize_name(value: str) -> str:
+    value = (value or "").lower().replace("ё", "е")
+    return " ".join(re.findall(r"\w+", value))
+
+
+def iter_csv_lines(lines: Iterable[str]) -> Iterator[StatementLine]:
+    """Построчно разбирает CSV-выписку, возвращая только поступления."""
+    lines = iter(lines)
+    header = next(lines, "")
+    delimiter = ";" if header.count(";") >= header.count(",") else ","
+    names = [normalize_name(name) for name in next(csv.reader([header], delimiter=delimiter))]
+
+    columns = {}
+    for key, variants in CSV_COLUMNS.items():
+        for index, name in enumerate(names):
+            if name in variants:
+                columns[key] = index
+                break
+    if "date" not in columns or ("amount" not in columns and "credit" not in columns):
+        raise StatementError("CSV statement must have date and amount (or credit) columns")
+
+    def cell(row, key):
+        index = columns.get(key)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    for line_no, row in enumerate(csv.reader(lines, delimiter=delimiter), start=2):
+        if not row or not any(row):
+            continue
+        try:
+            if "credit" in columns:
+                amount = parse_amount(cell(row, "credit"))
+            else:
+                amount = parse_amount(cell(row, "amount"))
+            if amount <= 0:
+                continue
+            yield StatementLine(line_no, parse_date(cell(row, "date")), amount, cell(row, "payer"), cell(row, "purpose"))
+        except ValueError as e:
+            raise StatementError(f"Line {line_no}: {e}")
+
+
+def iter_1c_lines(lines: Iterable[str], bank_account: Optional[str] = None) -> Iterator[StatementLine]:
+    """Разбирает формат 1CClientBankExchange по секциям документов."""
+    document = None
+    start_line = 0
+    for line_no, raw in enumerate(lines, start=1):
+        line = raw.strip()
+        if line.startswith("СекцияДокумент"):
+            document, start_line = {}, line_no
+            continue
+        if line == "КонецДокумента" and document is not None:
+            # Поступление: есть ДатаПоступило или получатель - наш счет
+            incoming = bool(document.get("ДатаПоступило")) or (
+                bank_account is not None and document.get("ПолучательСчет") == bank_account
+            )
+            if incoming:
+                try:
+                    amount = parse_amount(document.get("Сумма", ""))
+                    doc_date = parse_date(document.get("ДатаПоступило") or document.get("Дата", ""))
+                except ValueError as e:
+                    raise StatementError(f"Document at line {start_line}: {e}")
+                if amount > 0:
+                    payer = document.get("Плательщик1") or document.get("Плательщик", "")
+                    yield StatementLine(start_line, doc_date, amount, payer, document.get("НазначениеПлатежа", ""))
+            document = None
+            continue
+        if document is not None and "=" in line:
+            key, _, value = line.partition("=")
+            document[key] = value.strip()
+
+
+class ContractIndex:
+    """Индекс договоров пользователя по имени арендатора и сумме аренды."""
+
+    def __init__(self, contracts: Iterable[Tuple[int, str, float, date, date]]):
+        self.contracts = {}
+        self.by_name: Dict[str, List[int]] = defaultdict(list)
+        self.by_amount: Dict[int, List[int]] = defaultdict(list)
+        for contract_id, tenant_name, rent_amount, start_date, end_date in contracts:
+            self.contracts[contract_id] = (rent_amount, start_date, end_date)
+            name = normalize_name(tenant_name)
+            if name:
+                self.by_name[name].append(contract_id)
+                tokens = [token for token in name.split(" ") if token not in LEGAL_FORMS]
+                surname = tokens[0] if tokens else name
+                if surname != name:
+                    self.by_name[surname].append(contract_id)
+            self.by_amount[round((rent_amount or 0.0) * 100)].append(contract_id)
+
+    def _active(self, contract_ids: Iterable[int], on: date) -> List[int]:
+        return [
+            contract_id for contract_id in dict.fromkeys(contract_ids)
+            if self.contracts[contract_id][1] - CONTRACT_GRACE <= on <= self.contracts[contract_id][2] + CONTRACT_GRACE
+        ]
+
+    def _expected_distance(self, contract_id: int, on: date) -> int:
+        # Ожидаемый день оплаты - день начала договора
+        day = self.contracts[contract_id][1].day
+        return min(abs(on.day - day), 31 - abs(on.day - day))
+
+    def match(self, line: StatementLine) -> Tuple[Optional[int], str]:
+        payer = normalize_name(line.payer)
+        keys = [payer] + [token for token in payer.split(" ") if token not in LEGAL_FORMS]
+        candidates = self._active((cid for key in keys for cid in self.by_name.get(key, ())), line.date)
+        cents = round(line.amount * 100)
+
+        if candidates:
+            if len(candidates) > 1:
+                exact = [cid for cid in candidates if round(self.contracts[cid][0] * 100) == cents]
+                candidates = exact or candidates
+                candidates.sort(key=lambda cid: self._expected_distance(cid, line.date))
+            return candidates[0], "name"
+
+        # Без совпадения по имени сопоставляем только однозначную сумму
+        by_amount = self._active(self.by_amount.get(cents, ()), line.date)
+        if len(by_amount) == 1:
+            return by_amount[0], "amount"
+        if by_amount:
+            return None, "ambiguous amount"
+        return None, "no matching contract"
+
+
+def _payment_key(row: dict) -> Tuple[int, date, int]:
+    return row["contract_id"], row["date"], round(row["amount"] * 100)
+
+
+def _existing_keys(db: Session, user_id: int, rows: List[dict]) -> set:
+    """Ключи уже загруженных платежей по договорам и диапазону дат пачки.
+
+    Запрос идет по индексу (contract_id, date), поэтому его цена зависит
+    от размера выписки, а не от всей истории платежей пользователя.
+    """
+    if not rows:
+        return set()
+    dates = [row["date"] for row in rows]
+    query = db.query(models.Payment.contract_id, models.Payment.date, models.Payment.amount).filter(
+        models.Payment.user_id == user_id,
+        models.Payment.contract_id.in_({row["contract_id"] for row in rows}),
+        models.Payment.date >= min(dates),
+        models.Payment.date <= max(dates),
+    )
+    return {(contract_id, paid_on, round(amount * 100)) for contract_id, paid_on, amount in query}
+
+
+def detect_format(first_line: bytes) -> str:
+    return "1c" if first_line.lstrip(codecs.BOM_UTF8).startswith(b"1CClientBankExchange") else "csv"
+
+
+def import_statement(
+    db: Session,
+    user: models.User,
+    stream: BinaryIO,
+    statement_format: Optional[str] = None,
+    encoding: Optional[str] = None,
+) -> dict:
+    """Импортирует выписку потоково и вставляет найденные платежи пачками."""
+    contracts = db.query(
+        models.Contract.id,
+        models.Contract.tenant_name,
+        models.Contract.rent_amount,
+        models.Contract.start_date,
+        models.Contract.end_date,
+    ).filter(models.Contract.user_id == user.id)
+    index = ContractIndex(contracts)
+
+    # Первую строку читаем байтами, чтобы выбрать формат и кодировку
+    first = stream.readline()
+    if statement_format is None:
+        statement_format = detect_format(first)
+    if statement_format not in ("csv", "1c"):
+        raise StatementError(f"Unknown statement format: {statement_format}")
+    if encoding is None:
+        encoding = "cp1251" if statement_format == "1c" else "utf-8-sig"
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        raise StatementError(f"Unknown encoding: {encoding}")
+
+    def text_lines():
+        yield decoder.decode(first)
+        for raw in stream:
+            yield decoder.decode(raw)
+
+    if statement_format == "1c":
+        lines = iter_1c_lines(text_lines(), bank_account=user.bank_account)
+    else:
+        lines = iter_csv_lines(text_lines())
+
+    report = {"format": statement_format, "credits": 0, "matched": 0, "duplicates": 0, "unmatched_count": 0, "unmatched": []}
+    batch = []
+    # Ключи строк этой выписки: повтор внутри файла тоже дубликат
+    seen = set()
+
+    def flush():
+        # Повторный импорт не задваивает платежи: сверяемся с базой по пачке
+        existing = _existing_keys(db, user.id, batch)
+        rows = [row for row in batch if _payment_key(row) not in existing]
+        report["duplicates"] += len(batch) - len(rows)
+        if rows:
+            db.execute(insert(models.Payment), rows)
+            rollups.mark_dirty(db, user.id, (row["date"] for row in rows))
+            report["matched"] += len(rows)
+        batch.clear()
+
+    try:
+        for line in lines:
+            report["credits"] += 1
+            contract_id, reason = index.match(line)
+            if contract_id is None:
+                report["unmatched_count"] += 1
+                if len(report["unmatched"]) < UNMATCHED_REPORT_LIMIT:
+                    report["unmatched"].append({**line._asdict(), "reason": reason})
+                continue
+            row = {"user_id": user.id, "contract_id": contract_id, "amount": line.amount, "date": line.date}
+            if _payment_key(row) in seen:
+                report["duplicates"] += 1
+                continue
+            seen.add(_payment_key(row))
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                flush()
+        flush()
+        if report["matched"]:
+            versioning.mark_changed(db, user.id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return report
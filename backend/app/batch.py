@@ -0,0 +1,291 @@
+# backend/app/batch.py
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, rollups, schemas, versioning
+
+# Имя сущности -> (модель, схема создания, схема изменения)
+ENTITIES = {
+    "properties": (models.Property, schemas.PropertyCreate, schemas.PropertyUpdate),
+    "contracts": (models.Contract, schemas.ContractCreate, schemas.ContractUpdate),
+    "payments": (models.Payment, schemas.PaymentCreate, schemas.PaymentUpdate),
+    "expenses": (models.Expense, schemas.ExpenseCreate, schemas.ExpenseUpdate),
+}
+# Ссылка на родителя, который тоже должен принадлежать пользователю
+PARENTS = {
+    "contracts": ("property_id", models.Property),
+    "payments": ("contract_id", models.Contract),
+    "expenses": ("property_id", models.Property),
+}
+DATED = ("payments", "expenses")
+# "$p1" в поле родителя - ссылка на операцию пачки с ref="p1"
+REF_PREFIX = "$"
+# Создаем родителей раньше детей, удаляем - наоборот
+CREATE_ORDER = ("properties", "contracts", "payments", "expenses")
+DELETE_ORDER = CREATE_ORDER[::-1]
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _parse(op: schemas.BatchOperation) -> dict:
+    if op.entity not in ENTITIES:
+        raise BatchError(f"Unknown entity: {op.entity}")
+    _, create_schema, update_schema = ENTITIES[op.entity]
+    if op.op not in ("create", "update", "delete"):
+        raise BatchError(f"Unknown operation: {op.op}")
+    if op.op != "create" and op.id is None:
+        raise BatchError("id is required for update and delete")
+    if op.op == "delete":
+        return {}
+    try:
+        if op.op == "create":
+            return create_schema(**(op.data or {})).dict()
+        return update_schema(**(op.data or {})).dict(exclude_unset=True)
+    except ValidationError as e:
+        raise BatchError(f"Invalid {op.entity} data: {e}")
+
+
+def _split_ref(op: schemas.BatchOperation) -> Tuple[schemas.BatchOperation, Optional[str]]:
+    """Ссылку на родителя из этой же пачки заменяет заглушкой для валидации схемой."""
+    if op.entity not in PARENTS or not op.data:
+        return op, None
+    field = PARENTS[op.entity][0]
+    value = op.data.get(field)
+    if not (isinstance(value, str) and value.startswith(REF_PREFIX)):
+        return op, None
+    return op.copy(update={"data": {**op.data, field: 0}}), value[len(REF_PREFIX):]
+
+
+def _owned(db: Session, model, user_id: int, ids) -> Dict[int, object]:
+    """id -> дата (для платежей и расходов) по записям пользователя."""
+    ids = list(set(ids))
+    if not ids:
+        return {}
+    date_column = model.date if hasattr(model, "date") else model.id
+    rows = db.execute(select(model.id, date_column).where(model.user_id == user_id, model.id.in_(ids)))
+    return dict(rows.all())
+
+
+class Batch:
+    """Пачка операций одного пользователя, разложенная по сущностям."""
+
+    def __init__(self, db: Session, user_id: int, operations: List[schemas.BatchOperation]):
+        self.db = db
+        self.user_id = user_id
+        self.results: List[dict] = [
+            {"index": index, "entity": op.entity, "op": op.op, "id": op.id, "ref": op.ref, "status": "pending", "error": None}
+            for index, op in enumerate(operations)
+        ]
+        self.creates = defaultdict(list)  # entity -> [(index, values)]
+        self.updates = defaultdict(list)  # entity -> [(index, id, values)]
+        self.deletes = defaultdict(list)  # entity -> [(index, id)]
+        self.old_dates = defaultdict(dict)
+        self.refs = {}  # ref -> index создающей операции
+        self.links = {}  # index -> ref родителя
+
+        for index, op in enumerate(operations):
+            if op.ref is not None:
+                if op.op != "create":
+                    self.fail(index, "ref is only allowed for create")
+                    continue
+                if op.ref in self.refs:
+                    self.fail(index, f"Duplicate ref: {op.ref}")
+                    continue
+                self.refs[op.ref] = index
+            op, link = _split_ref(op)
+            try:
+                values = _parse(op)
+            except BatchError as e:
+                self.fail(index, str(e))
+                continue
+            if link is not None:
+                self.links[index] = link
+            if op.op == "create":
+                self.creates[op.entity].append((index, values))
+            elif op.op == "update":
+                self.updates[op.entity].append((index, op.id, values))
+            else:
+                self.deletes[op.entity].append((index, op.id))
+
+    def fail(self, index: int, error: str):
+        self.results[index].update(status="error", error=error)
+
+    @property
+    def failed(self) -> bool:
+        return any(result["status"] == "error" for result in self.results)
+
+    def check_access(self):
+        """Проверяет одним запросом на таблицу, что все id принадлежат пользователю."""
+        for entity in CREATE_ORDER:
+            model = ENTITIES[entity][0]
+            targets = [item[1] for item in self.updates[entity]] + [item[1] for item in self.deletes[entity]]
+            owned = _owned(self.db, model, self.user_id, targets)
+            self.old_dates[entity] = owned
+            for index, entity_id, _ in self.updates[entity]:
+                if entity_id not in owned:
+                    self.fail(index, f"{entity} #{entity_id} not found")
+            for index, entity_id in self.deletes[entity]:
+                if entity_id not in owned:
+                    self.fail(index, f"{entity} #{entity_id} not found")
+
+            if entity in PARENTS:
+                field, parent = PARENTS[entity]
+                items = [(index, values) for index, values in self.creates[entity]]
+                items += [(index, values) for index, _, values in self.updates[entity]]
+                linked = [(index, values) for index, values in items if index in self.links]
+                items = [(index, values) for index, values in items if index not in self.links]
+                parents = _owned(self.db, parent, self.user_id, [values[field] for _, values in items if field in values])
+                for index, values in items:
+                    if field in values and values[field] not in parents:
+                        self.fail(index, f"{parent.__tablename__} #{values[field]} not found")
+                # Родитель из этой же пачки создается раньше (CREATE_ORDER) и
+                # принадлежит пользователю, проверяем только саму ссылку
+                for index, _ in linked:
+                    ref = self.links[index]
+                    target = self.refs.get(ref)
+                    if target is None or self.results[target]["entity"] != parent.__tablename__:
+                        self.fail(index, f"Unknown {parent.__tablename__} ref: {REF_PREFIX}{ref}")
+                    elif self.results[target]["status"] == "error":
+                        self.fail(index, f"{parent.__tablename__} {REF_PREFIX}{ref} failed")
+
+    def pending(self, items) -> list:
+        return [item for item in items if self.results[item[0]]["status"] == "pending"]
+
+    def resolve(self, entity: str, items: list) -> list:
+        """Подставляет id родителей, созданных раньше в этой же пачке."""
+        ready = []
+        for item in items:
+            index, values = item[0], item[-1]
+            if index in self.links:
+                ref = self.links[index]
+                target = self.results[self.refs[ref]]
+                if target["status"] != "created":
+                    # В режиме SAVEPOINT создание родителя могло не пройти
+                    self.fail(index, f"{target['entity']} {REF_PREFIX}{ref} failed")
+                    continue
+                values[PARENTS[entity][0]] = target["id"]
+            ready.append(item)
+        return ready
+
+    def groups(self):
+        """Операции в порядке выполнения: (функция, сущность, элементы).
+
+        Генератор ленивый: ссылки на родителей разрешаются, когда
+        предыдущие группы уже выполнены.
+        """
+        for entity in CREATE_ORDER:
+            yield self.create, entity, self.resolve(entity, self.pending(self.creates[entity]))
+        for entity in CREATE_ORDER:
+            yield self.update, entity, self.resolve(entity, self.pending(self.updates[entity]))
+        for entity in DELETE_ORDER:
+            yield self.delete, entity, self.pending(self.deletes[entity])
+
+    def create(self, entity: str, items: list):
+        model = ENTITIES[entity][0]
+        rows = [{**values, "user_id": self.user_id} for _, values in items]
+        # insertmanyvalues: многострочный INSERT ... VALUES ... RETURNING id,
+        # id возвращаются в порядке строк
+        ids = self.db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+        for (index, _), new_id in zip(items, ids):
+            self.results[index].update(id=new_id, status="created")
+        if entity in DATED:
+            rollups.mark_dirty(self.db, self.user_id, (row["date"] for row in rows))
+
+    def update(self, entity: str, items: list):
+        model = ENTITIES[entity][0]
+        # UPDATE по первичному ключу пачкой (executemany); одинаковый набор
+        # колонок нужен для одного оператора, поэтому группируем по ключам
+        by_columns = defaultdict(list)
+        for index, entity_id, values in items:
+            by_columns[tuple(sorted(values))].append({"id": entity_id, **values})
+        for rows in by_columns.values():
+            if len(rows[0]) > 1:
+                self.db.execute(update(model), rows)
+        for index, entity_id, values in items:
+            self.results[index]["status"] = "updated"
+        if entity in DATED:
+            dates = [values.get("date") for _, _, values in items]
+            dates += [self.old_dates[entity][entity_id] for _, entity_id, _ in items]
+            rollups.mark_dirty(self.db, self.user_id, dates)
+        elif entity == "contracts":
+            rollups.mark_contracts_dirty(self.db, [
+                entity_id for _, entity_id, values in items if "property_id" in values or "tenant_type" in values
+            ])
+
+    def delete(self, entity: str, items: list):
+        model = ENTITIES[entity][0]
+        ids = [entity_id for _, entity_id in items]
+        self.db.execute(delete(model).where(model.user_id == self.user_id, model.id.in_(ids)))
+        self.db.execute(insert(models.Tombstone), [
+            {"user_id": self.user_id, "entity": entity, "entity_id": entity_id} for entity_id in ids
+        ])
+        for index, _ in items:
+            self.results[index]["status"] = "deleted"
+        if entity in DATED:
+            rollups.mark_dirty(self.db, self.user_id, (self.old_dates[entity][entity_id] for entity_id in ids))
+
+
+def apply_batch(db: Session, user_id: int, operations: List[schemas.BatchOperation], atomic: bool = True) -> Tuple[List[dict], bool]:
+    """Применяет операции в одной транзакции; возвращает (результаты, закоммичено ли).
+
+    atomic=True - все или ничего: любая ошибка откатывает всю пачку.
+    atomic=False - каждая группа операций идет в своем SAVEPOINT; если
+    группа упала на ограничениях базы, ее элементы повторяются по одному,
+    чтобы ошибку получили только виноватые.
+    """
+    batch = Batch(db, user_id, operations)
+    try:
+        batch.check_access()
+        if atomic and batch.failed:
+            db.rollback()
+            return _finish(batch, committed=False), False
+
+        for run, entity, items in batch.groups():
+            if not items:
+                continue
+            if atomic:
+                try:
+                    run(entity, items)
+                except IntegrityError as e:
+                    db.rollback()
+                    for item in items:
+                        batch.fail(item[0], f"Constraint violation: {e.orig}")
+                    return _finish(batch, committed=False), False
+                continue
+            try:
+                with db.begin_nested():
+                    run(entity, items)
+            except IntegrityError:
+                for item in items:
+                    try:
+                        with db.begin_nested():
+                            run(entity, [item])
+                    except IntegrityError as e:
+                        batch.fail(item[0], f"Constraint violation: {e.orig}")
+
+        if any(result["status"] != "error" for result in batch.results):
+            # Core-операции мимо ORM: версию данных помечаем сами
+            versioning.mark_changed(db, user_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return _finish(batch, committed=True), True
+
+
+def _finish(batch: Batch, committed: bool) -> List[dict]:
+    if not committed:
+        # Откачено вместе со всей пачкой
+        for result in batch.results:
+            if result["status"] != "error":
+                if result["op"] == "create":
+                    result["id"] = None
+                result["status"] = "skipped"
+    return batch.results
@@ -0,0 +1,202 @@
+# backend/app/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Optional
+
+from sqlalchemy import Date, DateTime
+
+from . import models, versioning
+from .config import settings
+
+try:
+    import redis
+except ImportError:  # redis нужен только для общего кэша между процессами
+    redis = None
+
+# Хэш пароля в кэш не кладем: обработчикам он не нужен. data_version
+# едет вместе с принципалом, чтобы cached_view не читал его из базы;
+# после записи его поднимает bump_version (app/versioning.py)
+PRINCIPAL_COLUMNS = [column for column in models.User.__table__.columns if column.name != "hashed_password"]
+
+
+class MemoryBackend:
+    """Общий бэкенд в памяти процесса; заменяет Redis в тестах."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    def __init__(self, url: str, prefix: str = "principal:"):
+        if redis is None:
+            raise RuntimeError("PRINCIPAL_CACHE_URL is set but the redis package is not installed")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(self._prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float):
+        self._client.set(self._prefix + key, value, px=int(ttl * 1000))
+
+    def delete(self, key: str):
+        self._client.delete(self._prefix + key)
+
+
+class PrincipalCache:
+    """LRU-кэш пользователей по subject токена с TTL и счетчиками.
+
+    Локальный уровень живет в процессе; общий бэкенд (если задан) позволяет
+    другим процессам не ходить в базу и получать инвалидацию.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, backend=None, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _store(self, key: str, values: dict):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1].get("data_version") or 0) > (values.get("data_version") or 0):
+                # Пользователь прочитан до записи, которая уже подняла версию: не откатываем ее
+                values = {**values, "data_version": entry[1]["data_version"]}
+            self._entries[key] = (self._clock() + self.ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+        if self.backend is not None:
+            raw = self.backend.get(key)
+            if raw is not None:
+                values = decode_principal(raw)
+                self._store(key, values)
+                with self._lock:
+                    self.shared_hits += 1
+                return values
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, values: dict):
+        self._store(key, values)
+        if self.backend is not None:
+            self.backend.set(key, encode_principal(values), self.ttl)
+
+    def bump_version(self, key: str, version: int):
+        """Новая версия данных после коммита записи.
+
+        Локальную запись обновляем на месте, общую удаляем: другие процессы
+        перечитают пользователя из базы.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1].get("data_version") or 0) < version:
+                self._entries[key] = (entry[0], {**entry[1], "data_version": version})
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def user_to_principal(user: models.User) -> dict:
+    return {column.name: getattr(user, column.name) for column in PRINCIPAL_COLUMNS}
+
+
+def principal_to_user(values: dict) -> models.User:
+    # Новый несвязанный с сессией объект на каждый запрос, чтобы обработчики
+    # разных потоков не делили один экземпляр
+    return models.User(**values)
+
+
+def encode_principal(values: dict) -> str:
+    return json.dumps({
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in values.items()
+    })
+
+
+def decode_principal(raw: str) -> dict:
+    values = json.loads(raw)
+    for column in PRINCIPAL_COLUMNS:
+        value = values.get(column.name)
+        if isinstance(value, str):
+            if isinstance(column.type, DateTime):
+                values[column.name] = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                values[column.name] = date.fromisoformat(value)
+    return values
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    backend=RedisBackend(settings.PRINCIPAL_CACHE_URL) if settings.PRINCIPAL_CACHE_URL else None,
+)
+
+
+def _bump_versions(committed: dict):
+    for email, version in committed.values():
+        principal_cache.bump_version(email, version)
+
+
+versioning.commit_listeners.append(_bump_versions)
@@ -12,8 +12,94 @@ class Settings:
         raw_db_url = raw_db_url.replace("postgres://", "postgresql://", 1)
     
     DATABASE_URL: str = raw_db_url
+    # 1 - CRUD-эндпоинты работают через AsyncSession (asyncpg/aiosqlite)
+    DATABASE_ASYNC: bool = os.getenv("DATABASE_ASYNC", "0").lower() in ("1", "true", "yes")
+
+    # Пул соединений синхронного и асинхронного движков
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Соединения старше стольких секунд пересоздаются - вместо pre-ping на каждой выдаче
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "0").lower() in ("1", "true", "yes")
+    # 1 - за PgBouncer в режиме transaction pooling: без своего пула
+    # и без серверных prepared statements
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "0").lower() in ("1", "true", "yes")
+
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-key-here-make-it-very-long-and-random-12345")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
 
+    # Стоимость PBKDF2; хэши с меньшим числом раундов пересчитываются при входе
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "30000"))
+    # Сколько паролей хэшируется одновременно
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+    # Планировщик уведомлений; при нескольких воркерах сканирует один из них
+    NOTIFICATION_SCHEDULER_ENABLED: bool = os.getenv("NOTIFICATION_SCHEDULER_ENABLED", "1").lower() in ("1", "true", "yes")
+    NOTIFICATION_SCAN_INTERVAL: int = int(os.getenv("NOTIFICATION_SCAN_INTERVAL", str(60 * 60)))
+    NOTIFY_PAYMENT_DAYS: int = int(os.getenv("NOTIFY_PAYMENT_DAYS", "7"))
+    NOTIFY_CONTRACT_DAYS: int = int(os.getenv("NOTIFY_CONTRACT_DAYS", "30"))
+    NOTIFY_TAX_DAYS: int = int(os.getenv("NOTIFY_TAX_DAYS", "7"))
+    # Как часто процесс проверяет базу на новые уведомления для своих
+    # SSE-потоков (один запрос на процесс, а не на поток)
+    SSE_POLL_SECONDS: int = int(os.getenv("SSE_POLL_SECONDS", "30"))
+    # Пустой комментарий в SSE-поток, чтобы прокси не закрывал соединение
+    SSE_KEEPALIVE_SECONDS: int = int(os.getenv("SSE_KEEPALIVE_SECONDS", "30"))
+
+    # Кэш пользователей, найденных по токену (auth.get_current_user)
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    # redis://... - общий кэш для всех воркеров; пусто - только локальный
+    PRINCIPAL_CACHE_URL: str = os.getenv("PRINCIPAL_CACHE_URL", "")
+
+    # Готовые JSON-ответы списков по версии данных пользователя; 0 - без кэша
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    RESPONSE_CACHE_MAX_BODY: int = int(os.getenv("RESPONSE_CACHE_MAX_BODY", str(1024 * 1024)))
+
+    # Списки без ?include= отдаются строками колонок прямо в JSON (app/serialization.py)
+    FAST_LIST_RESPONSES: bool = os.getenv("FAST_LIST_RESPONSES", "1").lower() in ("1", "true", "yes")
+
+    # Максимум операций в одном POST /batch
+    BATCH_MAX_OPERATIONS: int = int(os.getenv("BATCH_MAX_OPERATIONS", "5000"))
+
+    # Реплики только для чтения (через запятую); GET-эндпоинты читают с них по кругу
+    DATABASE_REPLICA_URLS: list = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    # Сколько секунд после своей записи пользователь читает только с основной базы
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    # На сколько секунд исключать реплику после ошибки подключения
+    REPLICA_RETRY_SECONDS: float = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+    # Лимиты попыток входа (token bucket): в минуту и запас для всплеска; 0 - без лимита
+    LOGIN_IP_PER_MINUTE: float = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+    LOGIN_IP_BURST: float = float(os.getenv("LOGIN_IP_BURST", "10"))
+    LOGIN_ACCOUNT_PER_MINUTE: float = float(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", "5"))
+    LOGIN_ACCOUNT_BURST: float = float(os.getenv("LOGIN_ACCOUNT_BURST", "5"))
+    # redis://... - общие лимиты для всех воркеров; пусто - в памяти процесса
+    RATE_LIMIT_URL: str = os.getenv("RATE_LIMIT_URL", "")
+    # Одновременные запросы к тяжелым маршрутам ("METHOD /path=N,..."), остальные
+    # ждут в очереди до ADMISSION_MAX_WAIT секунд или сразу получают 503
+    ADMISSION_LIMITS: str = os.getenv(
+        "ADMISSION_LIMITS",
+        f"POST /token={PASSWORD_HASH_WORKERS * 2},POST /users/={PASSWORD_HASH_WORKERS * 2},"
+        "GET /export=2,POST /import=2,POST /batch=4,POST /payments/import=2,POST /tax/simulate=4",
+    )
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+    ADMISSION_MAX_WAIT: float = float(os.getenv("ADMISSION_MAX_WAIT", "2"))
+
+    # Сценариев в одном POST /tax/simulate (не считая базового)
+    SIMULATOR_MAX_SCENARIOS: int = int(os.getenv("SIMULATOR_MAX_SCENARIOS", "10000"))
+
+    # Фоновые задачи (app/jobs.py): процессы-воркеры при старте API; 0 - запускать
+    # отдельно через python -m app.jobs. При нескольких воркерах uvicorn у каждого свои
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "1"))
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", "1"))
+    # Задача в running дольше этого срока считается брошенной и перезапускается
+    JOB_TIMEOUT_SECONDS: int = int(os.getenv("JOB_TIMEOUT_SECONDS", str(30 * 60)))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETENTION_DAYS: int = int(os.getenv("JOB_RETENTION_DAYS", "30"))
+
+    # Запросы, сделавшие больше SQL-запросов, попадают в лог и в /metrics; 0 - не отмечать
+    METRICS_QUERY_BUDGET: int = int(os.getenv("METRICS_QUERY_BUDGET", "20"))
+
 settings = Settings()
@@ -1,6 +1,14 @@
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session, joinedload, selectinload
 from . import models, schemas
+from .pagination import keyset_page
+from .cache import principal_cache
 from .auth import get_password_hash
+from .serialization import columns_for
+from .tax import period_key
 
 # User CRUD
 def get_user(db: Session, user_id: int):
@@ -12,8 +20,12 @@ def get_user_by_email(db: Session, email: str):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def get_users_page(db: Session, after: str = None, limit: int = 100):
+    return keyset_page(db.query(models.User), [models.User.id], after=after, limit=limit)
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
@@ -28,6 +40,8 @@ def create_user(db: Session, user: schemas.UserCreate):
 def update_user(db: Session, user_id: int, user: schemas.UserUpdate):
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
+        # Сбрасываем кэш и по старому email: он мог поменяться
+        principal_cache.invalidate(db_user.email)
         update_data = user.dict(exclude_unset=True)
         if 'password' in update_data:
             hashed_password = get_password_hash(update_data['password'])
@@ -37,14 +51,60 @@ def update_user(db: Session, user_id: int, user: schemas.UserUpdate):
             setattr(db_user, field, value)
         db.commit()
         db.refresh(db_user)
+        principal_cache.invalidate(db_user.email)
+    return db_user
+
+def update_password_hash(db: Session, db_user: models.User, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    db.commit()
     return db_user
 
+# Связи, которые можно подгрузить параметром ?include=: фиксированное
+# число запросов на страницу вместо lazy-запроса на каждую строку.
+# Связанные строки тоже фильтруются по владельцу, а не только по внешнему ключу
+PROPERTY_INCLUDES = {
+    "contracts": lambda user_id: selectinload(models.Property.contracts.and_(models.Contract.user_id == user_id)),
+    "expenses": lambda user_id: selectinload(models.Property.expenses.and_(models.Expense.user_id == user_id)),
+}
+CONTRACT_INCLUDES = {
+    "property": lambda user_id: joinedload(models.Contract.property.and_(models.Property.user_id == user_id)),
+    "payments": lambda user_id: selectinload(models.Contract.payments.and_(models.Payment.user_id == user_id)),
+}
+
+class IncludeError(ValueError):
+    pass
+
+class OwnershipError(ValueError):
+    """Ссылка на объект другого пользователя (или несуществующий)."""
+
+def include_options(include: str, allowed: dict, user_id: int) -> list:
+    names = [name.strip() for name in (include or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise IncludeError(f"Unknown include: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return [allowed[name](user_id) for name in dict.fromkeys(names)]
+
+# Tombstones (для /sync)
+def record_tombstone(db: Session, entity: str, entity_id: int, user_id: int):
+    db.add(models.Tombstone(user_id=user_id, entity=entity, entity_id=entity_id))
+
 # Property CRUD
-def get_properties(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Property).filter(models.Property.user_id == user_id).offset(skip).limit(limit).all()
+def get_properties(db: Session, user_id: int, skip: int = 0, limit: int = 100, options: list = ()):
+    return db.query(models.Property).options(*options).filter(models.Property.user_id == user_id).offset(skip).limit(limit).all()
 
-def get_property(db: Session, property_id: int, user_id: int):
-    return db.query(models.Property).filter(models.Property.id == property_id, models.Property.user_id == user_id).first()
+def get_properties_page(db: Session, user_id: int, after: str = None, limit: int = 100, options: list = ()):
+    query = db.query(models.Property).options(*options).filter(models.Property.user_id == user_id)
+    return keyset_page(query, [models.Property.id], after=after, limit=limit)
+
+def get_properties_rows(db: Session, user_id: int, after: str = None, limit: int = 100, skip: int = 0):
+    # Только колонки схемы ответа, без ORM-объектов - для быстрого пути в main.py
+    query = db.query(*columns_for(models.Property, schemas.Property)).filter(models.Property.user_id == user_id)
+    if skip:
+        return query.order_by(models.Property.id).offset(skip).limit(limit).all(), None
+    return keyset_page(query, [models.Property.id], after=after, limit=limit)
+
+def get_property(db: Session, property_id: int, user_id: int, options: list = ()):
+    return db.query(models.Property).options(*options).filter(models.Property.id == property_id, models.Property.user_id == user_id).first()
 
 def create_property(db: Session, property: schemas.PropertyCreate, user_id: int):
     db_property = models.Property(**property.dict(), user_id=user_id)
@@ -66,17 +126,33 @@ def delete_property(db: Session, property_id: int, user_id: int):
     db_property = db.query(models.Property).filter(models.Property.id == property_id, models.Property.user_id == user_id).first()
     if db_property:
         db.delete(db_property)
+        record_tombstone(db, "properties", property_id, user_id)
         db.commit()
     return db_property
 
 # Contract CRUD
-def get_contracts(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Contract).filter(models.Contract.user_id == user_id).offset(skip).limit(limit).all()
+def get_contracts(db: Session, user_id: int, skip: int = 0, limit: int = 100, options: list = ()):
+    return db.query(models.Contract).options(*options).filter(models.Contract.user_id == user_id).offset(skip).limit(limit).all()
+
+def get_contracts_page(db: Session, user_id: int, after: str = None, limit: int = 100, options: list = ()):
+    query = db.query(models.Contract).options(*options).filter(models.Contract.user_id == user_id)
+    return keyset_page(query, [models.Contract.id], after=after, limit=limit)
+
+def get_contracts_rows(db: Session, user_id: int, after: str = None, limit: int = 100, skip: int = 0):
+    query = db.query(*columns_for(models.Contract, schemas.Contract)).filter(models.Contract.user_id == user_id)
+    if skip:
+        return query.order_by(models.Contract.id).offset(skip).limit(limit).all(), None
+    return keyset_page(query, [models.Contract.id], after=after, limit=limit)
+
+def get_contract(db: Session, contract_id: int, user_id: int, options: list = ()):
+    return db.query(models.Contract).options(*options).filter(models.Contract.id == contract_id, models.Contract.user_id == user_id).first()
 
-def get_contract(db: Session, contract_id: int, user_id: int):
-    return db.query(models.Contract).filter(models.Contract.id == contract_id, models.Contract.user_id == user_id).first()
+def check_property_owner(db: Session, property_id: int, user_id: int):
+    if get_property(db, property_id=property_id, user_id=user_id) is None:
+        raise OwnershipError("Property not found")
 
 def create_contract(db: Session, contract: schemas.ContractCreate, user_id: int):
+    check_property_owner(db, contract.property_id, user_id)
     db_contract = models.Contract(**contract.dict(), user_id=user_id)
     db.add(db_contract)
     db.commit()
@@ -86,6 +162,8 @@ def create_contract(db: Session, contract: schemas.ContractCreate, user_id: int)
 def update_contract(db: Session, contract_id: int, contract: schemas.ContractUpdate, user_id: int):
     db_contract = db.query(models.Contract).filter(models.Contract.id == contract_id, models.Contract.user_id == user_id).first()
     if db_contract:
+        if contract.property_id != db_contract.property_id:
+            check_property_owner(db, contract.property_id, user_id)
         for field, value in contract.dict(exclude_unset=True).items():
             setattr(db_contract, field, value)
         db.commit()
@@ -96,5 +174,124 @@ def delete_contract(db: Session, contract_id: int, user_id: int):
     db_contract = db.query(models.Contract).filter(models.Contract.id == contract_id, models.Contract.user_id == user_id).first()
     if db_contract:
         db.delete(db_contract)
+        record_tombstone(db, "contracts", contract_id, user_id)
         db.commit()
-    return db_contract
\ No newline at end of file
+    return db_contract
+
+# Payment CRUD
+def _payments_query(db: Session, columns, user_id: int, date_from: date = None, date_to: date = None, contract_id: int = None, property_id: int = None):
+    # Диапазон дат идет по индексу (user_id, date, id), договор - по (contract_id, date)
+    query = db.query(*columns).filter(models.Payment.user_id == user_id)
+    if contract_id is not None:
+        query = query.filter(models.Payment.contract_id == contract_id)
+    if property_id is not None:
+        query = query.join(models.Contract, models.Payment.contract_id == models.Contract.id).filter(models.Contract.property_id == property_id)
+    if date_from is not None:
+        query = query.filter(models.Payment.date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Payment.date <= date_to)
+    return query
+
+def get_payments_rows(db: Session, user_id: int, after: str = None, limit: int = 100, **filters):
+    query = _payments_query(db, columns_for(models.Payment, schemas.Payment), user_id, **filters)
+    return keyset_page(query, [models.Payment.date, models.Payment.id], after=after, limit=limit)
+
+def get_payment(db: Session, payment_id: int, user_id: int):
+    return db.query(models.Payment).filter(models.Payment.id == payment_id, models.Payment.user_id == user_id).first()
+
+def create_payment(db: Session, payment: schemas.PaymentCreate, user_id: int):
+    db_payment = models.Payment(**payment.dict(), user_id=user_id)
+    db.add(db_payment)
+    db.commit()
+    db.refresh(db_payment)
+    return db_payment
+
+def update_payment(db: Session, payment_id: int, payment: schemas.PaymentUpdate, user_id: int):
+    db_payment = get_payment(db, payment_id=payment_id, user_id=user_id)
+    if db_payment:
+        for field, value in payment.dict(exclude_unset=True).items():
+            setattr(db_payment, field, value)
+        db.commit()
+        db.refresh(db_payment)
+    return db_payment
+
+def delete_payment(db: Session, payment_id: int, user_id: int):
+    db_payment = get_payment(db, payment_id=payment_id, user_id=user_id)
+    if db_payment:
+        db.delete(db_payment)
+        record_tombstone(db, "payments", payment_id, user_id)
+        db.commit()
+    return db_payment
+
+def get_payment_totals(db: Session, user_id: int, period: str = "month", **filters):
+    year = extract("year", models.Payment.date)
+    month = extract("month", models.Payment.date)
+    query = _payments_query(db, [year, month, func.sum(models.Payment.amount), func.count(models.Payment.id)], user_id, **filters)
+    return _fold_totals(query.group_by(year, month), period)
+
+# Expense CRUD
+def _expenses_query(db: Session, columns, user_id: int, date_from: date = None, date_to: date = None, property_id: int = None):
+    # Диапазон дат идет по индексу (user_id, date, id), объект - по (property_id, date)
+    query = db.query(*columns).filter(models.Expense.user_id == user_id)
+    if property_id is not None:
+        query = query.filter(models.Expense.property_id == property_id)
+    if date_from is not None:
+        query = query.filter(models.Expense.date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Expense.date <= date_to)
+    return query
+
+def get_expenses_rows(db: Session, user_id: int, after: str = None, limit: int = 100, **filters):
+    query = _expenses_query(db, columns_for(models.Expense, schemas.Expense), user_id, **filters)
+    return keyset_page(query, [models.Expense.date, models.Expense.id], after=after, limit=limit)
+
+def get_expense(db: Session, expense_id: int, user_id: int):
+    return db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.user_id == user_id).first()
+
+def create_expense(db: Session, expense: schemas.ExpenseCreate, user_id: int):
+    db_expense = models.Expense(**expense.dict(), user_id=user_id)
+    db.add(db_expense)
+    db.commit()
+    db.refresh(db_expense)
+    return db_expense
+
+def update_expense(db: Session, expense_id: int, expense: schemas.ExpenseUpdate, user_id: int):
+    db_expense = get_expense(db, expense_id=expense_id, user_id=user_id)
+    if db_expense:
+        for field, value in expense.dict(exclude_unset=True).items():
+            setattr(db_expense, field, value)
+        db.commit()
+        db.refresh(db_expense)
+    return db_expense
+
+def delete_expense(db: Session, expense_id: int, user_id: int):
+    db_expense = get_expense(db, expense_id=expense_id, user_id=user_id)
+    if db_expense:
+        db.delete(db_expense)
+        record_tombstone(db, "expenses", expense_id, user_id)
+        db.commit()
+    return db_expense
+
+def get_expense_totals(db: Session, user_id: int, period: str = "month", **filters):
+    year = extract("year", models.Expense.date)
+    month = extract("month", models.Expense.date)
+    query = _expenses_query(db, [year, month, func.sum(models.Expense.amount), func.count(models.Expense.id)], user_id, **filters)
+    return _fold_totals(query.group_by(year, month), period)
+
+def _fold_totals(rows, period: str) -> dict:
+    # Суммы по месяцам считает база; в кварталы и годы сворачиваем
+    # не больше 12 строк на год
+    periods = defaultdict(lambda: [0.0, 0])
+    for year, month, amount, count in rows:
+        bucket = periods[period_key(int(year), int(month), period)]
+        bucket[0] += float(amount or 0.0)
+        bucket[1] += count
+    return {
+        "period": period,
+        "total": round(sum(amount for amount, _ in periods.values()), 2),
+        "count": sum(count for _, count in periods.values()),
+        "periods": [
+            {"period": key, "amount": round(amount, 2), "count": count}
+            for key, (amount, count) in sorted(periods.items())
+        ],
+    }
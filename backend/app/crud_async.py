@@ -0,0 +1,266 @@
+# backend/app/crud_async.py
+# Асинхронные версии функций из crud.py для режима DATABASE_ASYNC
+from datetime import date
+
+from sqlalchemy import extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas, auth, crud
+from .pagination import keyset_filter, split_page
+from .cache import principal_cache
+from .serialization import columns_for
+
+# User CRUD
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.scalar(select(models.User).filter(models.User.id == user_id))
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).filter(models.User.email == email))
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+    return (await db.scalars(select(models.User).offset(skip).limit(limit))).all()
+
+async def get_users_page(db: AsyncSession, after: str = None, limit: int = 100):
+    columns = [models.User.id]
+    items = (await db.scalars(keyset_filter(select(models.User), columns, after, limit))).all()
+    return split_page(items, columns, limit)
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str = None):
+    if hashed_password is None:
+        hashed_password = await auth.get_password_hash_async(user.password)
+    db_user = models.User(
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name,
+        landlord_type=user.landlord_type
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user(db: AsyncSession, user_id: int, user: schemas.UserUpdate):
+    db_user = await get_user(db, user_id)
+    if db_user:
+        principal_cache.invalidate(db_user.email)
+        update_data = user.dict(exclude_unset=True)
+        if 'password' in update_data:
+            update_data['hashed_password'] = await auth.get_password_hash_async(update_data['password'])
+            del update_data['password']
+        for field, value in update_data.items():
+            setattr(db_user, field, value)
+        await db.commit()
+        await db.refresh(db_user)
+        principal_cache.invalidate(db_user.email)
+    return db_user
+
+async def update_password_hash(db: AsyncSession, db_user: models.User, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    await db.commit()
+    return db_user
+
+# Tombstones (для /sync)
+def record_tombstone(db: AsyncSession, entity: str, entity_id: int, user_id: int):
+    db.add(models.Tombstone(user_id=user_id, entity=entity, entity_id=entity_id))
+
+# Property CRUD
+async def get_properties(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100, options: list = ()):
+    query = select(models.Property).options(*options).filter(models.Property.user_id == user_id).offset(skip).limit(limit)
+    return (await db.scalars(query)).all()
+
+async def get_properties_page(db: AsyncSession, user_id: int, after: str = None, limit: int = 100, options: list = ()):
+    columns = [models.Property.id]
+    query = select(models.Property).options(*options).filter(models.Property.user_id == user_id)
+    items = (await db.scalars(keyset_filter(query, columns, after, limit))).all()
+    return split_page(items, columns, limit)
+
+async def get_properties_rows(db: AsyncSession, user_id: int, after: str = None, limit: int = 100, skip: int = 0):
+    columns = [models.Property.id]
+    query = select(*columns_for(models.Property, schemas.Property)).filter(models.Property.user_id == user_id)
+    if skip:
+        return (await db.execute(query.order_by(models.Property.id).offset(skip).limit(limit))).all(), None
+    rows = (await db.execute(keyset_filter(query, columns, after, limit))).all()
+    return split_page(rows, columns, limit)
+
+async def get_property(db: AsyncSession, property_id: int, user_id: int, options: list = ()):
+    return await db.scalar(select(models.Property).options(*options).filter(models.Property.id == property_id, models.Property.user_id == user_id))
+
+async def create_property(db: AsyncSession, property: schemas.PropertyCreate, user_id: int):
+    db_property = models.Property(**property.dict(), user_id=user_id)
+    db.add(db_property)
+    await db.commit()
+    await db.refresh(db_property)
+    return db_property
+
+async def update_property(db: AsyncSession, property_id: int, property: schemas.PropertyUpdate, user_id: int):
+    db_property = await get_property(db, property_id, user_id)
+    if db_property:
+        for field, value in property.dict(exclude_unset=True).items():
+            setattr(db_property, field, value)
+        await db.commit()
+        await db.refresh(db_property)
+    return db_property
+
+async def delete_property(db: AsyncSession, property_id: int, user_id: int):
+    db_property = await get_property(db, property_id, user_id)
+    if db_property:
+        await db.delete(db_property)
+        record_tombstone(db, "properties", property_id, user_id)
+        await db.commit()
+    return db_property
+
+# Contract CRUD
+async def get_contracts(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100, options: list = ()):
+    query = select(models.Contract).options(*options).filter(models.Contract.user_id == user_id).offset(skip).limit(limit)
+    return (await db.scalars(query)).all()
+
+async def get_contracts_page(db: AsyncSession, user_id: int, after: str = None, limit: int = 100, options: list = ()):
+    columns = [models.Contract.id]
+    query = select(models.Contract).options(*options).filter(models.Contract.user_id == user_id)
+    items = (await db.scalars(keyset_filter(query, columns, after, limit))).all()
+    return split_page(items, columns, limit)
+
+async def get_contracts_rows(db: AsyncSession, user_id: int, after: str = None, limit: int = 100, skip: int = 0):
+    columns = [models.Contract.id]
+    query = select(*columns_for(models.Contract, schemas.Contract)).filter(models.Contract.user_id == user_id)
+    if skip:
+        return (await db.execute(query.order_by(models.Contract.id).offset(skip).limit(limit))).all(), None
+    rows = (await db.execute(keyset_filter(query, columns, after, limit))).all()
+    return split_page(rows, columns, limit)
+
+async def get_contract(db: AsyncSession, contract_id: int, user_id: int, options: list = ()):
+    return await db.scalar(select(models.Contract).options(*options).filter(models.Contract.id == contract_id, models.Contract.user_id == user_id))
+
+async def check_property_owner(db: AsyncSession, property_id: int, user_id: int):
+    if await get_property(db, property_id, user_id) is None:
+        raise crud.OwnershipError("Property not found")
+
+async def create_contract(db: AsyncSession, contract: schemas.ContractCreate, user_id: int):
+    await check_property_owner(db, contract.property_id, user_id)
+    db_contract = models.Contract(**contract.dict(), user_id=user_id)
+    db.add(db_contract)
+    await db.commit()
+    await db.refresh(db_contract)
+    return db_contract
+
+async def update_contract(db: AsyncSession, contract_id: int, contract: schemas.ContractUpdate, user_id: int):
+    db_contract = await get_contract(db, contract_id, user_id)
+    if db_contract:
+        if contract.property_id != db_contract.property_id:
+            await check_property_owner(db, contract.property_id, user_id)
+        for field, value in contract.dict(exclude_unset=True).items():
+            setattr(db_contract, field, value)
+        await db.commit()
+        await db.refresh(db_contract)
+    return db_contract
+
+async def delete_contract(db: AsyncSession, contract_id: int, user_id: int):
+    db_contract = await get_contract(db, contract_id, user_id)
+    if db_contract:
+        await db.delete(db_contract)
+        record_tombstone(db, "contracts", contract_id, user_id)
+        await db.commit()
+    return db_contract
+
+# Payment CRUD
+def _payments_select(columns, user_id: int, date_from: date = None, date_to: date = None, contract_id: int = None, property_id: int = None):
+    # Те же фильтры и индексы, что у crud._payments_query
+    query = select(*columns).filter(models.Payment.user_id == user_id)
+    if contract_id is not None:
+        query = query.filter(models.Payment.contract_id == contract_id)
+    if property_id is not None:
+        query = query.join(models.Contract, models.Payment.contract_id == models.Contract.id).filter(models.Contract.property_id == property_id)
+    if date_from is not None:
+        query = query.filter(models.Payment.date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Payment.date <= date_to)
+    return query
+
+async def get_payments_rows(db: AsyncSession, user_id: int, after: str = None, limit: int = 100, **filters):
+    columns = [models.Payment.date, models.Payment.id]
+    query = _payments_select(columns_for(models.Payment, schemas.Payment), user_id, **filters)
+    rows = (await db.execute(keyset_filter(query, columns, after, limit))).all()
+    return split_page(rows, columns, limit)
+
+async def get_payment(db: AsyncSession, payment_id: int, user_id: int):
+    return await db.scalar(select(models.Payment).filter(models.Payment.id == payment_id, models.Payment.user_id == user_id))
+
+async def create_payment(db: AsyncSession, payment: schemas.PaymentCreate, user_id: int):
+    db_payment = models.Payment(**payment.dict(), user_id=user_id)
+    db.add(db_payment)
+    await db.commit()
+    await db.refresh(db_payment)
+    return db_payment
+
+async def update_payment(db: AsyncSession, payment_id: int, payment: schemas.PaymentUpdate, user_id: int):
+    db_payment = await get_payment(db, payment_id, user_id)
+    if db_payment:
+        for field, value in payment.dict(exclude_unset=True).items():
+            setattr(db_payment, field, value)
+        await db.commit()
+        await db.refresh(db_payment)
+    return db_payment
+
+async def delete_payment(db: AsyncSession, payment_id: int, user_id: int):
+    db_payment = await get_payment(db, payment_id, user_id)
+    if db_payment:
+        await db.delete(db_payment)
+        record_tombstone(db, "payments", payment_id, user_id)
+        await db.commit()
+    return db_payment
+
+async def get_payment_totals(db: AsyncSession, user_id: int, period: str = "month", **filters):
+    year = extract("year", models.Payment.date)
+    month = extract("month", models.Payment.date)
+    query = _payments_select([year, month, func.sum(models.Payment.amount), func.count(models.Payment.id)], user_id, **filters)
+    return crud._fold_totals((await db.execute(query.group_by(year, month))).all(), period)
+
+# Expense CRUD
+def _expenses_select(columns, user_id: int, date_from: date = None, date_to: date = None, property_id: int = None):
+    query = select(*columns).filter(models.Expense.user_id == user_id)
+    if property_id is not None:
+        query = query.filter(models.Expense.property_id == property_id)
+    if date_from is not None:
+        query = query.filter(models.Expense.date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Expense.date <= date_to)
+    return query
+
+async def get_expenses_rows(db: AsyncSession, user_id: int, after: str = None, limit: int = 100, **filters):
+    columns = [models.Expense.date, models.Expense.id]
+    query = _expenses_select(columns_for(models.Expense, schemas.Expense), user_id, **filters)
+    rows = (await db.execute(keyset_filter(query, columns, after, limit))).all()
+    return split_page(rows, columns, limit)
+
+async def get_expense(db: AsyncSession, expense_id: int, user_id: int):
+    return await db.scalar(select(models.Expense).filter(models.Expense.id == expense_id, models.Expense.user_id == user_id))
+
+async def create_expense(db: AsyncSession, expense: schemas.ExpenseCreate, user_id: int):
+    db_expense = models.Expense(**expense.dict(), user_id=user_id)
+    db.add(db_expense)
+    await db.commit()
+    await db.refresh(db_expense)
+    return db_expense
+
+async def update_expense(db: AsyncSession, expense_id: int, expense: schemas.ExpenseUpdate, user_id: int):
+    db_expense = await get_expense(db, expense_id, user_id)
+    if db_expense:
+        for field, value in expense.dict(exclude_unset=True).items():
+            setattr(db_expense, field, value)
+        await db.commit()
+        await db.refresh(db_expense)
+    return db_expense
+
+async def delete_expense(db: AsyncSession, expense_id: int, user_id: int):
+    db_expense = await get_expense(db, expense_id, user_id)
+    if db_expense:
+        await db.delete(db_expense)
+        record_tombstone(db, "expenses", expense_id, user_id)
+        await db.commit()
+    return db_expense
+
+async def get_expense_totals(db: AsyncSession, user_id: int, period: str = "month", **filters):
+    year = extract("year", models.Expense.date)
+    month = extract("month", models.Expense.date)
+    query = _expenses_select([year, month, func.sum(models.Expense.amount), func.count(models.Expense.id)], user_id, **filters)
+    return crud._fold_totals((await db.execute(query.group_by(year, month))).all(), period)
@@ -1,38 +1,85 @@
-from sqlalchemy import create_engine
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from .config import settings
+from .pool_metrics import PoolMetrics, async_pool_metrics, replica_pool_metrics, sync_pool_metrics
+
+# Движки создаются при первом обращении, а не при импорте: приложение
+# стартует, даже если база недоступна, а готовность проверяет /ready
+# RLock: SessionLocal() берет его и создает движок через get_engine()
+_lock = threading.RLock()
+_engine = None
+_session_factory = None
+_async_engine = None
+_async_session_factory = None
+_replica_session_factories = None
 
-print(f"🔄 Подключаемся к базе: {settings.DATABASE_URL[:50]}...")  # Печатаем только начало URL
+Base = declarative_base()
 
-try:
-    # Определяем параметры подключения в зависимости от окружения
-    connect_args = {}
 
+def connect_args_for(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite используется для локальных бенчмарков и тестов
+        return {'check_same_thread': False}
     # Если это не локальная база (localhost), добавляем SSL для Render
-    if "localhost" not in settings.DATABASE_URL:
-        connect_args = {
-            'sslmode': 'require'
-        }
-        print("🔒 Используем SSL подключение (Render)")
-
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        echo=False,  # Отключаем для продакшена, чтобы не засорять логи
-        connect_args=connect_args
+    if "localhost" not in url:
+        return {'sslmode': 'require'}
+    return {}
+
+
+def pool_options(pool_class, metrics, url: str = None) -> dict:
+    """Параметры пула из настроек; в режиме PgBouncer пул держит он, а не мы.
+
+    psycopg2 серверные prepared statements не использует, поэтому для
+    синхронного движка достаточно NullPool; asyncpg настраивается отдельно.
+    """
+    url = url or settings.DATABASE_URL
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_PGBOUNCER:
+        options["poolclass"] = metrics.instrument(NullPool)
+        return options
+    if url.startswith("sqlite"):
+        # SQLite-файлу из бенчмарков хватает размеров пула по умолчанию
+        options["poolclass"] = metrics.instrument(pool_class)
+        return options
+    options.update(
+        poolclass=metrics.instrument(pool_class),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
     )
+    return options
 
-    # Тестовое подключение
-    with engine.connect() as conn:
-        print("✅ SQLAlchemy подключение успешно!")
 
-except Exception as e:
-    print(f"❌ Ошибка SQLAlchemy: {e}")
-    raise
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                print(f"🔄 Подключаемся к базе: {settings.DATABASE_URL[:50]}...")  # Печатаем только начало URL
+                _engine = create_engine(
+                    settings.DATABASE_URL,
+                    echo=False,  # Отключаем для продакшена, чтобы не засорять логи
+                    connect_args=connect_args_for(settings.DATABASE_URL),
+                    **pool_options(QueuePool, sync_pool_metrics)
+                )
+                sync_pool_metrics.pool = _engine.pool
+    return _engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+
+def SessionLocal():
+    global _session_factory
+    if _session_factory is None:
+        with _lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory()
 
 
 def get_db():
@@ -41,3 +88,89 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def replica_count() -> int:
+    return len(settings.DATABASE_REPLICA_URLS)
+
+
+def ReplicaSessionLocal(index: int):
+    """Сессия реплики index из DATABASE_REPLICA_URLS (см. app/replicas.py)."""
+    global _replica_session_factories
+    if _replica_session_factories is None:
+        with _lock:
+            if _replica_session_factories is None:
+                factories = []
+                for number, url in enumerate(settings.DATABASE_REPLICA_URLS):
+                    metrics = PoolMetrics(f"replica{number}")
+                    engine = create_engine(
+                        url,
+                        echo=False,
+                        connect_args=connect_args_for(url),
+                        # Транзакции на репликах только читающие: случайная запись упадет сразу
+                        execution_options={"postgresql_readonly": True} if url.startswith("postgresql") else {},
+                        **pool_options(QueuePool, metrics, url)
+                    )
+                    metrics.pool = engine.pool
+                    replica_pool_metrics.append(metrics)
+                    factories.append(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+                _replica_session_factories = factories
+    return _replica_session_factories[index]()
+
+
+def check_connection():
+    # SELECT 1 для проверки готовности
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def async_database_url(url: str) -> str:
+    # Тот же DATABASE_URL, но с асинхронным драйвером
+    if url.startswith("postgresql://"):
+        url = "postgresql+asyncpg://" + url[len("postgresql://"):]
+        if settings.DB_PGBOUNCER:
+            # Кэш prepared statements asyncpg ломается при transaction pooling
+            url = make_url(url).update_query_dict({"prepared_statement_cache_size": "0"}).render_as_string(hide_password=False)
+        return url
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# Асинхронный движок нужен только в режиме DATABASE_ASYNC,
+# поэтому синхронному режиму не требуются asyncpg/aiosqlite
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                async_connect_args = {}
+                if settings.DATABASE_URL.startswith("postgresql"):
+                    if "localhost" not in settings.DATABASE_URL:
+                        async_connect_args['ssl'] = 'require'
+                    if settings.DB_PGBOUNCER:
+                        async_connect_args['statement_cache_size'] = 0
+                _async_engine = create_async_engine(
+                    async_database_url(settings.DATABASE_URL),
+                    echo=False,
+                    connect_args=async_connect_args,
+                    **pool_options(AsyncAdaptedQueuePool, async_pool_metrics)
+                )
+                async_pool_metrics.pool = _async_engine.sync_engine.pool
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    global _async_session_factory
+    if _async_session_factory is None:
+        with _lock:
+            if _async_session_factory is None:
+                _async_session_factory = async_sessionmaker(
+                    get_async_engine(), class_=AsyncSession, expire_on_commit=False, autoflush=False
+                )
+    return _async_session_factory()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,55 @@
+# backend/app/hashing.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import settings
+
+
+class HashingPool:
+    """Пул потоков для PBKDF2, чтобы хэширование не блокировало event loop.
+
+    hashlib.pbkdf2_hmac отпускает GIL, поэтому потоков достаточно.
+    Размер пула ограничивает число одновременных хэширований; остальные
+    ждут в очереди executor'а, ее глубина видна в stats().
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.peak_queue_depth = 0
+
+    def _run(self, fn, *args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args):
+        with self._lock:
+            self.queued += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queued)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, fn, *args)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "peak_queue_depth": self.peak_queue_depth,
+            }
+
+
+hashing_pool = HashingPool(settings.PASSWORD_HASH_WORKERS)
@@ -0,0 +1,240 @@
+# backend/app/jobs.py
+# Очередь фоновых задач: таблица jobs в базе и пул процессов-воркеров.
+# API только ставит задачу и отдает статус, считают воркеры.
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models, reports, versioning
+from .config import settings
+from .database import SessionLocal
+
+HANDLERS = reports.HANDLERS
+ACTIVE = ("queued", "running", "done")
+STREAM_INTERVAL = 1.0
+
+
+class JobError(Exception):
+    pass
+
+
+def params_hash(params: dict) -> str:
+    payload = json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def submit(db: Session, user_id: int, kind: str, params: dict) -> Tuple[models.Job, bool]:
+    """Ставит задачу в очередь; возвращает (задача, создана ли новая).
+
+    Задача с теми же параметрами по той же версии данных переиспользуется:
+    готовый результат действителен, пока данные пользователя не изменились.
+    """
+    if kind not in HANDLERS:
+        raise JobError(f"Unknown job kind, expected one of: {', '.join(HANDLERS)}")
+    version = versioning.get_version(db, user_id)
+    digest = params_hash(params)
+    job = db.query(models.Job).filter(
+        models.Job.user_id == user_id,
+        models.Job.kind == kind,
+        models.Job.params_hash == digest,
+        models.Job.data_version == version,
+        models.Job.status.in_(ACTIVE),
+    ).order_by(models.Job.id.desc()).first()
+    if job is not None:
+        return job, False
+    job = models.Job(user_id=user_id, kind=kind, params=params or {}, params_hash=digest, data_version=version)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job, True
+
+
+def get_jobs(db: Session, user_id: int, limit: int = 50) -> List[models.Job]:
+    return db.query(models.Job).filter(models.Job.user_id == user_id).order_by(models.Job.id.desc()).limit(limit).all()
+
+
+def get_job(db: Session, job_id: int, user_id: int) -> Optional[models.Job]:
+    return db.query(models.Job).filter(models.Job.id == job_id, models.Job.user_id == user_id).first()
+
+
+def claim(db: Session) -> Optional[int]:
+    """Забирает первую задачу из очереди.
+
+    Условный UPDATE ... WHERE status='queued' работает в любой базе: если
+    задачу успел взять другой воркер, rowcount будет 0 и берем следующую.
+    """
+    candidates = db.query(models.Job.id).filter(models.Job.status == "queued").order_by(models.Job.id).limit(10).all()
+    for (job_id,) in candidates:
+        claimed = db.execute(
+            update(models.Job).where(models.Job.id == job_id, models.Job.status == "queued").values(
+                status="running",
+                progress=0,
+                attempts=models.Job.attempts + 1,
+                started_at=func.now(),
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return job_id
+    return None
+
+
+def _set_progress(job_id: int, value: int):
+    # Отдельная сессия: сессия обработчика держит свою транзакцию до конца расчета
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(models.Job).where(models.Job.id == job_id, models.Job.status == "running").values(
+                progress=max(0, min(99, int(value)))
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_job(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.get(models.Job, job_id)
+        user = db.get(models.User, job.user_id)
+        # Результат соответствует версии на момент начала расчета
+        version = versioning.get_version(db, job.user_id)
+        try:
+            result = HANDLERS[job.kind](db, user, job.params or {}, lambda value: _set_progress(job_id, value))
+            values = {"status": "done", "progress": 100, "result": json.loads(json.dumps(result, default=str)), "error": None}
+        except Exception as e:
+            print(f"❌ Job {job_id} ({job.kind}) failed: {e}")
+            values = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        db.rollback()
+        db.execute(
+            update(models.Job).where(models.Job.id == job_id, models.Job.status == "running").values(
+                data_version=version, finished_at=func.now(), **values
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def maintain(db: Session):
+    """Возвращает в очередь зависшие задачи (воркер упал) и чистит старые."""
+    now = datetime.now(timezone.utc)
+    stale = (models.Job.status == "running") & (models.Job.started_at < now - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS))
+    db.execute(
+        update(models.Job).where(stale, models.Job.attempts >= settings.JOB_MAX_ATTEMPTS).values(
+            status="failed", error="Timed out", finished_at=func.now()
+        )
+    )
+    db.execute(update(models.Job).where(stale).values(status="queued"))
+    db.execute(
+        delete(models.Job).where(
+            models.Job.status.in_(("done", "failed")),
+            models.Job.finished_at < now - timedelta(days=settings.JOB_RETENTION_DAYS),
+        )
+    )
+    db.commit()
+
+
+def worker_loop(poll_seconds: float):
+    print(f"👷 Job worker {os.getpid()} started")
+    last_maintenance = 0.0
+    while True:
+        db = SessionLocal()
+        try:
+            if time.monotonic() - last_maintenance > poll_seconds * 10:
+                maintain(db)
+                last_maintenance = time.monotonic()
+            job_id = claim(db)
+        except Exception as e:
+            print(f"Job worker error: {e}")
+            job_id = None
+        finally:
+            db.close()
+        if job_id is None:
+            time.sleep(poll_seconds)
+        else:
+            run_job(job_id)
+
+
+def _worker_main(poll_seconds: float):
+    try:
+        worker_loop(poll_seconds)
+    except KeyboardInterrupt:
+        pass
+
+
+def start_local_workers(count: int) -> List[multiprocessing.Process]:
+    """Воркеры в отдельных процессах, чтобы отчеты не занимали процесс API.
+
+    spawn, а не fork: дочерний процесс не должен наследовать пул соединений.
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for _ in range(count):
+        process = context.Process(target=_worker_main, args=(settings.JOB_POLL_SECONDS,), daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_local_workers(processes: List[multiprocessing.Process], timeout: float = 5.0):
+    # Прерванная задача останется running и вернется в очередь через maintain()
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout)
+
+
+def _job_state(job_id: int, user_id: int) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        row = db.query(models.Job.status, models.Job.progress, models.Job.error).filter(
+            models.Job.id == job_id, models.Job.user_id == user_id
+        ).first()
+        return {"id": job_id, "status": row[0], "progress": row[1], "error": row[2]} if row else None
+    finally:
+        db.close()
+
+
+async def job_stream(job_id: int, user_id: int):
+    """Server-Sent Events: прогресс задачи до ее завершения."""
+    last = None
+    while True:
+        state = await run_in_threadpool(_job_state, job_id, user_id)
+        if state is None:
+            return
+        if state != last:
+            yield f"event: {state['status']}\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+            last = state
+        if state["status"] in ("done", "failed"):
+            return
+        await asyncio.sleep(STREAM_INTERVAL)
+
+
+if __name__ == "__main__":
+    # python -m app.jobs --workers 2 (без воркеров в процессе API: JOB_WORKERS=0)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        _worker_main(settings.JOB_POLL_SECONDS)
+    else:
+        workers = start_local_workers(args.workers)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop_local_workers(workers)
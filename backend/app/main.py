@@ -1,13 +1,18 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Response, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, date
 
 import os
 import sys
 import locale
+import asyncio
+import json
+from contextlib import asynccontextmanager
 
 """
 cd backend
@@ -27,15 +32,68 @@ if sys.platform == "win32":
     # Принудительная установка локали
     locale.setlocale(locale.LC_ALL, 'ru_RU.UTF-8')
 
-from . import crud, models, schemas, auth
-from .database import SessionLocal, engine
+from . import crud, models, schemas, auth, tax, sync, bank_import, backup, routes_async, rollups, notifications, versioning, serialization, batch, jobs, simulator, arrears, search, admission, replicas
+from .pagination import CursorError
+from .cache import principal_cache
+from .hashing import hashing_pool
+from .pool_metrics import pool_stats
+from .metrics import MetricsMiddleware, registry
+from .response_cache import CachedView, cached_view, response_cache
+# Та же зависимость, что и в auth: FastAPI отдаст обоим одну сессию
+from .database import get_db, check_connection
+# GET-обработчики читают через get_read_db: реплика, если она догнала пользователя
+from .replicas import get_read_db
 from .config import settings
 
 print("🔄 Инициализация приложения...")
 
-models.Base.metadata.create_all(bind=engine)
+# Схема базы создается миграциями Alembic (alembic upgrade head),
+# при импорте приложение к базе не обращается
 
-app = FastAPI(title="Rent Tax API", version="1.0.0")
+
+async def wait_for_database(app: FastAPI):
+    # Прогреваем пул в фоне; до первого успеха /ready отвечает 503
+    delay = 0.5
+    while True:
+        try:
+            await run_in_threadpool(check_connection)
+            app.state.db_ready = True
+            print("✅ SQLAlchemy подключение успешно!")
+            return
+        except Exception as e:
+            print(f"❌ Ошибка SQLAlchemy: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+async def background_startup(app: FastAPI):
+    await wait_for_database(app)
+    loops = [notifications.watch_notifications(settings.SSE_POLL_SECONDS)]
+    if settings.NOTIFICATION_SCHEDULER_ENABLED:
+        loops.append(notifications.run_scheduler(settings.NOTIFICATION_SCAN_INTERVAL))
+    await asyncio.gather(*loops)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.db_ready = False
+    task = asyncio.create_task(background_startup(app))
+    # Отчеты и документы считаются в отдельных процессах, API остается отзывчивым
+    workers = jobs.start_local_workers(settings.JOB_WORKERS)
+    yield
+    task.cancel()
+    jobs.stop_local_workers(workers)
+
+
+app = FastAPI(title="Rent Tax API", version="1.0.0", lifespan=lifespan)
+
+# Асинхронные CRUD-эндпоинты регистрируются первыми и перекрывают синхронные
+if settings.DATABASE_ASYNC:
+    app.include_router(routes_async.router)
+
+# Ограничение одновременных запросов к тяжелым маршрутам; внутри CORS,
+# чтобы ответ 503 браузер мог прочитать
+app.add_middleware(admission.AdmissionMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -53,15 +111,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Латентность и число SQL-запросов по каждому эндпоинту, см. /metrics
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def root():
@@ -69,23 +123,43 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": datetime.now().isoformat(), "principal_cache": principal_cache.stats(), "password_hashing": hashing_pool.stats(), "db_pool": pool_stats(), "response_cache": response_cache.stats(), "admission": admission.stats(), "replicas": replicas.replica_router.stats()}
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    if not app.state.db_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting"}
+    try:
+        await run_in_threadpool(check_connection)
+    except Exception as e:
+        print(f"Readiness check error: {e}")
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "database unavailable"}
+    return {"status": "ready"}
 
 @app.post("/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: auth.OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: auth.OAuth2PasswordRequestForm = Depends(), _: None = Depends(admission.limit_login), db: Session = Depends(get_db)):
     try:
-        user = auth.authenticate_user(db, form_data.username, form_data.password)
+        user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        await run_in_threadpool(admission.login_succeeded, form_data.username)
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = auth.create_access_token(
             data={"sub": user.email}, expires_delta=access_token_expires
         )
         return {"access_token": access_token, "token_type": "bearer"}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Login error: {e}")
         raise HTTPException(
@@ -94,15 +168,16 @@ async def login_for_access_token(form_data: auth.OAuth2PasswordRequestForm = Dep
         )
 
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     try:
-        db_user = crud.get_user_by_email(db, email=user.email)
+        db_user = await run_in_threadpool(crud.get_user_by_email, db, user.email)
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        return crud.create_user(db=db, user=user)
+        hashed_password = await auth.get_password_hash_async(user.password)
+        return await run_in_threadpool(crud.create_user, db, user, hashed_password)
     except HTTPException:
         raise
     except Exception as e:
@@ -113,58 +188,367 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         )
 
 @app.get("/users/me/", response_model=schemas.User)
-async def read_users_me(current_user: schemas.User = Depends(auth.get_current_user)):
-    return current_user
+async def read_users_me(response: Response, view: CachedView = Depends(cached_view), current_user: schemas.User = Depends(auth.get_current_user)):
+    if view.hit:
+        return view.hit
+    return view.respond(current_user, response, schemas.User)
 
 # Property endpoints
-@app.get("/properties/", response_model=List[schemas.Property])
-def read_properties(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    properties = crud.get_properties(db, user_id=current_user.id, skip=skip, limit=limit)
-    return properties
+@app.get("/properties/", response_model=List[schemas.PropertyDetail])
+def read_properties(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, include: Optional[str] = None, view: CachedView = Depends(cached_view), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    # skip оставлен для старых клиентов, новые листают по курсору after
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.PROPERTY_INCLUDES, current_user.id)
+        if not options and settings.FAST_LIST_RESPONSES:
+            # Связи не запрошены: ORM-объекты не нужны, строки сразу в JSON
+            rows, next_cursor = crud.get_properties_rows(db, user_id=current_user.id, after=after, limit=limit, skip=skip)
+            properties = None
+        elif skip:
+            properties, next_cursor = crud.get_properties(db, user_id=current_user.id, skip=skip, limit=limit, options=options), None
+        else:
+            properties, next_cursor = crud.get_properties_page(db, user_id=current_user.id, after=after, limit=limit, options=options)
+    except (CursorError, crud.IncludeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if properties is None:
+        return view.respond_json(serialization.rows_to_json(rows, schemas.PropertyDetail), response)
+    return view.respond(properties, response, List[schemas.PropertyDetail])
 
 @app.post("/properties/", response_model=schemas.Property)
 def create_property(property: schemas.PropertyCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
     return crud.create_property(db=db, property=property, user_id=current_user.id)
 
-@app.get("/properties/{property_id}", response_model=schemas.Property)
-def read_property(property_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    property = crud.get_property(db, property_id=property_id, user_id=current_user.id)
+@app.get("/properties/{property_id}", response_model=schemas.PropertyDetail)
+def read_property(property_id: int, response: Response, include: Optional[str] = None, view: CachedView = Depends(cached_view), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.PROPERTY_INCLUDES, current_user.id)
+    except crud.IncludeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    property = crud.get_property(db, property_id=property_id, user_id=current_user.id, options=options)
     if property is None:
         raise HTTPException(status_code=404, detail="Property not found")
-    return property
+    return view.respond(property, response, schemas.PropertyDetail)
 
 @app.put("/properties/{property_id}", response_model=schemas.Property)
 def update_property(property_id: int, property: schemas.PropertyUpdate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
     return crud.update_property(db, property_id=property_id, property=property, user_id=current_user.id)
 
-@app.delete("/properties/{property_id}")
+@app.delete("/properties/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_property(property_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    return crud.delete_property(db, property_id=property_id, user_id=current_user.id)
+    if crud.delete_property(db, property_id=property_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # Contract endpoints
-@app.get("/contracts/", response_model=List[schemas.Contract])
-def read_contracts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    contracts = crud.get_contracts(db, user_id=current_user.id, skip=skip, limit=limit)
-    return contracts
+@app.get("/contracts/", response_model=List[schemas.ContractDetail])
+def read_contracts(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, include: Optional[str] = None, view: CachedView = Depends(cached_view), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.CONTRACT_INCLUDES, current_user.id)
+        if not options and settings.FAST_LIST_RESPONSES:
+            # Связи не запрошены: ORM-объекты не нужны, строки сразу в JSON
+            rows, next_cursor = crud.get_contracts_rows(db, user_id=current_user.id, after=after, limit=limit, skip=skip)
+            contracts = None
+        elif skip:
+            contracts, next_cursor = crud.get_contracts(db, user_id=current_user.id, skip=skip, limit=limit, options=options), None
+        else:
+            contracts, next_cursor = crud.get_contracts_page(db, user_id=current_user.id, after=after, limit=limit, options=options)
+    except (CursorError, crud.IncludeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if contracts is None:
+        return view.respond_json(serialization.rows_to_json(rows, schemas.ContractDetail), response)
+    return view.respond(contracts, response, List[schemas.ContractDetail])
 
 @app.post("/contracts/", response_model=schemas.Contract)
 def create_contract(contract: schemas.ContractCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    return crud.create_contract(db=db, contract=contract, user_id=current_user.id)
+    try:
+        return crud.create_contract(db=db, contract=contract, user_id=current_user.id)
+    except crud.OwnershipError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-@app.get("/contracts/{contract_id}", response_model=schemas.Contract)
-def read_contract(contract_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    contract = crud.get_contract(db, contract_id=contract_id, user_id=current_user.id)
+@app.get("/contracts/{contract_id}", response_model=schemas.ContractDetail)
+def read_contract(contract_id: int, response: Response, include: Optional[str] = None, view: CachedView = Depends(cached_view), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.CONTRACT_INCLUDES, current_user.id)
+    except crud.IncludeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    contract = crud.get_contract(db, contract_id=contract_id, user_id=current_user.id, options=options)
     if contract is None:
         raise HTTPException(status_code=404, detail="Contract not found")
-    return contract
+    return view.respond(contract, response, schemas.ContractDetail)
 
 @app.put("/contracts/{contract_id}", response_model=schemas.Contract)
 def update_contract(contract_id: int, contract: schemas.ContractUpdate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    return crud.update_contract(db, contract_id=contract_id, contract=contract, user_id=current_user.id)
+    try:
+        db_contract = crud.update_contract(db, contract_id=contract_id, contract=contract, user_id=current_user.id)
+    except crud.OwnershipError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if db_contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return db_contract
 
-@app.delete("/contracts/{contract_id}")
+@app.delete("/contracts/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_contract(contract_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
-    return crud.delete_contract(db, contract_id=contract_id, user_id=current_user.id)
+    if crud.delete_contract(db, contract_id=contract_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@app.get("/contracts/{contract_id}/balance", response_model=schemas.ContractBalance)
+def read_contract_balance(contract_id: int, as_of: Optional[date] = None, db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    contract = crud.get_contract(db, contract_id=contract_id, user_id=current_user.id)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return arrears.contract_balance(db, contract, as_of=as_of)
+
+# Search endpoint
+@app.get("/search", response_model=schemas.SearchResult)
+def search_portfolio(q: Optional[str] = None, passport_series: Optional[str] = None, passport_number: Optional[str] = None, inn: Optional[str] = None, phone: Optional[str] = None, email: Optional[str] = None, terms: Optional[str] = Query(None, description='JSON object matched against additional_terms, e.g. {"utilities": "included"}'), limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    values = {"passport_series": passport_series, "passport_number": passport_number, "inn": inn, "phone": phone, "email": email}
+    tenant = {key: value for key, value in values.items() if value}
+    try:
+        terms_filter = json.loads(terms) if terms else None
+        if terms_filter is not None and not isinstance(terms_filter, dict):
+            raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=400, detail="terms must be a JSON object")
+    try:
+        return search.search(db, current_user.id, q=q, tenant=tenant, terms=terms_filter, limit=limit)
+    except search.SearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Payment endpoints
+@app.get("/payments/", response_model=List[schemas.Payment])
+def read_payments(response: Response, date_from: Optional[date] = None, date_to: Optional[date] = None, contract_id: Optional[int] = None, property_id: Optional[int] = None, limit: int = 100, after: Optional[str] = None, view: CachedView = Depends(cached_view), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if view.hit:
+        return view.hit
+    try:
+        payments, next_cursor = crud.get_payments_rows(db, user_id=current_user.id, after=after, limit=limit, date_from=date_from, date_to=date_to, contract_id=contract_id, property_id=property_id)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if settings.FAST_LIST_RESPONSES:
+        return view.respond_json(serialization.rows_to_json(payments, schemas.Payment), response)
+    return view.respond(payments, response, List[schemas.Payment])
+
+@app.get("/payments/totals", response_model=schemas.PeriodTotals)
+def read_payment_totals(period: str = "month", date_from: Optional[date] = None, date_to: Optional[date] = None, contract_id: Optional[int] = None, property_id: Optional[int] = None, db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if period not in tax.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(tax.PERIODS)}")
+    return crud.get_payment_totals(db, user_id=current_user.id, period=period, date_from=date_from, date_to=date_to, contract_id=contract_id, property_id=property_id)
+
+@app.post("/payments/", response_model=schemas.Payment)
+def create_payment(payment: schemas.PaymentCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if crud.get_contract(db, contract_id=payment.contract_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return crud.create_payment(db=db, payment=payment, user_id=current_user.id)
+
+@app.get("/payments/{payment_id}", response_model=schemas.Payment)
+def read_payment(payment_id: int, db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    payment = crud.get_payment(db, payment_id=payment_id, user_id=current_user.id)
+    if payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return payment
+
+@app.put("/payments/{payment_id}", response_model=schemas.Payment)
+def update_payment(payment_id: int, payment: schemas.PaymentUpdate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if crud.get_contract(db, contract_id=payment.contract_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    db_payment = crud.update_payment(db, payment_id=payment_id, payment=payment, user_id=current_user.id)
+    if db_payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return db_payment
+
+@app.delete("/payments/{payment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_payment(payment_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if crud.delete_payment(db, payment_id=payment_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+# Expense endpoints
+@app.get("/expenses/", response_model=List[schemas.Expense])
+def read_expenses(response: Response, date_from: Optional[date] = None, date_to: Optional[date] = None, property_id: Optional[int] = None, limit: int = 100, after: Optional[str] = None, view: CachedView = Depends(cached_view), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if view.hit:
+        return view.hit
+    try:
+        expenses, next_cursor = crud.get_expenses_rows(db, user_id=current_user.id, after=after, limit=limit, date_from=date_from, date_to=date_to, property_id=property_id)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if settings.FAST_LIST_RESPONSES:
+        return view.respond_json(serialization.rows_to_json(expenses, schemas.Expense), response)
+    return view.respond(expenses, response, List[schemas.Expense])
+
+@app.get("/expenses/totals", response_model=schemas.PeriodTotals)
+def read_expense_totals(period: str = "month", date_from: Optional[date] = None, date_to: Optional[date] = None, property_id: Optional[int] = None, db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if period not in tax.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(tax.PERIODS)}")
+    return crud.get_expense_totals(db, user_id=current_user.id, period=period, date_from=date_from, date_to=date_to, property_id=property_id)
+
+@app.post("/expenses/", response_model=schemas.Expense)
+def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if crud.get_property(db, property_id=expense.property_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return crud.create_expense(db=db, expense=expense, user_id=current_user.id)
+
+@app.get("/expenses/{expense_id}", response_model=schemas.Expense)
+def read_expense(expense_id: int, db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    expense = crud.get_expense(db, expense_id=expense_id, user_id=current_user.id)
+    if expense is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return expense
+
+@app.put("/expenses/{expense_id}", response_model=schemas.Expense)
+def update_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if crud.get_property(db, property_id=expense.property_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    db_expense = crud.update_expense(db, expense_id=expense_id, expense=expense, user_id=current_user.id)
+    if db_expense is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return db_expense
+
+@app.delete("/expenses/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_expense(expense_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if crud.delete_expense(db, expense_id=expense_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+# Bank statement import
+@app.post("/payments/import", response_model=schemas.StatementImportReport)
+def import_bank_statement(file: UploadFile = File(...), format: Optional[str] = None, encoding: Optional[str] = None, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    try:
+        return bank_import.import_statement(db, current_user, file.file, statement_format=format, encoding=encoding)
+    except bank_import.StatementError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Tax endpoints
+@app.get("/tax/calculate", response_model=schemas.TaxReport)
+def calculate_tax(year: Optional[int] = None, period: str = "quarter", regime: Optional[str] = None, db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if period not in tax.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(tax.PERIODS)}")
+    if regime is not None and regime not in tax.REGIMES:
+        raise HTTPException(status_code=400, detail=f"Unknown regime, expected one of: {', '.join(tax.REGIMES)}")
+    date_from = date(year, 1, 1) if year else None
+    date_to = date(year, 12, 31) if year else None
+    return tax.calculate_for_user(db, current_user, period=period, regime=regime, date_from=date_from, date_to=date_to)
+
+@app.post("/tax/simulate", response_model=schemas.SimulationResult)
+def simulate_tax(request: schemas.SimulationRequest, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if len(request.scenarios) > settings.SIMULATOR_MAX_SCENARIOS:
+        raise HTTPException(status_code=413, detail=f"Too many scenarios, limit is {settings.SIMULATOR_MAX_SCENARIOS}")
+    try:
+        result = simulator.simulate(db, current_user, request)
+    except simulator.SimulationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Тысячи сценариев: собранный simulate() ответ отдаем без повторной валидации
+    return Response(content=serialization.dumps(result), media_type="application/json")
+
+# Analytics endpoints
+@app.get("/analytics/summary", response_model=schemas.AnalyticsSummary)
+def analytics_summary(date_from: Optional[date] = Query(None, alias="from"), date_to: Optional[date] = Query(None, alias="to"), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    return rollups.summary(db, current_user, date_from=date_from, date_to=date_to)
+
+@app.get("/reports/arrears", response_model=schemas.ArrearsReport)
+def arrears_report(as_of: Optional[date] = None, min_days: int = Query(0, ge=0), db: Session = Depends(get_read_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    return arrears.portfolio_report(db, current_user.id, as_of=as_of, min_days=min_days)
+
+# Notification endpoints
+@app.get("/notifications/stream")
+async def notifications_stream(last_event_id: Optional[int] = Header(None), current_user: schemas.User = Depends(auth.get_current_user_sse)):
+    return StreamingResponse(
+        notifications.event_stream(current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Background job endpoints
+@app.post("/jobs", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_job(job: schemas.JobCreate, response: Response, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    try:
+        db_job, created = jobs.submit(db, user_id=current_user.id, kind=job.kind, params=job.params)
+    except jobs.JobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not created:
+        # Такая же задача по тем же данным уже стоит в очереди или посчитана
+        response.status_code = status.HTTP_200_OK
+    return db_job
+
+@app.get("/jobs/", response_model=List[schemas.Job])
+def read_jobs(limit: int = Query(50, ge=1, le=500), db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    return jobs.get_jobs(db, user_id=current_user.id, limit=limit)
+
+@app.get("/jobs/{job_id}", response_model=schemas.JobDetail)
+def read_job(job_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    db_job = jobs.get_job(db, job_id=job_id, user_id=current_user.id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
+
+@app.get("/jobs/{job_id}/stream")
+async def job_stream(job_id: int, current_user: schemas.User = Depends(auth.get_current_user_sse)):
+    return StreamingResponse(
+        jobs.job_stream(job_id, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Sync endpoints
+@app.get("/sync", response_model=schemas.SyncPull)
+def sync_pull(since: Optional[str] = None, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    try:
+        since_ts = sync.decode_cursor(since) if since else None
+    except sync.SyncError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return sync.pull(db, user_id=current_user.id, since=since_ts)
+
+@app.post("/sync", response_model=schemas.SyncPushResult)
+def sync_push(push: schemas.SyncPush, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    try:
+        results = sync.apply_changes(db, user_id=current_user.id, changes=push.changes)
+    except sync.SyncError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results}
+
+# Batch endpoint
+@app.post("/batch", response_model=schemas.BatchResult)
+def apply_batch(request: schemas.BatchRequest, response: Response, db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    if len(request.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"Too many operations, maximum is {settings.BATCH_MAX_OPERATIONS}")
+    results, committed = batch.apply_batch(db, user_id=current_user.id, operations=request.operations, atomic=request.atomic)
+    if not committed:
+        # atomic: ничего не записано, ошибки - в results
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return {"committed": committed, "results": results}
+
+# Backup endpoints
+@app.get("/export")
+def export_account(compress: bool = False, current_user: schemas.User = Depends(auth.get_current_user)):
+    filename = f"rent-tax-backup-{date.today().isoformat()}.ndjson" + (".gz" if compress else "")
+    return StreamingResponse(
+        backup.stream_export(current_user.id, compress=compress, open_session=lambda: replicas.open_read_session(current_user.id)),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/import", response_model=schemas.BackupImportReport)
+def import_account(file: UploadFile = File(...), mode: str = "empty", db: Session = Depends(get_db), current_user: schemas.User = Depends(auth.get_current_user)):
+    try:
+        return backup.import_backup(db, user_id=current_user.id, stream=file.file, mode=mode)
+    except backup.BackupConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except backup.BackupError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
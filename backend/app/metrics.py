@@ -0,0 +1,190 @@
+# backend/app/metrics.py
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from .config import settings
+from .pool_metrics import async_pool_metrics, replica_pool_metrics, sync_pool_metrics
+
+# Границы гистограммы латентности, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Статистика текущего запроса; run_in_threadpool копирует контекст,
+# поэтому запросы из синхронных обработчиков попадают в тот же объект
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is None or started is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - started
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, buckets, value: float):
+        self.counts[bisect.bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Метрики запросов в памяти процесса, отдаются в формате Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_seconds = defaultdict(float)
+        self.responses = defaultdict(int)
+        self.over_budget = defaultdict(int)
+
+    def observe(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.latency[key].observe(LATENCY_BUCKETS, elapsed)
+            self.queries[key].observe(QUERY_BUCKETS, stats.queries)
+            self.db_seconds[key] += stats.db_seconds
+            self.responses[(method, route, str(status))] += 1
+            if settings.METRICS_QUERY_BUDGET and stats.queries > settings.METRICS_QUERY_BUDGET:
+                self.over_budget[key] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            _histogram(lines, "http_request_duration_seconds", "Request latency by route", LATENCY_BUCKETS, self.latency)
+            _histogram(lines, "http_request_sql_queries", "SQL statements per request", QUERY_BUCKETS, self.queries)
+            _counter(lines, "http_request_db_seconds_total", "Time spent in SQL by route", self.db_seconds,
+                     ("method", "route"))
+            _counter(lines, "http_responses_total", "Responses by route and status", self.responses,
+                     ("method", "route", "status"))
+            _counter(lines, "http_requests_over_query_budget_total",
+                     f"Requests with more than {settings.METRICS_QUERY_BUDGET} SQL statements", self.over_budget,
+                     ("method", "route"))
+        # Реплики подписаны своим engine="replicaN"
+        _pools(lines, [metrics for metrics in (sync_pool_metrics, async_pool_metrics, *replica_pool_metrics)
+                       if metrics.pool is not None])
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram(lines, name, help_text, buckets, series):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in sorted(series.items()):
+        cumulative = 0
+        for bound, count in zip(buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(('method', 'route', 'le'), (method, route, bound))} {cumulative}")
+        labels = _labels(("method", "route"), (method, route))
+        lines.append(f"{name}_sum{labels} {histogram.sum}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+
+
+def _counter(lines, name, help_text, series, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(series.items()):
+        lines.append(f"{name}{_labels(label_names, key)} {value}")
+
+
+def _pools(lines, pools):
+    # Строки одной метрики идут подряд для всех движков, как требует формат
+    series = {}
+    for metrics in pools:
+        labels = _labels(("engine",), (metrics.name,))
+        for key, value in metrics.stats().items():
+            if isinstance(value, (int, float)):
+                series.setdefault(key, []).append(f"db_pool_{key}{labels} {value}")
+    for samples in series.values():
+        lines.extend(samples)
+
+
+registry = Registry()
+
+
+def route_template(scope) -> str:
+    """Шаблон пути (/contracts/{contract_id}), чтобы id не размножали серии."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность, статусы и число SQL-запросов на запрос."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            elapsed = time.perf_counter() - started
+            route = route_template(scope)
+            registry.observe(scope["method"], route, status_code, elapsed, stats)
+            if settings.METRICS_QUERY_BUDGET and stats.queries > settings.METRICS_QUERY_BUDGET:
+                print(f"⚠️ {scope['method']} {route}: {stats.queries} SQL-запросов "
+                      f"({stats.db_seconds * 1000:.1f} мс в базе, {elapsed * 1000:.1f} мс всего)")
@@ -1,8 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from .database import Base
 
+def _gin_index(name: str, column: str, ops: str) -> Index:
+    # (user_id, column): btree_gin позволяет искать сразу в данных одного пользователя
+    return Index(
+        name, "user_id", column,
+        postgresql_using="gin",
+        postgresql_ops={column: ops},
+    ).ddl_if(dialect="postgresql")
+
 class User(Base):
     __tablename__ = "users"
 
@@ -23,7 +32,9 @@ class User(Base):
     bik = Column(String(9), nullable=True)
     landlord_type = Column(String, nullable=False, default='self_employed')
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Растет при любом изменении данных пользователя, из него строятся ETag
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     properties = relationship("Property", back_populates="owner")
     contracts = relationship("Contract", back_populates="user")
@@ -44,7 +55,14 @@ class Property(Base):
     rooms = Column(Integer, nullable=True)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_properties_user_id", "user_id", "id"),
+        Index("ix_properties_user_updated", "user_id", "updated_at"),
+        _gin_index("ix_properties_name_trgm", "name", "gin_trgm_ops"),
+        _gin_index("ix_properties_address_trgm", "address", "gin_trgm_ops"),
+    )
 
     owner = relationship("User", back_populates="properties")
     contracts = relationship("Contract", back_populates="property")
@@ -63,10 +81,22 @@ class Contract(Base):
     rent_amount = Column(Float, nullable=False, default=0.0)
     payment_schedule = Column(String, nullable=False, default='monthly')
     is_active = Column(Boolean, default=True)
-    tenant_info = Column(JSON, nullable=True)
-    additional_terms = Column(JSON, nullable=True)
+    # В PostgreSQL - JSONB, чтобы фильтры по полям (паспорт, телефон) шли по GIN-индексу
+    tenant_info = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    additional_terms = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_contracts_user_id", "user_id", "id"),
+        Index("ix_contracts_user_updated", "user_id", "updated_at"),
+        Index("ix_contracts_end_date", "end_date"),
+        Index("ix_contracts_property_id", "property_id"),
+        # Поиск (app/search.py): триграммы и JSONB, только в PostgreSQL
+        _gin_index("ix_contracts_tenant_name_trgm", "tenant_name", "gin_trgm_ops"),
+        _gin_index("ix_contracts_tenant_info_gin", "tenant_info", "jsonb_path_ops"),
+        _gin_index("ix_contracts_additional_terms_gin", "additional_terms", "jsonb_path_ops"),
+    )
 
     user = relationship("User", back_populates="contracts")
     property = relationship("Property", back_populates="contracts")
@@ -81,6 +111,13 @@ class Payment(Base):
     amount = Column(Float, nullable=False, default=0.0)
     date = Column(Date, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_payments_user_date", "user_id", "date", "id"),
+        Index("ix_payments_user_updated", "user_id", "updated_at"),
+        Index("ix_payments_contract_date", "contract_id", "date"),
+    )
 
     user = relationship("User", back_populates="payments")
     contract = relationship("Contract", back_populates="payments")
@@ -95,6 +132,13 @@ class Expense(Base):
     description = Column(Text, nullable=True)
     date = Column(Date, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_expenses_user_date", "user_id", "date", "id"),
+        Index("ix_expenses_user_updated", "user_id", "updated_at"),
+        Index("ix_expenses_property_date", "property_id", "date"),
+    )
 
     user = relationship("User", back_populates="expenses")
     property = relationship("Property", back_populates="expenses")
@@ -110,6 +154,78 @@ class Notification(Base):
     priority = Column(String, nullable=False, default='medium')
     action = Column(JSON, nullable=True)
     read = Column(Boolean, default=False)
+    # Ключ события (например, "contract:12:2024-05-01"), чтобы планировщик
+    # не создавал одно и то же уведомление повторно
+    dedupe_key = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", back_populates="notifications")
\ No newline at end of file
+    __table_args__ = (
+        Index("uq_notifications_user_dedupe", "user_id", "dedupe_key", unique=True),
+        Index("ix_notifications_user_id", "user_id", "id"),
+    )
+
+    user = relationship("User", back_populates="notifications")
+
+class Tombstone(Base):
+    # Запись об удалении, чтобы /sync мог передать удаление клиенту
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_tombstones_user_deleted", "user_id", "deleted_at"),
+    )
+
+class MonthlyRollup(Base):
+    # Помесячные итоги по объекту для аналитики, обновляются app/rollups.py
+    __tablename__ = "monthly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False)  # первое число месяца
+    income_physical = Column(Float, nullable=False, default=0.0)
+    income_legal = Column(Float, nullable=False, default=0.0)
+    expenses = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "property_id", "month", name="uq_monthly_rollups_user_property_month"),
+        Index("ix_monthly_rollups_user_month", "user_id", "month"),
+    )
+
+class Job(Base):
+    # Фоновая задача (отчеты, 3-НДФЛ, пакет документов), см. app/jobs.py
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)
+    params = Column(JSON, nullable=True)
+    params_hash = Column(String(64), nullable=False)
+    # Версия данных пользователя, по которой посчитан результат
+    data_version = Column(BigInteger, nullable=False, default=0)
+    status = Column(String, nullable=False, default='queued')  # queued, running, done, failed
+    progress = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+        Index("ix_jobs_user_kind_params", "user_id", "kind", "params_hash"),
+    )
+
+class SchedulerRun(Base):
+    # Время последнего запуска периодической задачи: при нескольких воркерах
+    # запускает ее тот, кто первым обновит строку (см. notifications.claim_scan)
+    __tablename__ = "scheduler_runs"
+
+    name = Column(String, primary_key=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=False)
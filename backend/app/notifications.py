@@ -0,0 +1,328 @@
+# backend/app/notifications.py
+import asyncio
+import calendar
+import json
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models, schemas
+from .config import settings
+from .database import SessionLocal
+
+# Дедлайн НПД - 28 число каждого месяца
+TAX_DEADLINE_DAY = 28
+CHUNK_SIZE = 1000
+# Имя строки в scheduler_runs
+SCAN_NAME = "notifications"
+
+
+def add_months(value: date, months: int) -> date:
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    return date(year, month, min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def next_payment_date(start_date: date, schedule: str, today: date) -> date:
+    """Первая дата платежа строго после today (как в notifications.js)."""
+    step = 3 if schedule == "quarterly" else 1
+    if start_date > today:
+        return start_date
+    elapsed = (today.year - start_date.year) * 12 + today.month - start_date.month
+    k = max(0, elapsed // step)
+    due = add_months(start_date, k * step)
+    while due <= today:
+        k += 1
+        due = add_months(start_date, k * step)
+    return due
+
+
+def format_currency(amount: float) -> str:
+    return f"{amount:,.0f} ₽".replace(",", " ")
+
+
+def _chunks(items: List, size: int = CHUNK_SIZE):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def scan_upcoming_payments(db: Session, today: date) -> List[dict]:
+    horizon = today + timedelta(days=settings.NOTIFY_PAYMENT_DAYS)
+    contracts = db.query(
+        models.Contract.id,
+        models.Contract.user_id,
+        models.Contract.tenant_name,
+        models.Contract.rent_amount,
+        models.Contract.start_date,
+        models.Contract.end_date,
+        models.Contract.payment_schedule,
+    ).filter(
+        models.Contract.is_active == True,  # noqa: E712
+        models.Contract.start_date <= horizon,
+        models.Contract.end_date >= today,
+    ).execution_options(yield_per=CHUNK_SIZE)
+
+    due = {}
+    for contract in contracts:
+        due_date = next_payment_date(contract.start_date, contract.payment_schedule, today)
+        if due_date <= horizon and due_date <= contract.end_date:
+            due[contract.id] = (contract, due_date)
+
+    # Последний платеж по каждому договору - одним запросом на пачку
+    last_paid = {}
+    for ids in _chunks(list(due)):
+        rows = db.query(models.Payment.contract_id, func.max(models.Payment.date)).filter(
+            models.Payment.contract_id.in_(ids)
+        ).group_by(models.Payment.contract_id)
+        last_paid.update(rows)
+
+    rows = []
+    for contract_id, (contract, due_date) in due.items():
+        paid = last_paid.get(contract_id)
+        # Уже внесенную заранее оплату не напоминаем
+        if paid is not None and paid >= due_date - timedelta(days=settings.NOTIFY_PAYMENT_DAYS):
+            continue
+        days = (due_date - today).days
+        rows.append({
+            "user_id": contract.user_id,
+            "type": "payment",
+            "title": "Предстоящий платеж",
+            "message": f"Платеж по договору с {contract.tenant_name} через {days} дней ({format_currency(contract.rent_amount)})",
+            "priority": "high",
+            "action": {"type": "view_contract", "contractId": contract_id},
+            "dedupe_key": f"payment:{contract_id}:{due_date.isoformat()}",
+        })
+    return rows
+
+
+def scan_contract_expirations(db: Session, today: date) -> List[dict]:
+    horizon = today + timedelta(days=settings.NOTIFY_CONTRACT_DAYS)
+    contracts = db.query(
+        models.Contract.id,
+        models.Contract.user_id,
+        models.Contract.tenant_name,
+        models.Contract.end_date,
+    ).filter(
+        models.Contract.end_date >= today,
+        models.Contract.end_date <= horizon,
+        models.Contract.is_active == True,  # noqa: E712
+    ).execution_options(yield_per=CHUNK_SIZE)
+    return [{
+        "user_id": contract.user_id,
+        "type": "contract",
+        "title": "Завершение договора",
+        "message": f"Договор с {contract.tenant_name} истекает через {(contract.end_date - today).days} дней",
+        "priority": "medium",
+        "action": {"type": "renew_contract", "contractId": contract.id},
+        "dedupe_key": f"contract:{contract.id}:{contract.end_date.isoformat()}",
+    } for contract in contracts]
+
+
+def scan_tax_deadlines(db: Session, today: date) -> List[dict]:
+    deadline = today.replace(day=TAX_DEADLINE_DAY)
+    if deadline < today:
+        deadline = add_months(deadline, 1)
+    if (deadline - today).days > settings.NOTIFY_TAX_DAYS:
+        return []
+    # Самозанятые с действующими договорами
+    users = db.query(models.Contract.user_id).join(models.User, models.User.id == models.Contract.user_id).filter(
+        models.User.landlord_type == "self_employed",
+        models.Contract.is_active == True,  # noqa: E712
+        models.Contract.start_date <= today,
+        models.Contract.end_date >= today,
+    ).distinct()
+    return [{
+        "user_id": user_id,
+        "type": "tax",
+        "title": "Срок уплаты налога",
+        "message": f"До уплаты налога осталось {(deadline - today).days} дней",
+        "priority": "high",
+        "action": {"type": "view_tax_calculator"},
+        "dedupe_key": f"tax:{deadline.isoformat()}",
+    } for (user_id,) in users]
+
+
+def insert_notifications(db: Session, rows: List[dict]):
+    """Пакетная вставка; уже созданные уведомления пропускаются по dedupe_key."""
+    table = models.Notification.__table__
+    dialect = db.get_bind().dialect.name
+    for batch in _chunks(rows):
+        if dialect == "postgresql":
+            stmt = postgresql.insert(table).on_conflict_do_nothing(index_elements=["user_id", "dedupe_key"])
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(table).on_conflict_do_nothing(index_elements=["user_id", "dedupe_key"])
+        else:
+            stmt = insert(table)
+        db.execute(stmt, [{**row, "read": False} for row in batch])
+
+
+def run_once(db: Session, today: Optional[date] = None) -> Set[int]:
+    """Один проход планировщика по всем пользователям; возвращает затронутых."""
+    today = today or date.today()
+    rows = scan_upcoming_payments(db, today) + scan_contract_expirations(db, today) + scan_tax_deadlines(db, today)
+    if rows:
+        insert_notifications(db, rows)
+    db.commit()
+    return {row["user_id"] for row in rows}
+
+
+class NotificationBroker:
+    """Будит SSE-потоки этого процесса, когда для пользователя что-то появилось."""
+
+    def __init__(self):
+        self._events: Dict[int, Set[asyncio.Event]] = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> asyncio.Event:
+        event = asyncio.Event()
+        self._events[user_id].add(event)
+        return event
+
+    def unsubscribe(self, user_id: int, event: asyncio.Event):
+        self._events[user_id].discard(event)
+        if not self._events[user_id]:
+            del self._events[user_id]
+
+    def publish(self, user_ids: Iterable[int]):
+        for user_id in user_ids:
+            for event in self._events.get(user_id, ()):
+                event.set()
+
+    def user_ids(self) -> List[int]:
+        return list(self._events)
+
+
+broker = NotificationBroker()
+
+
+def claim_scan(db: Session, interval: int, now: Optional[datetime] = None) -> bool:
+    """Разрешает один проход планировщика за интервал на все процессы.
+
+    Условный UPDATE, как в jobs.claim: планировщик запущен в каждом
+    воркере uvicorn, но сканирует тот, кто первым сдвинет last_run_at.
+    """
+    now = now or datetime.now(timezone.utc)
+    claimed = db.execute(
+        update(models.SchedulerRun)
+        .where(models.SchedulerRun.name == SCAN_NAME, models.SchedulerRun.last_run_at <= now - timedelta(seconds=interval))
+        .values(last_run_at=now)
+    ).rowcount
+    if not claimed and db.get(models.SchedulerRun, SCAN_NAME) is None:
+        # Первый запуск: строку создает один из воркеров
+        db.add(models.SchedulerRun(name=SCAN_NAME, last_run_at=now))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+    db.commit()
+    return bool(claimed)
+
+
+def _run_once_with_session(interval: int) -> Set[int]:
+    db = SessionLocal()
+    try:
+        if not claim_scan(db, interval):
+            return set()
+        return run_once(db)
+    finally:
+        db.close()
+
+
+async def run_scheduler(interval: int):
+    while True:
+        try:
+            broker.publish(await run_in_threadpool(_run_once_with_session, interval))
+        except Exception as e:
+            print(f"Notification scheduler error: {e}")
+        await asyncio.sleep(interval)
+
+
+def poll_new_notifications(user_ids: List[int], after_id: Optional[int]):
+    """Пользователи из user_ids, у которых появились уведомления после after_id."""
+    db = SessionLocal()
+    try:
+        latest = db.query(func.max(models.Notification.id)).scalar() or 0
+        if after_id is None or latest <= after_id or not user_ids:
+            return set(), latest
+        rows = db.query(models.Notification.user_id).filter(
+            models.Notification.user_id.in_(user_ids),
+            models.Notification.id > after_id,
+            models.Notification.id <= latest,
+        ).distinct()
+        return {user_id for (user_id,) in rows}, latest
+    finally:
+        db.close()
+
+
+async def watch_notifications(interval: float):
+    """Будит SSE-потоки процесса, если уведомления создал другой воркер.
+
+    Один опрос базы на процесс, а не на каждый открытый поток.
+    """
+    after_id = None
+    while True:
+        try:
+            user_ids, after_id = await run_in_threadpool(poll_new_notifications, broker.user_ids(), after_id)
+            broker.publish(user_ids)
+        except Exception as e:
+            print(f"Notification watcher error: {e}")
+        await asyncio.sleep(interval)
+
+
+def fetch_notifications(user_id: int, after_id: Optional[int]):
+    """Новые уведомления и курсор для следующего запроса.
+
+    Без курсора отдаем непрочитанные, а курсор ставим на последнее
+    уведомление пользователя, чтобы дальше шли только новые.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(models.Notification).filter(models.Notification.user_id == user_id)
+        if after_id is None:
+            query = query.filter(models.Notification.read == False)  # noqa: E712
+            cursor = db.query(func.max(models.Notification.id)).filter(models.Notification.user_id == user_id).scalar() or 0
+        else:
+            query = query.filter(models.Notification.id > after_id)
+            cursor = after_id
+        items = [
+            schemas.Notification.from_orm(notification).dict()
+            for notification in query.order_by(models.Notification.id).limit(CHUNK_SIZE)
+        ]
+        if items:
+            cursor = max(cursor, items[-1]["id"])
+        return items, cursor
+    finally:
+        db.close()
+
+
+async def event_stream(user_id: int, last_event_id: Optional[int] = None):
+    """Server-Sent Events: новые уведомления пользователя по мере появления."""
+    event = broker.subscribe(user_id)
+    try:
+        while True:
+            event.clear()
+            items, last_event_id = await run_in_threadpool(fetch_notifications, user_id, last_event_id)
+            for notification in items:
+                data = json.dumps(notification, default=str, ensure_ascii=False)
+                yield f"id: {notification['id']}\nevent: notification\ndata: {data}\n\n"
+            if len(items) == CHUNK_SIZE:
+                continue
+            # В базу снова идем, только когда поток разбудили
+            # (планировщик или watch_notifications)
+            while True:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=settings.SSE_KEEPALIVE_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    # Комментарий держит соединение открытым через прокси
+                    yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(user_id, event)
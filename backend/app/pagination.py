@@ -0,0 +1,67 @@
+# backend/app/pagination.py
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, DateTime, tuple_
+from sqlalchemy.orm import Query
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        result = []
+        for column, value in zip(columns, values):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            result.append(value)
+        return result
+    except (ValueError, TypeError, binascii.Error):
+        raise CursorError("Invalid pagination cursor")
+
+
+def keyset_filter(query, columns: Sequence, after: Optional[str] = None, limit: int = 100):
+    """Добавляет условие курсора, сортировку и limit+1 к Query или select()."""
+    if after:
+        values = decode_cursor(after, columns)
+        if len(columns) == 1:
+            query = query.filter(columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    return query.order_by(*columns).limit(limit + 1)
+
+
+def split_page(items: List, columns: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return items, next_cursor
+
+
+def keyset_page(query: Query, columns: Sequence, after: Optional[str] = None, limit: int = 100) -> Tuple[List, Optional[str]]:
+    """Страница по ключу сортировки вместо OFFSET.
+
+    Запрос уже отфильтрован по user_id, поэтому курсор хранит только
+    остальные колонки ключа, например (id) или (date, id). Стоимость любой
+    страницы - один проход по индексу (user_id, ...) от позиции курсора.
+    """
+    items = keyset_filter(query, columns, after, limit).all()
+    return split_page(items, columns, limit)
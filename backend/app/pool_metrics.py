@@ -0,0 +1,106 @@
+# backend/app/pool_metrics.py
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+
+# Сколько последних выдач соединений хранить для перцентилей
+SAMPLE_SIZE = 1024
+
+
+class PoolMetrics:
+    """Телеметрия пула соединений одного движка.
+
+    Ожидание считается внутри Pool._do_get: туда попадает и выдача
+    свободного соединения, и ожидание освобождения, и открытие нового.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=SAMPLE_SIZE)
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+
+    def started(self):
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+    def finished(self, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.checkout_seconds += elapsed
+            self.max_checkout_seconds = max(self.max_checkout_seconds, elapsed)
+            self._samples.append(elapsed)
+
+    def instrument(self, pool_class):
+        """Подкласс пула, который отчитывается в эти метрики."""
+        metrics = self
+
+        class InstrumentedPool(pool_class):
+            def _do_get(self):
+                metrics.started()
+                started = time.perf_counter()
+                try:
+                    connection = super()._do_get()
+                except exc.TimeoutError:
+                    metrics.finished(time.perf_counter() - started, timed_out=True)
+                    raise
+                except BaseException:
+                    metrics.finished(time.perf_counter() - started)
+                    raise
+                metrics.finished(time.perf_counter() - started)
+                return connection
+
+        InstrumentedPool.__name__ = "Instrumented" + pool_class.__name__
+        return InstrumentedPool
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            stats = {
+                "pool": type(self.pool).__name__ if self.pool is not None else None,
+                "waiting": self.waiting,
+                "peak_waiting": self.peak_waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "checkout_avg_ms": round(self.checkout_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "checkout_p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3) if samples else 0.0,
+                "checkout_max_ms": round(self.max_checkout_seconds * 1000, 3),
+            }
+        # Размер, занятые и overflow есть только у QueuePool; NullPool их не ведет
+        pool = self.pool
+        if pool is not None and hasattr(pool, "checkedout"):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+            })
+        return stats
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+# По одному на реплику из DATABASE_REPLICA_URLS, заполняет database.py
+replica_pool_metrics = []
+
+
+def pool_stats() -> dict:
+    stats = {"sync": sync_pool_metrics.stats()}
+    if async_pool_metrics.pool is not None:
+        stats["async"] = async_pool_metrics.stats()
+    for metrics in replica_pool_metrics:
+        stats[metrics.name] = metrics.stats()
+    return stats
@@ -0,0 +1,139 @@
+# backend/app/replicas.py
+# Чтение с реплик для GET-эндпоинтов. Запись всегда идет в основную базу
+# через get_db; get_read_db отдает сессию реплики, только если на ней уже
+# есть все изменения пользователя, иначе - ту же сессию основной базы.
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+
+from . import auth, models, versioning
+from .config import settings
+from .database import ReplicaSessionLocal, SessionLocal, get_db, replica_count
+
+# Сколько пользователей с недавней записью помнить
+STICKY_SIZE = 100_000
+
+
+class ReplicaRouter:
+    """Выбор реплики по кругу с откатом на основную базу.
+
+    Основная база нужна, если пользователь только что писал (окно
+    REPLICA_STICKY_SECONDS), если реплика еще не догнала его data_version
+    или если реплики недоступны.
+    """
+
+    def __init__(self, count: int, open_session: Callable[[int], Session] = ReplicaSessionLocal, clock: Callable[[], float] = time.monotonic):
+        self.count = count
+        self._open_session = open_session
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+        self._down_until = [0.0] * count
+        self._written: "OrderedDict[int, float]" = OrderedDict()
+        self.routed = {"replica": 0, "sticky": 0, "lagging": 0, "unavailable": 0}
+
+    def note_write(self, user_ids: Iterable[int]):
+        now = self._clock()
+        with self._lock:
+            for user_id in user_ids:
+                self._written.pop(user_id, None)
+                self._written[user_id] = now
+            while len(self._written) > STICKY_SIZE:
+                self._written.popitem(last=False)
+
+    def is_sticky(self, user_id: int) -> bool:
+        with self._lock:
+            written = self._written.get(user_id)
+        return written is not None and self._clock() - written < settings.REPLICA_STICKY_SECONDS
+
+    def _count(self, outcome: str):
+        # += из разных потоков threadpool теряет инкременты
+        with self._lock:
+            self.routed[outcome] += 1
+
+    def _candidates(self):
+        # Начинаем со следующей по кругу, пропуская упавшие
+        start = next(self._next)
+        now = self._clock()
+        for offset in range(self.count):
+            index = (start + offset) % self.count
+            if self._down_until[index] <= now:
+                yield index
+
+    def open(self, user_id: int, current_version: Callable[[], int]) -> Optional[Session]:
+        """Сессия реплики с версией данных не ниже, чем на основной базе, или None."""
+        if not self.count:
+            return None
+        if self.is_sticky(user_id):
+            self._count("sticky")
+            return None
+        version = current_version()
+        lagging = False
+        for index in self._candidates():
+            session = self._open_session(index)
+            try:
+                replica_version = versioning.get_version(session, user_id)
+            except exc.DBAPIError as e:
+                session.close()
+                with self._lock:
+                    self._down_until[index] = self._clock() + settings.REPLICA_RETRY_SECONDS
+                print(f"❌ Replica {index} unavailable: {e}")
+                continue
+            if replica_version >= version:
+                self._count("replica")
+                return session
+            session.close()
+            lagging = True
+        self._count("lagging" if lagging else "unavailable")
+        return None
+
+    def stats(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            return {
+                "replicas": self.count,
+                "down": [index for index in range(self.count) if self._down_until[index] > now],
+                "routed": dict(self.routed),
+            }
+
+
+replica_router = ReplicaRouter(replica_count())
+versioning.commit_listeners.append(replica_router.note_write)
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+    """Сессия для GET-обработчиков, которые только читают.
+
+    Версию данных пользователя сверяем с основной базой, поэтому ответ
+    с реплики никогда не старше его собственных записей.
+    """
+    replica = None
+    if replica_router.count and not getattr(request.state, "response_cached", False):
+        version = getattr(request.state, "data_version", None)
+        replica = replica_router.open(
+            current_user.id,
+            (lambda: version) if version is not None else (lambda: versioning.get_version(db, current_user.id)),
+        )
+    if replica is None:
+        yield db
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+def open_read_session(user_id: int) -> Session:
+    """Для кода, который открывает сессию сам (потоковый экспорт)."""
+    primary = SessionLocal()
+    replica = replica_router.open(user_id, lambda: versioning.get_version(primary, user_id))
+    if replica is None:
+        return primary
+    primary.close()
+    return replica
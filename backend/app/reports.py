@@ -0,0 +1,196 @@
+# backend/app/reports.py
+# Тяжелые отчеты, которые считаются фоновыми задачами (app/jobs.py).
+# Раньше их собирал в браузере docs/js/printManager.js.
+import html
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+
+from . import models, rollups, tax
+
+Progress = Callable[[int], None]
+
+LANDLORD_TYPES = {
+    "self_employed": "Самозанятый (НПД)",
+    "individual_entrepreneur": "Индивидуальный предприниматель",
+    "individual": "Физическое лицо (НДФЛ)",
+}
+SCHEDULES = {"monthly": "ежемесячно", "quarterly": "ежеквартально"}
+
+
+def _year_bounds(params: dict):
+    year = int(params.get("year") or date.today().year)
+    return year, date(year, 1, 1), date(year, 12, 31)
+
+
+def _income_by_contract(db: Session, user_id: int, date_from: date, date_to: date) -> List[dict]:
+    rows = db.query(
+        models.Contract.id,
+        models.Contract.tenant_name,
+        models.Contract.tenant_type,
+        models.Contract.tenant_info,
+        models.Property.id,
+        models.Property.name,
+        func.sum(models.Payment.amount),
+        func.count(models.Payment.id),
+    ).join(models.Contract, models.Payment.contract_id == models.Contract.id).join(
+        models.Property, models.Contract.property_id == models.Property.id
+    ).filter(
+        models.Payment.user_id == user_id,
+        models.Payment.date >= date_from,
+        models.Payment.date <= date_to,
+    ).group_by(
+        models.Contract.id, models.Contract.tenant_name, models.Contract.tenant_type, models.Contract.tenant_info,
+        models.Property.id, models.Property.name,
+    ).order_by(models.Contract.id)
+    return [{
+        "contract_id": contract_id,
+        "tenant_name": tenant_name,
+        "tenant_type": tenant_type,
+        "tenant_inn": (tenant_info or {}).get("inn"),
+        "property_id": property_id,
+        "property_name": property_name,
+        "income": round(float(amount or 0.0), 2),
+        "payments": count,
+    } for contract_id, tenant_name, tenant_type, tenant_info, property_id, property_name, amount, count in rows]
+
+
+def _expenses_by_property(db: Session, user_id: int, date_from: date, date_to: date) -> Dict[int, float]:
+    rows = db.query(models.Expense.property_id, func.sum(models.Expense.amount)).filter(
+        models.Expense.user_id == user_id,
+        models.Expense.date >= date_from,
+        models.Expense.date <= date_to,
+    ).group_by(models.Expense.property_id)
+    return {property_id: round(float(amount or 0.0), 2) for property_id, amount in rows}
+
+
+def annual_report(db: Session, user: models.User, params: dict, progress: Progress) -> dict:
+    """Годовой отчет: налог по месяцам, сводка по объектам и доход по договорам."""
+    year, date_from, date_to = _year_bounds(params)
+    taxes = tax.calculate_for_user(db, user, period="month", date_from=date_from, date_to=date_to)
+    progress(40)
+    summary = rollups.summary(db, user, date_from=date_from, date_to=date_to)
+    progress(70)
+    contracts = _income_by_contract(db, user.id, date_from, date_to)
+    expenses = _expenses_by_property(db, user.id, date_from, date_to)
+    return {
+        "year": year,
+        "landlord_type": user.landlord_type,
+        "income": summary["income"],
+        "expenses": summary["expenses"],
+        "taxes": summary["taxes"],
+        "months": summary["months"],
+        "properties": [{**row, "expenses_total": expenses.get(row["property_id"], 0.0)} for row in summary["properties"]],
+        "contracts": contracts,
+        "tax_rows": taxes["rows"],
+        "tax_totals": taxes["totals"],
+    }
+
+
+def ndfl_3(db: Session, user: models.User, params: dict, progress: Progress) -> dict:
+    """Данные для декларации 3-НДФЛ: источники дохода и расчет налога."""
+    year, date_from, date_to = _year_bounds(params)
+    sources = _income_by_contract(db, user.id, date_from, date_to)
+    progress(50)
+    expenses = round(sum(_expenses_by_property(db, user.id, date_from, date_to).values()), 2)
+    income = round(sum(source["income"] for source in sources), 2)
+    income_physical = sum(source["income"] for source in sources if source["tenant_type"] == "physical")
+    calculations = {}
+    for regime in ("ndfl_actual", "ndfl_professional"):
+        base, amount = tax.compute_tax(regime, income_physical, income - income_physical, expenses)
+        calculations[regime] = {"tax_base": round(base, 2), "tax": round(amount, 2)}
+    return {
+        "year": year,
+        "declarant": {
+            "full_name": user.full_name,
+            "inn": user.inn,
+            "passport_series": user.passport_series,
+            "passport_number": user.passport_number,
+            "passport_issued_by": user.passport_issued_by,
+            "passport_issue_date": user.passport_issue_date.isoformat() if user.passport_issue_date else None,
+            "registration_address": user.registration_address,
+            "phone": user.phone,
+        },
+        # 3-НДФЛ подают физлица; для остальных данные справочные
+        "applicable": user.landlord_type == "individual",
+        "rate": tax.NDFL_RATE,
+        "income": income,
+        "expenses": expenses,
+        "sources": sources,
+        "calculations": calculations,
+        "tax_withheld": 0.0,
+    }
+
+
+def _money(amount: float) -> str:
+    return f"{amount:,.2f}".replace(",", " ")
+
+
+def _contract_html(contract: models.Contract, user: models.User) -> str:
+    e = lambda value: html.escape(str(value)) if value not in (None, "") else "[не указано]"  # noqa: E731
+    info = contract.tenant_info or {}
+    months = max(1, (contract.end_date.year - contract.start_date.year) * 12 + contract.end_date.month - contract.start_date.month)
+    tax_clause = ""
+    if user.landlord_type == "self_employed":
+        rate = 4 if contract.tenant_type == "physical" else 6
+        tax_clause = (
+            "<h2>6. НАЛОГООБЛОЖЕНИЕ</h2>"
+            "<p>6.1. Арендодатель применяет налоговый режим \"Налог на профессиональный доход\".</p>"
+            f"<p>6.2. Ставка налога: {rate}% от суммы дохода.</p>"
+        )
+    prop = contract.property
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"UTF-8\">"
+        f"<title>Договор аренды №{contract.id}</title></head><body>"
+        f"<h1>ДОГОВОР АРЕНДЫ №{contract.id}</h1>"
+        f"<p>{contract.start_date.strftime('%d.%m.%Y')}</p>"
+        f"<p><strong>Арендодатель:</strong> {e(user.full_name or user.email)}, {e(LANDLORD_TYPES.get(user.landlord_type))}</p>"
+        f"<p><strong>Арендатор:</strong> {e(contract.tenant_name)}; паспорт {e(info.get('passport_series'))} "
+        f"{e(info.get('passport_number'))}; адрес {e(info.get('registration_address'))}; телефон {e(info.get('phone'))}</p>"
+        "<h2>1. ПРЕДМЕТ ДОГОВОРА</h2>"
+        f"<p>1.1. Арендодатель передает, а Арендатор принимает во временное пользование объект "
+        f"\"{e(prop.name if prop else None)}\" по адресу: {e(prop.address if prop else None)}"
+        f"{f', площадь {prop.area} кв. м' if prop and prop.area else ''}.</p>"
+        "<h2>2. СРОК АРЕНДЫ</h2>"
+        f"<p>2.1. С {contract.start_date.strftime('%d.%m.%Y')} по {contract.end_date.strftime('%d.%m.%Y')}.</p>"
+        "<h2>3. АРЕНДНАЯ ПЛАТА</h2>"
+        f"<p>3.1. {_money(contract.rent_amount)} руб. в месяц, оплата {e(SCHEDULES.get(contract.payment_schedule, contract.payment_schedule))}.</p>"
+        f"<p>3.2. Общая сумма за срок договора: {_money(contract.rent_amount * months)} руб.</p>"
+        f"{tax_clause}"
+        "<p>Арендодатель ____________ &nbsp;&nbsp; Арендатор ____________</p>"
+        "</body></html>"
+    )
+
+
+def contract_documents(db: Session, user: models.User, params: dict, progress: Progress) -> dict:
+    """Пакет договоров в HTML: все действующие или перечисленные в contract_ids."""
+    query = db.query(models.Contract).options(joinedload(models.Contract.property)).filter(
+        models.Contract.user_id == user.id
+    )
+    contract_ids: Optional[List[int]] = params.get("contract_ids")
+    if contract_ids:
+        query = query.filter(models.Contract.id.in_([int(value) for value in contract_ids]))
+    elif params.get("active_only", True):
+        query = query.filter(models.Contract.is_active == True)  # noqa: E712
+    contracts = query.order_by(models.Contract.id).all()
+
+    documents = []
+    for number, contract in enumerate(contracts, start=1):
+        documents.append({
+            "contract_id": contract.id,
+            "filename": f"contract-{contract.id}.html",
+            "html": _contract_html(contract, user),
+        })
+        if number % 20 == 0:
+            progress(int(number * 100 / len(contracts)))
+    return {"count": len(documents), "documents": documents}
+
+
+# Тип задачи -> обработчик
+HANDLERS = {
+    "annual_report": annual_report,
+    "ndfl_3": ndfl_3,
+    "contract_documents": contract_documents,
+}
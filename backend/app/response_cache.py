@@ -0,0 +1,153 @@
+# backend/app/response_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import auth, models, versioning
+from .config import settings
+from .database import get_async_db, get_db
+
+# Заголовки обработчика, которые сохраняются вместе с телом ответа
+CACHED_HEADERS = ("x-next-cursor",)
+
+
+class ResponseCache:
+    """LRU готовых JSON-ответов по (пользователь, путь, параметры).
+
+    Запись действительна, пока не изменилась версия данных пользователя,
+    поэтому отдельная инвалидация не нужна: устаревшие записи просто
+    перезаписываются или вытесняются.
+    """
+
+    def __init__(self, maxsize: int, max_body: int):
+        self.maxsize = maxsize
+        self.max_body = max_body
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Tuple, version: int) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def set(self, key: Tuple, version: int, body: bytes, headers: Dict[str, str]):
+        if not self.maxsize or len(body) > self.max_body:
+            return
+        with self._lock:
+            self._entries[key] = (version, body, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_MAX_BODY)
+
+
+@lru_cache(maxsize=None)
+def adapter_for(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def make_etag(user_id: int, version: int, request: Request) -> str:
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{user_id}:{request.url.path}?{params}".encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Для If-None-Match сравнение слабое: W/"..." совпадает с "..."
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+class CachedView:
+    """Версия данных, ETag и, если есть, готовый ответ для GET-обработчика."""
+
+    def __init__(self, key: Tuple, version: int, etag: str):
+        self.key = key
+        self.version = version
+        self.etag = etag
+        self.hit: Optional[Response] = None
+
+    def _response(self, body: bytes, headers: Dict[str, str]) -> Response:
+        response = Response(content=body, media_type="application/json", headers=headers)
+        response.headers["ETag"] = self.etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.headers["Vary"] = "Authorization"
+        return response
+
+    def respond_json(self, body: bytes, response: Response) -> Response:
+        """Ответ из уже готового JSON (быстрый путь списков)."""
+        headers = {name: value for name, value in response.headers.items() if name in CACHED_HEADERS}
+        response_cache.set(self.key, self.version, body, headers)
+        return self._response(body, headers)
+
+    def respond(self, content, response: Response, response_type) -> Response:
+        """Сериализует ответ по response_model, кладет в кэш и ставит ETag."""
+        adapter = adapter_for(response_type)
+        return self.respond_json(adapter.dump_json(adapter.validate_python(content, from_attributes=True)), response)
+
+
+def _check(request: Request, user: models.User, version: int) -> CachedView:
+    etag = make_etag(user.id, version, request)
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        response_cache.record_not_modified()
+        # Тело не нужно: клиент отдаст свою копию
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"},
+        )
+    key = (user.id, request.url.path, tuple(sorted(request.query_params.multi_items())))
+    view = CachedView(key, version, etag)
+    cached = response_cache.get(key, version)
+    if cached is not None:
+        view.hit = view._response(*cached)
+    return view
+
+
+async def cached_view(request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)) -> CachedView:
+    # Версия приходит с принципалом из кэша (app/cache.py); в базу идем, только
+    # если ее там нет - например, запись в общем кэше от старой версии кода
+    version = current_user.data_version
+    if version is None:
+        version = await run_in_threadpool(versioning.get_version, db, current_user.id)
+    # Для get_read_db (app/replicas.py): версия уже известна, а при попадании
+    # в кэш сессия реплики не нужна вовсе
+    request.state.data_version = version
+    view = _check(request, current_user, version)
+    request.state.response_cached = view.hit is not None
+    return view
+
+async def cached_view_async(request: Request, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(auth.get_current_user_async)) -> CachedView:
+    version = current_user.data_version
+    if version is None:
+        version = await versioning.get_version_async(db, current_user.id)
+    return _check(request, current_user, version)
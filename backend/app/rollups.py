@@ -0,0 +1,206 @@
+# backend/app/rollups.py
+import calendar
+from collections import defaultdict
+from datetime import date
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, inspect, insert
+from sqlalchemy.orm import Session
+
+from . import models, tax
+
+DIRTY_KEY = "rollup_dirty"
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def month_end(value: date) -> date:
+    return value.replace(day=calendar.monthrange(value.year, value.month)[1])
+
+
+def _dirty(session: Session) -> dict:
+    return session.info.setdefault(DIRTY_KEY, {"months": set(), "contracts": set()})
+
+
+def mark_dirty(session: Session, user_id: int, dates: Iterable[date]):
+    """Помечает месяцы для пересчета при коммите.
+
+    Нужно вызывать для записей через Core insert(): ORM-изменения платежей
+    и расходов отслеживаются автоматически.
+    """
+    months = _dirty(session)["months"]
+    for value in dates:
+        if isinstance(value, date):
+            months.add((user_id, month_start(value)))
+
+
+def mark_contracts_dirty(session: Session, contract_ids: Iterable[int]):
+    """Для договоров, у которых Core update() сменил объект или тип арендатора."""
+    _dirty(session)["contracts"].update(contract_ids)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (models.Payment, models.Expense)):
+            dates = [obj.date]
+            if obj in session.dirty:
+                # При переносе платежа на другую дату пересчитываем и старый месяц
+                dates.extend(inspect(obj).attrs.date.history.deleted or ())
+            mark_dirty(session, obj.user_id, dates)
+        elif isinstance(obj, models.Contract) and obj in session.dirty:
+            attrs = inspect(obj).attrs
+            if attrs.property_id.history.has_changes() or attrs.tenant_type.history.has_changes():
+                _dirty(session)["contracts"].add(obj.id)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_on_commit(session):
+    # before_commit вызывается до финального flush, поэтому сбрасываем сами,
+    # чтобы _collect_changes увидел еще не записанные объекты
+    session.flush()
+    dirty = session.info.pop(DIRTY_KEY, None)
+    if dirty:
+        refresh(session, dirty["months"], dirty["contracts"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(DIRTY_KEY, None)
+
+
+def refresh(session: Session, months: set, contracts: Iterable[int] = ()):
+    """Пересчитывает итоги за указанные (user_id, месяц) из исходных таблиц."""
+    months = set(months)
+    contracts = list(contracts)
+    if contracts:
+        # Смена объекта или типа арендатора в договоре затрагивает все его платежи
+        rows = session.query(models.Payment.user_id, models.Payment.date).filter(
+            models.Payment.contract_id.in_(contracts)
+        ).distinct()
+        months.update((user_id, month_start(paid_on)) for user_id, paid_on in rows)
+
+    by_user = defaultdict(set)
+    for user_id, month in months:
+        by_user[user_id].add(month)
+
+    for user_id, user_months in by_user.items():
+        buckets = tax.aggregate_ledger(session, [user_id], min(user_months), month_end(max(user_months)))
+        session.execute(
+            delete(models.MonthlyRollup).where(
+                models.MonthlyRollup.user_id == user_id,
+                models.MonthlyRollup.month.in_(user_months),
+            )
+        )
+        rows = [
+            _row(key, values) for key, values in buckets.items()
+            if date(key[2], key[3], 1) in user_months and any(values)
+        ]
+        if rows:
+            session.execute(insert(models.MonthlyRollup), rows)
+
+
+def _row(key, values) -> dict:
+    user_id, property_id, year, month = key
+    return {
+        "user_id": user_id,
+        "property_id": property_id,
+        "month": date(year, month, 1),
+        "income_physical": values[0],
+        "income_legal": values[1],
+        "expenses": values[2],
+    }
+
+
+def rebuild(db: Session, user_ids: Optional[Iterable[int]] = None, chunk_size: int = 500) -> int:
+    """Полный пересчет итогов (бэкфилл), пачками пользователей по id."""
+    user_ids = list(user_ids) if user_ids is not None else None
+    last_id, total = 0, 0
+    while True:
+        query = db.query(models.User.id).filter(models.User.id > last_id)
+        if user_ids is not None:
+            query = query.filter(models.User.id.in_(user_ids))
+        chunk = [row[0] for row in query.order_by(models.User.id).limit(chunk_size)]
+        if not chunk:
+            break
+        db.execute(delete(models.MonthlyRollup).where(models.MonthlyRollup.user_id.in_(chunk)))
+        rows = [_row(key, values) for key, values in tax.aggregate_ledger(db, chunk).items() if any(values)]
+        if rows:
+            db.execute(insert(models.MonthlyRollup), rows)
+        db.commit()
+        total += len(rows)
+        last_id = chunk[-1]
+    return total
+
+
+def summary(db: Session, user: models.User, date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+    """Сводка для дашборда из таблицы итогов; границы округляются до месяцев."""
+    query = db.query(
+        models.MonthlyRollup.month,
+        models.MonthlyRollup.property_id,
+        models.MonthlyRollup.income_physical,
+        models.MonthlyRollup.income_legal,
+        models.MonthlyRollup.expenses,
+    ).filter(models.MonthlyRollup.user_id == user.id)
+    if date_from is not None:
+        query = query.filter(models.MonthlyRollup.month >= month_start(date_from))
+    if date_to is not None:
+        query = query.filter(models.MonthlyRollup.month <= date_to)
+
+    regimes = tax.regimes_for(user.landlord_type)
+    by_month = defaultdict(lambda: [0.0, 0.0, 0.0])
+    by_property = defaultdict(lambda: [0.0, 0.0, 0.0])
+    total = [0.0, 0.0, 0.0]
+    for month, property_id, income_physical, income_legal, expenses in query:
+        for target in (by_month[month], by_property[property_id], total):
+            target[0] += income_physical
+            target[1] += income_legal
+            target[2] += expenses
+
+    months = []
+    for month in sorted(by_month):
+        income_physical, income_legal, expenses = by_month[month]
+        base, amount = tax.compute_tax(regimes[0], income_physical, income_legal, expenses)
+        months.append({
+            "month": month.strftime("%Y-%m"),
+            "income": round(income_physical + income_legal, 2),
+            "expenses": round(expenses, 2),
+            "tax_base": round(base, 2),
+            "tax": round(amount, 2),
+        })
+    properties = [
+        {"property_id": property_id, "income": round(values[0] + values[1], 2), "expenses": round(values[2], 2)}
+        for property_id, values in sorted(by_property.items())
+    ]
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "regime": regimes[0],
+        "income": round(total[0] + total[1], 2),
+        "expenses": round(total[2], 2),
+        "months": months,
+        "properties": properties,
+        "taxes": {name: round(tax.compute_tax(name, *total)[1], 2) for name in regimes},
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.rollups --rebuild [--user-id 1 --user-id 2]
+    import argparse
+
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild monthly analytics rollups")
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    parser.add_argument("--user-id", type=int, action="append")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"✅ Rollup rows written: {rebuild(db, args.user_id, args.chunk_size)}")
+    finally:
+        db.close()
@@ -0,0 +1,258 @@
+# backend/app/routes_async.py
+# Асинхронные версии CRUD-эндпоинтов из main.py. Подключаются при
+# DATABASE_ASYNC=1 раньше синхронных и перекрывают их: число одновременных
+# запросов ограничено пулом соединений, а не threadpool'ом Starlette.
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from . import admission, auth, crud, crud_async, schemas, serialization, tax
+from .config import settings
+from .database import get_async_db
+from .pagination import CursorError
+from .response_cache import CachedView, cached_view_async
+
+router = APIRouter()
+
+
+@router.post("/token", response_model=schemas.Token)
+async def login_for_access_token(form_data: auth.OAuth2PasswordRequestForm = Depends(), _: None = Depends(admission.limit_login), db: AsyncSession = Depends(get_async_db)):
+    user = await auth.authenticate_user_async_db(db, form_data.username, form_data.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await run_in_threadpool(admission.login_succeeded, form_data.username)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data={"sub": user.email}, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/users/", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
+    if db_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    return await crud_async.create_user(db=db, user=user)
+
+@router.get("/users/me/", response_model=schemas.User)
+async def read_users_me(response: Response, view: CachedView = Depends(cached_view_async), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    return view.respond(current_user, response, schemas.User)
+
+# Property endpoints
+@router.get("/properties/", response_model=List[schemas.PropertyDetail])
+async def read_properties(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, include: Optional[str] = None, view: CachedView = Depends(cached_view_async), db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.PROPERTY_INCLUDES, current_user.id)
+        if not options and settings.FAST_LIST_RESPONSES:
+            # Связи не запрошены: ORM-объекты не нужны, строки сразу в JSON
+            rows, next_cursor = await crud_async.get_properties_rows(db, user_id=current_user.id, after=after, limit=limit, skip=skip)
+            properties = None
+        elif skip:
+            properties, next_cursor = await crud_async.get_properties(db, user_id=current_user.id, skip=skip, limit=limit, options=options), None
+        else:
+            properties, next_cursor = await crud_async.get_properties_page(db, user_id=current_user.id, after=after, limit=limit, options=options)
+    except (CursorError, crud.IncludeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if properties is None:
+        return view.respond_json(serialization.rows_to_json(rows, schemas.PropertyDetail), response)
+    return view.respond(properties, response, List[schemas.PropertyDetail])
+
+@router.post("/properties/", response_model=schemas.Property)
+async def create_property(property: schemas.PropertyCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    return await crud_async.create_property(db=db, property=property, user_id=current_user.id)
+
+@router.get("/properties/{property_id}", response_model=schemas.PropertyDetail)
+async def read_property(property_id: int, response: Response, include: Optional[str] = None, view: CachedView = Depends(cached_view_async), db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.PROPERTY_INCLUDES, current_user.id)
+    except crud.IncludeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    property = await crud_async.get_property(db, property_id=property_id, user_id=current_user.id, options=options)
+    if property is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return view.respond(property, response, schemas.PropertyDetail)
+
+@router.put("/properties/{property_id}", response_model=schemas.Property)
+async def update_property(property_id: int, property: schemas.PropertyUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    return await crud_async.update_property(db, property_id=property_id, property=property, user_id=current_user.id)
+
+@router.delete("/properties/{property_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_property(property_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.delete_property(db, property_id=property_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+# Contract endpoints
+@router.get("/contracts/", response_model=List[schemas.ContractDetail])
+async def read_contracts(response: Response, skip: int = 0, limit: int = 100, after: Optional[str] = None, include: Optional[str] = None, view: CachedView = Depends(cached_view_async), db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.CONTRACT_INCLUDES, current_user.id)
+        if not options and settings.FAST_LIST_RESPONSES:
+            # Связи не запрошены: ORM-объекты не нужны, строки сразу в JSON
+            rows, next_cursor = await crud_async.get_contracts_rows(db, user_id=current_user.id, after=after, limit=limit, skip=skip)
+            contracts = None
+        elif skip:
+            contracts, next_cursor = await crud_async.get_contracts(db, user_id=current_user.id, skip=skip, limit=limit, options=options), None
+        else:
+            contracts, next_cursor = await crud_async.get_contracts_page(db, user_id=current_user.id, after=after, limit=limit, options=options)
+    except (CursorError, crud.IncludeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if contracts is None:
+        return view.respond_json(serialization.rows_to_json(rows, schemas.ContractDetail), response)
+    return view.respond(contracts, response, List[schemas.ContractDetail])
+
+@router.post("/contracts/", response_model=schemas.Contract)
+async def create_contract(contract: schemas.ContractCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    try:
+        return await crud_async.create_contract(db=db, contract=contract, user_id=current_user.id)
+    except crud.OwnershipError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/contracts/{contract_id}", response_model=schemas.ContractDetail)
+async def read_contract(contract_id: int, response: Response, include: Optional[str] = None, view: CachedView = Depends(cached_view_async), db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    try:
+        options = crud.include_options(include, crud.CONTRACT_INCLUDES, current_user.id)
+    except crud.IncludeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    contract = await crud_async.get_contract(db, contract_id=contract_id, user_id=current_user.id, options=options)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return view.respond(contract, response, schemas.ContractDetail)
+
+@router.put("/contracts/{contract_id}", response_model=schemas.Contract)
+async def update_contract(contract_id: int, contract: schemas.ContractUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    try:
+        db_contract = await crud_async.update_contract(db, contract_id=contract_id, contract=contract, user_id=current_user.id)
+    except crud.OwnershipError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if db_contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return db_contract
+
+@router.delete("/contracts/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_contract(contract_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.delete_contract(db, contract_id=contract_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+# Payment endpoints
+@router.get("/payments/", response_model=List[schemas.Payment])
+async def read_payments(response: Response, date_from: Optional[date] = None, date_to: Optional[date] = None, contract_id: Optional[int] = None, property_id: Optional[int] = None, limit: int = 100, after: Optional[str] = None, view: CachedView = Depends(cached_view_async), db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    try:
+        payments, next_cursor = await crud_async.get_payments_rows(db, user_id=current_user.id, after=after, limit=limit, date_from=date_from, date_to=date_to, contract_id=contract_id, property_id=property_id)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if settings.FAST_LIST_RESPONSES:
+        return view.respond_json(serialization.rows_to_json(payments, schemas.Payment), response)
+    return view.respond(payments, response, List[schemas.Payment])
+
+@router.get("/payments/totals", response_model=schemas.PeriodTotals)
+async def read_payment_totals(period: str = "month", date_from: Optional[date] = None, date_to: Optional[date] = None, contract_id: Optional[int] = None, property_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if period not in tax.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(tax.PERIODS)}")
+    return await crud_async.get_payment_totals(db, user_id=current_user.id, period=period, date_from=date_from, date_to=date_to, contract_id=contract_id, property_id=property_id)
+
+@router.post("/payments/", response_model=schemas.Payment)
+async def create_payment(payment: schemas.PaymentCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.get_contract(db, contract_id=payment.contract_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return await crud_async.create_payment(db=db, payment=payment, user_id=current_user.id)
+
+@router.get("/payments/{payment_id}", response_model=schemas.Payment)
+async def read_payment(payment_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    payment = await crud_async.get_payment(db, payment_id=payment_id, user_id=current_user.id)
+    if payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return payment
+
+@router.put("/payments/{payment_id}", response_model=schemas.Payment)
+async def update_payment(payment_id: int, payment: schemas.PaymentUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.get_contract(db, contract_id=payment.contract_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    db_payment = await crud_async.update_payment(db, payment_id=payment_id, payment=payment, user_id=current_user.id)
+    if db_payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return db_payment
+
+@router.delete("/payments/{payment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_payment(payment_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.delete_payment(db, payment_id=payment_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+# Expense endpoints
+@router.get("/expenses/", response_model=List[schemas.Expense])
+async def read_expenses(response: Response, date_from: Optional[date] = None, date_to: Optional[date] = None, property_id: Optional[int] = None, limit: int = 100, after: Optional[str] = None, view: CachedView = Depends(cached_view_async), db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if view.hit:
+        return view.hit
+    try:
+        expenses, next_cursor = await crud_async.get_expenses_rows(db, user_id=current_user.id, after=after, limit=limit, date_from=date_from, date_to=date_to, property_id=property_id)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if settings.FAST_LIST_RESPONSES:
+        return view.respond_json(serialization.rows_to_json(expenses, schemas.Expense), response)
+    return view.respond(expenses, response, List[schemas.Expense])
+
+@router.get("/expenses/totals", response_model=schemas.PeriodTotals)
+async def read_expense_totals(period: str = "month", date_from: Optional[date] = None, date_to: Optional[date] = None, property_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if period not in tax.PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(tax.PERIODS)}")
+    return await crud_async.get_expense_totals(db, user_id=current_user.id, period=period, date_from=date_from, date_to=date_to, property_id=property_id)
+
+@router.post("/expenses/", response_model=schemas.Expense)
+async def create_expense(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.get_property(db, property_id=expense.property_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return await crud_async.create_expense(db=db, expense=expense, user_id=current_user.id)
+
+@router.get("/expenses/{expense_id}", response_model=schemas.Expense)
+async def read_expense(expense_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    expense = await crud_async.get_expense(db, expense_id=expense_id, user_id=current_user.id)
+    if expense is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return expense
+
+@router.put("/expenses/{expense_id}", response_model=schemas.Expense)
+async def update_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.get_property(db, property_id=expense.property_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    db_expense = await crud_async.update_expense(db, expense_id=expense_id, expense=expense, user_id=current_user.id)
+    if db_expense is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return db_expense
+
+@router.delete("/expenses/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_expense(expense_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(auth.get_current_user_async)):
+    if await crud_async.delete_expense(db, expense_id=expense_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, validator, root_validator
+from sqlalchemy import inspect
 from datetime import date, datetime
 from typing import Optional, Dict, Any, List
 import re
@@ -98,6 +99,7 @@ class Payment(PaymentBase):
     id: int
     user_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -118,10 +120,40 @@ class Expense(ExpenseBase):
     id: int
     user_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+def only_loaded_relations(obj, fields):
+    """Отдает ORM-объект схеме без незагруженных связей.
+
+    Связи попадают в ответ, только если их подгрузили через ?include=;
+    иначе каждая строка списка сделала бы свой lazy-запрос, а в
+    AsyncSession такой запрос и вовсе невозможен.
+    """
+    state = inspect(obj, raiseerr=False)
+    if state is None:
+        return obj
+    skipped = state.unloaded & set(state.mapper.relationships.keys())
+    return {name: getattr(obj, name) for name in fields if name not in skipped}
+
+class PropertyDetail(Property):
+    contracts: Optional[List[Contract]] = None
+    expenses: Optional[List[Expense]] = None
+
+    @root_validator(pre=True)
+    def skip_unloaded(cls, values):
+        return only_loaded_relations(values, cls.model_fields)
+
+class ContractDetail(Contract):
+    property: Optional[Property] = None
+    payments: Optional[List[Payment]] = None
+
+    @root_validator(pre=True)
+    def skip_unloaded(cls, values):
+        return only_loaded_relations(values, cls.model_fields)
+
 class NotificationBase(BaseModel):
     type: str
     title: str
@@ -144,6 +176,267 @@ class Notification(NotificationBase):
     class Config:
         from_attributes = True
 
+class TaxRow(BaseModel):
+    period: str
+    property_id: Optional[int] = None
+    regime: str
+    income: float
+    expenses: float
+    tax_base: float
+    tax: float
+
+class TaxReport(BaseModel):
+    user_id: int
+    landlord_type: str
+    period: str
+    rows: List[TaxRow]
+    totals: Dict[str, float]
+
+class SyncPull(BaseModel):
+    cursor: str
+    full: bool
+    properties: List[Property] = []
+    contracts: List[Contract] = []
+    payments: List[Payment] = []
+    expenses: List[Expense] = []
+    deleted: Dict[str, List[int]] = {}
+
+class SyncChange(BaseModel):
+    entity: str
+    op: str = 'upsert'
+    id: Optional[int] = None
+    client_id: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    data: Optional[Dict[str, Any]] = None
+
+class SyncPush(BaseModel):
+    changes: List[SyncChange]
+
+class SyncChangeResult(BaseModel):
+    entity: str
+    id: Optional[int] = None
+    client_id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class SyncPushResult(BaseModel):
+    results: List[SyncChangeResult]
+
+class PeriodTotal(BaseModel):
+    period: str
+    amount: float
+    count: int
+
+class PeriodTotals(BaseModel):
+    period: str
+    total: float
+    count: int
+    periods: List[PeriodTotal]
+
+class BatchOperation(BaseModel):
+    entity: str
+    op: str = 'create'
+    id: Optional[int] = None
+    data: Optional[Dict[str, Any]] = None
+    # Временный id создаваемой записи: другие операции пачки ссылаются
+    # на нее строкой "$ref" в property_id/contract_id
+    ref: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = True
+
+class BatchItemResult(BaseModel):
+    index: int
+    entity: str
+    op: str
+    id: Optional[int] = None
+    ref: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    committed: bool
+    results: List[BatchItemResult]
+
+class SearchResult(BaseModel):
+    properties: List[Property]
+    contracts: List[Contract]
+
+class JobCreate(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    params: Optional[Dict[str, Any]] = None
+    data_version: int
+    status: str
+    progress: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobDetail(Job):
+    result: Optional[Dict[str, Any]] = None
+
+class HypotheticalContract(BaseModel):
+    rent_amount: float
+    tenant_type: str = 'physical'
+    start_date: date
+    end_date: date
+    payment_schedule: str = 'monthly'
+
+    @validator('tenant_type')
+    def known_tenant_type(cls, v):
+        if v not in ('physical', 'legal'):
+            raise ValueError('tenant_type must be physical or legal')
+        return v
+
+    @validator('payment_schedule')
+    def known_schedule(cls, v):
+        if v not in ('monthly', 'quarterly'):
+            raise ValueError('payment_schedule must be monthly or quarterly')
+        return v
+
+    @validator('end_date')
+    def ends_after_start(cls, v, values):
+        if 'start_date' in values and v < values['start_date']:
+            raise ValueError('end_date must not be before start_date')
+        return v
+
+class RentChange(BaseModel):
+    contract_id: int
+    # Новая аренда в месяц или множитель к текущей
+    rent_amount: Optional[float] = None
+    multiplier: Optional[float] = None
+
+    @root_validator(skip_on_failure=True)
+    def one_of(cls, values):
+        if (values.get('rent_amount') is None) == (values.get('multiplier') is None):
+            raise ValueError('Specify either rent_amount or multiplier')
+        return values
+
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    rent_multiplier: float = 1.0
+    expense_multiplier: float = 1.0
+    extra_expenses: float = 0.0
+    contracts: List[HypotheticalContract] = []
+    rent_changes: List[RentChange] = []
+
+class SimulationRequest(BaseModel):
+    years: Optional[List[int]] = None
+    scenarios: List[Scenario] = []
+
+class SimulationYear(BaseModel):
+    year: int
+    income: float
+    expenses: float
+    # None - режим недоступен (например, НПД сверх лимита дохода)
+    taxes: Dict[str, Optional[float]]
+    best_regime: str
+    best_tax: float
+    current_tax: Optional[float] = None
+    savings: Optional[float] = None
+
+class SimulationScenario(BaseModel):
+    name: str
+    best_regime: str
+    totals: Dict[str, Optional[float]]
+    years: List[SimulationYear]
+
+class SimulationResult(BaseModel):
+    landlord_type: str
+    current_regimes: List[str]
+    scenarios: List[SimulationScenario]
+
+class UnmatchedStatementLine(BaseModel):
+    line_no: int
+    date: date
+    amount: float
+    payer: str
+    purpose: str
+    reason: str
+
+class StatementImportReport(BaseModel):
+    format: str
+    credits: int
+    matched: int
+    duplicates: int
+    unmatched_count: int
+    unmatched: List[UnmatchedStatementLine]
+
+class BackupImportReport(BaseModel):
+    properties: int
+    contracts: int
+    payments: int
+    expenses: int
+    notifications: int
+
+class MonthSummary(BaseModel):
+    month: str
+    income: float
+    expenses: float
+    tax_base: float
+    tax: float
+
+class PropertySummary(BaseModel):
+    property_id: int
+    income: float
+    expenses: float
+
+class ScheduleItem(BaseModel):
+    due_date: date
+    amount: float
+    paid: float
+    paid_on: Optional[date] = None
+    days_late: int
+    status: str  # paid, late, partial, unpaid
+
+class BalanceSummary(BaseModel):
+    contract_id: int
+    tenant_name: str
+    as_of: date
+    expected: float
+    paid: float
+    balance: float
+    arrears: float
+    overpayment: float
+    overdue_count: int
+    oldest_overdue: Optional[date] = None
+    days_overdue: int
+    max_days_late: int
+
+class ContractBalance(BalanceSummary):
+    schedule: List[ScheduleItem]
+
+class ArrearsRow(BalanceSummary):
+    property_id: int
+
+class ArrearsReport(BaseModel):
+    as_of: date
+    contracts: int
+    arrears: float
+    overpayment: float
+    debtors: List[ArrearsRow]
+
+class AnalyticsSummary(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    regime: str
+    income: float
+    expenses: float
+    months: List[MonthSummary]
+    properties: List[PropertySummary]
+    taxes: Dict[str, float]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,83 @@
+# backend/app/search.py
+# Поиск по объектам и арендаторам. В PostgreSQL запросы идут по GIN-индексам
+# (user_id, колонка) из миграции 0006: триграммы для текста, jsonb_path_ops
+# для полей tenant_info/additional_terms. В SQLite - LIKE и json_extract.
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, func, or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Поля tenant_info, по которым можно фильтровать (как в форме договора)
+TENANT_FIELDS = ("passport_series", "passport_number", "inn", "phone", "email")
+# Короче трех символов у триграмм нет смысла: только поиск по подстроке
+MIN_FUZZY_LENGTH = 3
+KEY_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SearchError(Exception):
+    pass
+
+
+def _escape_like(value: str) -> str:
+    # "!", а не обратный слэш: его экранирование зависит от standard_conforming_strings
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def _text_match(columns: list, q: str, postgres: bool):
+    """Условие и сортировка: сначала совпадения с начала, затем по похожести."""
+    pattern = _escape_like(q)
+    conditions = [column.ilike(f"%{pattern}%", escape="!") for column in columns]
+    prefix = or_(*(column.ilike(f"{pattern}%", escape="!") for column in columns))
+    order = [case((prefix, 0), else_=1)]
+    if postgres and len(q) >= MIN_FUZZY_LENGTH:
+        # %> - word_similarity выше порога pg_trgm: находит и с опечатками
+        conditions.extend(column.op("%>")(q) for column in columns)
+        order.append(func.greatest(*(func.word_similarity(q, column) for column in columns)).desc())
+    return or_(*conditions), order
+
+
+def _json_match(column, values: Dict[str, object], postgres: bool):
+    for key in values:
+        if not KEY_RE.match(key):
+            raise SearchError(f"Invalid filter key: {key}")
+    if postgres:
+        # @> по индексу jsonb_path_ops
+        return type_coerce(column, JSONB).contains(values)
+    return and_(*(func.json_extract(column, f"$.{key}") == value for key, value in values.items()))
+
+
+def search(
+    db: Session,
+    user_id: int,
+    q: Optional[str] = None,
+    tenant: Optional[Dict[str, object]] = None,
+    terms: Optional[Dict[str, object]] = None,
+    limit: int = 20,
+) -> dict:
+    q = (q or "").strip()
+    if not q and not tenant and not terms:
+        raise SearchError("Specify a search string or at least one filter")
+    postgres = db.get_bind().dialect.name == "postgresql"
+
+    properties: List[models.Property] = []
+    if q and not tenant and not terms:
+        condition, order = _text_match([models.Property.name, models.Property.address], q, postgres)
+        properties = db.query(models.Property).filter(
+            models.Property.user_id == user_id, condition
+        ).order_by(*order, models.Property.id).limit(limit).all()
+
+    query = db.query(models.Contract).filter(models.Contract.user_id == user_id)
+    order = []
+    if q:
+        condition, order = _text_match([models.Contract.tenant_name], q, postgres)
+        query = query.filter(condition)
+    if tenant:
+        query = query.filter(_json_match(models.Contract.tenant_info, tenant, postgres))
+    if terms:
+        query = query.filter(_json_match(models.Contract.additional_terms, terms, postgres))
+    contracts = query.order_by(*order, models.Contract.id).limit(limit).all()
+    return {"properties": properties, "contracts": contracts}
@@ -0,0 +1,177 @@
+# backend/app/simulator.py
+# Что будет, если: налог по всем режимам для множества сценариев и лет сразу.
+# Считается массивами NumPy (сценарии x годы), а не циклом по сценариям.
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from . import models, schemas, tax
+
+# Доход самозанятого больше лимита в год - НПД применять нельзя
+NPD_INCOME_LIMIT = 2_400_000
+
+
+class SimulationError(Exception):
+    pass
+
+
+def load_ledger(db: Session, user_id: int):
+    """Доход по договорам и расходы по годам - два запроса с группировкой."""
+    year = extract("year", models.Payment.date)
+    payments = db.query(
+        models.Payment.contract_id, year, func.sum(models.Payment.amount)
+    ).filter(models.Payment.user_id == user_id).group_by(models.Payment.contract_id, year).all()
+    expense_year = extract("year", models.Expense.date)
+    expenses = db.query(expense_year, func.sum(models.Expense.amount)).filter(
+        models.Expense.user_id == user_id
+    ).group_by(expense_year).all()
+    contracts = db.query(models.Contract.id, models.Contract.tenant_type, models.Contract.rent_amount).filter(
+        models.Contract.user_id == user_id
+    ).all()
+    return payments, expenses, contracts
+
+
+def _months(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _hypothetical_income(scenarios: List[schemas.Scenario], years: np.ndarray) -> np.ndarray:
+    """Доход новых договоров: массив (сценарии, годы, [физлица, юрлица]).
+
+    Платежи считаются помесячно: с месяца начала с шагом графика до месяца
+    окончания; квартальный платеж - аренда за три месяца.
+    """
+    flat = [
+        (index, contract.rent_amount, _months(contract.start_date), _months(contract.end_date),
+         3 if contract.payment_schedule == "quarterly" else 1, int(contract.tenant_type == "legal"))
+        for index, scenario in enumerate(scenarios) for contract in scenario.contracts
+    ]
+    income = np.zeros((len(scenarios), len(years), 2))
+    if not flat:
+        return income
+    scenario_index, rent, start, end, step, legal = (np.array(column) for column in zip(*flat))
+    year_start = years[None, :] * 12
+    first = np.maximum(year_start, start[:, None])
+    last = np.minimum(year_start + 11, end[:, None])
+    # Номера платежей k, для которых start + k*step попадает в [first, last]
+    k_first = -((start[:, None] - first) // step[:, None])
+    k_last = (last - start[:, None]) // step[:, None]
+    counts = np.clip(k_last - k_first + 1, 0, None)
+    amounts = counts * (rent * step)[:, None]
+    np.add.at(income, (scenario_index, slice(None), legal), amounts)
+    return income
+
+
+def _to_list(values: np.ndarray) -> list:
+    rounded = np.round(values, 2).astype(object)
+    rounded[~np.isfinite(values)] = None
+    return rounded.tolist()
+
+
+def simulate(db: Session, user: models.User, request: schemas.SimulationRequest) -> dict:
+    payments, expense_rows, contracts = load_ledger(db, user.id)
+    scenarios = [schemas.Scenario(name="baseline")] + list(request.scenarios)
+
+    if request.years:
+        years = np.array(sorted(set(request.years)))
+    else:
+        found = {int(row[1]) for row in payments} | {int(row[0]) for row in expense_rows}
+        for scenario in scenarios:
+            for contract in scenario.contracts:
+                found.update(range(contract.start_date.year, contract.end_date.year + 1))
+        years = np.array(sorted(found) or [date.today().year])
+    year_index = {int(year): index for index, year in enumerate(years)}
+
+    contract_index = {contract_id: index for index, (contract_id, _, _) in enumerate(contracts)}
+    is_legal = np.array([tenant_type == "legal" for _, tenant_type, _ in contracts], dtype=bool)
+    rents = np.array([rent or 0.0 for _, _, rent in contracts])
+
+    # Фактический доход (договоры x годы) и расходы (годы)
+    ledger = np.zeros((len(contracts), len(years)))
+    for contract_id, year, amount in payments:
+        if int(year) in year_index and contract_id in contract_index:
+            ledger[contract_index[contract_id], year_index[int(year)]] += amount or 0.0
+    base_expenses = np.zeros(len(years))
+    for year, amount in expense_rows:
+        if int(year) in year_index:
+            base_expenses[year_index[int(year)]] += amount or 0.0
+
+    # Коэффициенты аренды (сценарии x договоры)
+    factors = np.array([[scenario.rent_multiplier] for scenario in scenarios]) * np.ones((1, len(contracts)))
+    for row, scenario in enumerate(scenarios):
+        for change in scenario.rent_changes:
+            column = contract_index.get(change.contract_id)
+            if column is None:
+                raise SimulationError(f"Contract {change.contract_id} not found")
+            if change.rent_amount is not None:
+                # Сценарий масштабирует фактические платежи договора; без текущей
+                # аренды масштабировать нечего, а тихий множитель 1.0 скрыл бы ошибку
+                if not rents[column]:
+                    raise SimulationError(
+                        f"Contract {change.contract_id} has no rent amount to change; "
+                        "use multiplier or add the new rent as a hypothetical contract"
+                    )
+                factors[row, column] = change.rent_amount / rents[column]
+            else:
+                factors[row, column] = change.multiplier
+
+    hypothetical = _hypothetical_income(scenarios, years)
+    income_physical = factors[:, ~is_legal] @ ledger[~is_legal] + hypothetical[:, :, 0]
+    income_legal = factors[:, is_legal] @ ledger[is_legal] + hypothetical[:, :, 1]
+    expense_multiplier = np.array([scenario.expense_multiplier for scenario in scenarios])[:, None]
+    extra_expenses = np.array([scenario.extra_expenses for scenario in scenarios])[:, None]
+    expenses = base_expenses[None, :] * expense_multiplier + extra_expenses
+
+    # Налог: массив (режимы, сценарии, годы), в том же порядке, что tax.REGIMES
+    income = income_physical + income_legal
+    profit = np.maximum(0.0, income - expenses)
+    npd = income_physical * tax.NPD_PHYSICAL_RATE + income_legal * tax.NPD_LEGAL_RATE
+    taxes = np.stack([
+        np.where(income > NPD_INCOME_LIMIT, np.inf, npd),
+        income * tax.USN_INCOME_RATE,
+        profit * tax.USN_PROFIT_RATE,
+        profit * tax.NDFL_RATE,
+        income * (1 - tax.NDFL_PROFESSIONAL_DEDUCTION) * tax.NDFL_RATE,
+    ])
+    best = taxes.argmin(axis=0)
+    best_tax = taxes.min(axis=0)
+    current = [tax.REGIMES.index(name) for name in tax.regimes_for(user.landlord_type)]
+    current_tax = taxes[current].min(axis=0)
+    totals = taxes.sum(axis=2)
+    best_total = totals.argmin(axis=0)
+
+    # В списки Python один раз для всех сценариев: округление и inf -> None
+    # поэлементно заняли бы больше времени, чем сам расчет
+    regimes = list(tax.REGIMES)
+    taxes_out = _to_list(taxes.transpose(1, 2, 0))
+    totals_out = _to_list(totals.T)
+    income_out, expenses_out = _to_list(income), _to_list(expenses)
+    best_tax_out, current_out = _to_list(best_tax), _to_list(current_tax)
+    savings_out = _to_list(current_tax - best_tax)
+    best_names = np.array(regimes)[best].tolist()
+    year_list = years.tolist()
+    results = []
+    for s, scenario in enumerate(scenarios):
+        results.append({
+            "name": scenario.name or f"scenario {s}",
+            "best_regime": regimes[best_total[s]],
+            "totals": dict(zip(regimes, totals_out[s])),
+            "years": [{
+                "year": year,
+                "income": income_out[s][y],
+                "expenses": expenses_out[s][y],
+                "taxes": dict(zip(regimes, taxes_out[s][y])),
+                "best_regime": best_names[s][y],
+                "best_tax": best_tax_out[s][y],
+                "current_tax": current_out[s][y],
+                "savings": savings_out[s][y],
+            } for y, year in enumerate(year_list)],
+        })
+    return {
+        "landlord_type": user.landlord_type,
+        "current_regimes": list(tax.regimes_for(user.landlord_type)),
+        "scenarios": results,
+    }
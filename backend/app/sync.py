@@ -0,0 +1,137 @@
+# backend/app/sync.py
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+from .batch import PARENTS
+
+# now() в Postgres - это время начала транзакции, поэтому строка может
+# стать видимой позже, чем выдан курсор. Окно перекрытия покрывает такие
+# транзакции; повторно присланные строки клиент просто перезапишет.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+# Имя сущности в протоколе -> (модель, схема для записи)
+ENTITIES = {
+    "properties": (models.Property, schemas.PropertyCreate),
+    "contracts": (models.Contract, schemas.ContractCreate),
+    "payments": (models.Payment, schemas.PaymentCreate),
+    "expenses": (models.Expense, schemas.ExpenseCreate),
+}
+
+
+class SyncError(ValueError):
+    pass
+
+
+def encode_cursor(ts: datetime) -> str:
+    return base64.urlsafe_b64encode(ts.isoformat().encode()).decode()
+
+
+def decode_cursor(cursor: str) -> datetime:
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, binascii.Error):
+        raise SyncError("Invalid sync cursor")
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # SQLite возвращает naive datetime, Postgres - с таймзоной
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def pull(db: Session, user_id: int, since: Optional[datetime] = None) -> dict:
+    """Изменения пользователя после курсора; без курсора - полный снимок."""
+    now = db.query(func.now()).scalar()
+    threshold = since - SYNC_OVERLAP if since is not None else None
+
+    result = {"cursor": encode_cursor(now), "full": since is None, "deleted": {}}
+    for name, (model, _) in ENTITIES.items():
+        query = db.query(model).filter(model.user_id == user_id)
+        if threshold is not None:
+            query = query.filter(model.updated_at > threshold)
+        result[name] = query.order_by(model.id).all()
+
+    if threshold is not None:
+        tombstones = db.query(models.Tombstone.entity, models.Tombstone.entity_id).filter(
+            models.Tombstone.user_id == user_id,
+            models.Tombstone.deleted_at > threshold,
+        )
+        for entity, entity_id in tombstones:
+            result["deleted"].setdefault(entity, []).append(entity_id)
+    return result
+
+
+def _apply_change(db: Session, user_id: int, change: schemas.SyncChange) -> dict:
+    if change.entity not in ENTITIES:
+        raise SyncError(f"Unknown entity: {change.entity}")
+    model, create_schema = ENTITIES[change.entity]
+    result = {"entity": change.entity, "id": change.id, "client_id": change.client_id}
+
+    db_obj = None
+    if change.id is not None:
+        db_obj = db.query(model).filter(model.id == change.id, model.user_id == user_id).first()
+
+    if change.op == "delete":
+        if db_obj is None:
+            return {**result, "status": "missing"}
+        db.delete(db_obj)
+        crud.record_tombstone(db, change.entity, db_obj.id, user_id)
+        db.flush()
+        return {**result, "status": "deleted"}
+
+    if change.op != "upsert":
+        raise SyncError(f"Unknown operation: {change.op}")
+    try:
+        data = create_schema(**(change.data or {})).dict()
+    except ValidationError as e:
+        raise SyncError(f"Invalid {change.entity} data: {e}")
+
+    if change.entity in PARENTS:
+        # Родитель тоже должен принадлежать пользователю, иначе запись
+        # привяжется к чужому договору или объекту
+        field, parent = PARENTS[change.entity]
+        if db.query(parent.id).filter(parent.id == data[field], parent.user_id == user_id).first() is None:
+            return {**result, "status": "rejected", "error": f"{parent.__tablename__} #{data[field]} not found"}
+
+    if db_obj is None:
+        db_obj = model(**data, user_id=user_id)
+        db.add(db_obj)
+        status = "created"
+    elif (
+        change.updated_at is not None
+        and db_obj.updated_at is not None
+        and _as_utc(db_obj.updated_at) > _as_utc(change.updated_at)
+    ):
+        # На сервере более свежая версия - клиент получит ее при следующем pull
+        return {**result, "status": "conflict"}
+    else:
+        for field, value in data.items():
+            setattr(db_obj, field, value)
+        status = "updated"
+    db.flush()
+    return {**result, "id": db_obj.id, "status": status}
+
+
+def apply_changes(db: Session, user_id: int, changes: List[schemas.SyncChange]) -> List[dict]:
+    """Применяет пачку изменений клиента в одной транзакции."""
+    results = []
+    try:
+        for index, change in enumerate(changes):
+            try:
+                results.append(_apply_change(db, user_id, change))
+            except IntegrityError as e:
+                raise SyncError(f"Change #{index} violates constraints: {e.orig}")
+            except SyncError as e:
+                raise SyncError(f"Change #{index}: {e}")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return results
@@ -0,0 +1,271 @@
+# backend/app/tax.py
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Ставки те же, что и в docs/js/calculator.js
+NPD_PHYSICAL_RATE = 0.04
+NPD_LEGAL_RATE = 0.06
+USN_INCOME_RATE = 0.06
+USN_PROFIT_RATE = 0.15
+NDFL_RATE = 0.13
+NDFL_PROFESSIONAL_DEDUCTION = 0.2
+
+REGIMES = ("npd", "usn_income", "usn_profit", "ndfl_actual", "ndfl_professional")
+PERIODS = ("month", "quarter", "year")
+
+# Какие режимы доступны для каждого типа арендодателя
+LANDLORD_REGIMES = {
+    "self_employed": ("npd",),
+    "individual_entrepreneur": ("usn_income", "usn_profit"),
+    "individual": ("ndfl_actual", "ndfl_professional"),
+}
+
+# Ключ агрегата: (user_id, property_id, year, month)
+BucketKey = Tuple[int, int, int, int]
+
+
+def regimes_for(landlord_type: str) -> Tuple[str, ...]:
+    return LANDLORD_REGIMES.get(landlord_type, LANDLORD_REGIMES["self_employed"])
+
+
+def compute_tax(regime: str, income_physical: float, income_legal: float, expenses: float) -> Tuple[float, float]:
+    """Возвращает (налоговая база, налог) для одного агрегата."""
+    income = income_physical + income_legal
+    if regime == "npd":
+        # НПД: 4% с физлиц, 6% с юрлиц, расходы не учитываются
+        return income, income_physical * NPD_PHYSICAL_RATE + income_legal * NPD_LEGAL_RATE
+    if regime == "usn_income":
+        return income, income * USN_INCOME_RATE
+    if regime == "usn_profit":
+        base = max(0.0, income - expenses)
+        return base, base * USN_PROFIT_RATE
+    if regime == "ndfl_actual":
+        base = max(0.0, income - expenses)
+        return base, base * NDFL_RATE
+    if regime == "ndfl_professional":
+        base = income * (1 - NDFL_PROFESSIONAL_DEDUCTION)
+        return base, base * NDFL_RATE
+    raise ValueError(f"Unknown tax regime: {regime}")
+
+
+def period_key(year: int, month: int, period: str) -> str:
+    if period == "year":
+        return str(year)
+    if period == "quarter":
+        return f"{year}-Q{(month - 1) // 3 + 1}"
+    return f"{year}-{month:02d}"
+
+
+def aggregate_ledger(
+    db: Session,
+    user_ids: Optional[Iterable[int]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Dict[BucketKey, List[float]]:
+    """Суммирует платежи и расходы в SQL по (пользователь, объект, год, месяц).
+
+    Значение агрегата: [доход от физлиц, доход от юрлиц, расходы].
+    """
+    user_ids = list(user_ids) if user_ids is not None else None
+    buckets: Dict[BucketKey, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+
+    # Доходы: платежи группируем вместе с типом арендатора из договора
+    pay_year = extract("year", models.Payment.date)
+    pay_month = extract("month", models.Payment.date)
+    payments = db.query(
+        models.Payment.user_id,
+        models.Contract.property_id,
+        models.Contract.tenant_type,
+        pay_year,
+        pay_month,
+        func.sum(models.Payment.amount),
+    ).join(models.Contract, models.Payment.contract_id == models.Contract.id)
+    if user_ids is not None:
+        payments = payments.filter(models.Payment.user_id.in_(user_ids))
+    if date_from is not None:
+        payments = payments.filter(models.Payment.date >= date_from)
+    if date_to is not None:
+        payments = payments.filter(models.Payment.date <= date_to)
+    payments = payments.group_by(
+        models.Payment.user_id,
+        models.Contract.property_id,
+        models.Contract.tenant_type,
+        pay_year,
+        pay_month,
+    )
+    for user_id, property_id, tenant_type, year, month, amount in payments:
+        bucket = buckets[(user_id, property_id, int(year), int(month))]
+        bucket[0 if tenant_type == "physical" else 1] += float(amount or 0.0)
+
+    # Расходы привязаны к объекту напрямую
+    exp_year = extract("year", models.Expense.date)
+    exp_month = extract("month", models.Expense.date)
+    expenses = db.query(
+        models.Expense.user_id,
+        models.Expense.property_id,
+        exp_year,
+        exp_month,
+        func.sum(models.Expense.amount),
+    )
+    if user_ids is not None:
+        expenses = expenses.filter(models.Expense.user_id.in_(user_ids))
+    if date_from is not None:
+        expenses = expenses.filter(models.Expense.date >= date_from)
+    if date_to is not None:
+        expenses = expenses.filter(models.Expense.date <= date_to)
+    expenses = expenses.group_by(
+        models.Expense.user_id,
+        models.Expense.property_id,
+        exp_year,
+        exp_month,
+    )
+    for user_id, property_id, year, month, amount in expenses:
+        buckets[(user_id, property_id, int(year), int(month))][2] += float(amount or 0.0)
+
+    return buckets
+
+
+def build_reports(
+    buckets: Dict[BucketKey, List[float]],
+    landlord_types: Dict[int, str],
+    period: str = "quarter",
+    regime: Optional[str] = None,
+) -> Dict[int, dict]:
+    """Сворачивает месячные агрегаты в периоды и считает налог по режимам.
+
+    Для каждого периода возвращается строка на каждый объект и итоговая
+    строка (property_id=None): убыток по одному объекту уменьшает базу
+    по остальным, поэтому итог не равен сумме налогов по объектам.
+    Итоги (totals) считаются с годовых сумм, а не с налогов по периодам:
+    убыточный квартал уменьшает базу прибыльных в том же году.
+    """
+    rollup: Dict[int, Dict[Tuple[str, Optional[int]], List[float]]] = defaultdict(
+        lambda: defaultdict(lambda: [0.0, 0.0, 0.0])
+    )
+    yearly: Dict[int, Dict[int, List[float]]] = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0, 0.0]))
+    for (user_id, property_id, year, month), values in buckets.items():
+        key = period_key(year, month, period)
+        for target in (rollup[user_id][(key, property_id)], rollup[user_id][(key, None)], yearly[user_id][year]):
+            target[0] += values[0]
+            target[1] += values[1]
+            target[2] += values[2]
+
+    reports = {}
+    for user_id, landlord_type in landlord_types.items():
+        regimes = (regime,) if regime else regimes_for(landlord_type)
+        rows = []
+        periods = rollup.get(user_id, {})
+        # Итоговые строки идут после строк по объектам
+        for (key, property_id) in sorted(periods, key=lambda k: (k[0], k[1] is None, k[1] or 0)):
+            income_physical, income_legal, expenses = periods[(key, property_id)]
+            for name in regimes:
+                base, tax = compute_tax(name, income_physical, income_legal, expenses)
+                rows.append({
+                    "period": key,
+                    "property_id": property_id,
+                    "regime": name,
+                    "income": round(income_physical + income_legal, 2),
+                    "expenses": round(expenses, 2),
+                    "tax_base": round(base, 2),
+                    "tax": round(tax, 2),
+                })
+        # Налоговый период - год, поэтому складываем налоги по годам
+        totals = {
+            name: sum(compute_tax(name, *values)[1] for values in yearly.get(user_id, {}).values())
+            for name in regimes
+        }
+        reports[user_id] = {
+            "user_id": user_id,
+            "landlord_type": landlord_type,
+            "period": period,
+            "rows": rows,
+            "totals": {name: round(value, 2) for name, value in totals.items()},
+        }
+    return reports
+
+
+def calculate_for_users(
+    db: Session,
+    user_ids: Optional[Iterable[int]] = None,
+    period: str = "quarter",
+    regime: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Dict[int, dict]:
+    """Налог для набора пользователей (или для всех) за три запроса к базе."""
+    user_ids = list(user_ids) if user_ids is not None else None
+    users = db.query(models.User.id, models.User.landlord_type)
+    if user_ids is not None:
+        users = users.filter(models.User.id.in_(user_ids))
+    landlord_types = {user_id: landlord_type for user_id, landlord_type in users}
+    buckets = aggregate_ledger(db, user_ids, date_from, date_to)
+    return build_reports(buckets, landlord_types, period, regime)
+
+
+def calculate_for_user(
+    db: Session,
+    user: models.User,
+    period: str = "quarter",
+    regime: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> dict:
+    buckets = aggregate_ledger(db, [user.id], date_from, date_to)
+    return build_reports(buckets, {user.id: user.landlord_type}, period, regime)[user.id]
+
+
+def iter_all_reports(
+    db: Session,
+    chunk_size: int = 1000,
+    period: str = "quarter",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Iterator[dict]:
+    """Ночной расчет: идем по пользователям пачками по диапазону id."""
+    last_id = 0
+    while True:
+        user_ids = [
+            row[0] for row in db.query(models.User.id)
+            .filter(models.User.id > last_id)
+            .order_by(models.User.id)
+            .limit(chunk_size)
+        ]
+        if not user_ids:
+            break
+        reports = calculate_for_users(db, user_ids, period, None, date_from, date_to)
+        for user_id in user_ids:
+            yield reports[user_id]
+        last_id = user_ids[-1]
+
+
+if __name__ == "__main__":
+    # python -m app.tax --year 2024 > taxes.ndjson
+    import argparse
+    import json
+
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Batch tax calculation for all users")
+    parser.add_argument("--year", type=int, default=date.today().year)
+    parser.add_argument("--period", choices=PERIODS, default="quarter")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for report in iter_all_reports(
+            db,
+            chunk_size=args.chunk_size,
+            period=args.period,
+            date_from=date(args.year, 1, 1),
+            date_to=date(args.year, 12, 31),
+        ):
+            print(json.dumps(report, ensure_ascii=False))
+    finally:
+        db.close()
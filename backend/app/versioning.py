@@ -0,0 +1,85 @@
+# backend/app/versioning.py
+from itertools import chain
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+
+CHANGED_KEY = "changed_users"
+COMMITTED_KEY = "committed_users"
+# Данные, от которых зависят ответы и результаты задач; служебные таблицы
+# (jobs, notifications) версию не меняют, иначе завершение задачи
+# сбрасывало бы ее же кэш
+TRACKED = (models.Property, models.Contract, models.Payment, models.Expense, models.Tombstone)
+
+
+def _changed(session: Session) -> set:
+    return session.info.setdefault(CHANGED_KEY, set())
+
+
+def mark_changed(session: Session, user_id: int):
+    """Помечает данные пользователя измененными.
+
+    Нужно вызывать для записей через Core insert(): изменения ORM-объектов
+    отслеживаются автоматически.
+    """
+    _changed(session).add(user_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, models.User):
+            user_id = obj.id
+        elif isinstance(obj, TRACKED):
+            user_id = obj.user_id
+        else:
+            continue
+        if user_id is not None:
+            _changed(session).add(user_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session):
+    # Как и в rollups: до финального flush новые объекты еще не собраны
+    session.flush()
+    changed = session.info.pop(CHANGED_KEY, None)
+    if changed:
+        rows = session.execute(
+            update(models.User)
+            .where(models.User.id.in_(changed))
+            # updated_at не трогаем: это версия данных, а не профиля
+            .values(data_version=models.User.data_version + 1, updated_at=models.User.updated_at)
+            .returning(models.User.id, models.User.email, models.User.data_version)
+            .execution_options(synchronize_session=False)
+        )
+        session.info[COMMITTED_KEY] = {user_id: (email, version) for user_id, email, version in rows}
+
+
+# Вызываются после успешного коммита со словарем {user_id: (email, новая версия)}
+# для пользователей, чьи данные изменились
+commit_listeners = []
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed(session):
+    committed = session.info.pop(COMMITTED_KEY, None)
+    if committed:
+        for listener in commit_listeners:
+            listener(committed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(CHANGED_KEY, None)
+    session.info.pop(COMMITTED_KEY, None)
+
+
+def get_version(db: Session, user_id: int) -> int:
+    return db.scalar(select(models.User.data_version).where(models.User.id == user_id)) or 0
+
+
+async def get_version_async(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(select(models.User.data_version).where(models.User.id == user_id)) or 0
@@ -0,0 +1,8 @@
+"""Бенчмарки бэкенда (запускать из backend/, зависимости - benchmarks/requirements.txt).
+
+    python -m benchmarks.seed           синтетические данные с фиксированным seed
+    python -m benchmarks.load           нагрузочный сценарий, p50/p95/p99 по эндпоинтам
+    python -m benchmarks.db_modes       синхронный и асинхронный режимы базы
+    python -m benchmarks.startup        время холодного старта
+    python -m benchmarks.serialization  стоимость сериализации списков на строку
+"""
@@ -0,0 +1,86 @@
+# backend/benchmarks/common.py
+import contextlib
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_table(rows: List[Dict], columns: List[str]):
+    widths = {column: max(len(column), *(len(_fmt(row.get(column))) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(_fmt(row.get(column)).ljust(widths[column]) for column in columns))
+
+
+def _fmt(value) -> str:
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def migrate(database_url: str):
+    """Приводит схему базы бенчмарка к последней миграции."""
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR,
+                   env={**os.environ, "DATABASE_URL": database_url}, check=True)
+
+
+@contextlib.contextmanager
+def run_server(env: Dict[str, str], port: int, workers: int = 1, timeout: float = 60.0) -> Iterator[str]:
+    """Запускает uvicorn в отдельном процессе и ждет /health."""
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env})
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if httpx.get(base_url + "/health", timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("Server did not become ready in time")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def register_and_login(client: httpx.Client, email: str, password: str = "benchmark-password",
+                       landlord_type: Optional[str] = None) -> Dict[str, str]:
+    payload = {"email": email, "password": password}
+    if landlord_type:
+        payload["landlord_type"] = landlord_type
+    client.post("/users/", json=payload).raise_for_status()
+    response = client.post("/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
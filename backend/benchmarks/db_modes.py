@@ -0,0 +1,68 @@
+# backend/benchmarks/db_modes.py
+"""Сравнение синхронного и асинхронного (DATABASE_ASYNC=1) режимов.
+
+    cd backend
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.db_modes --database-url sqlite:///./bench.db --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from .common import migrate, print_table, register_and_login, run_server, summarize
+
+
+async def hammer(base_url: str, headers: dict, path: str, requests: int, concurrency: int):
+    latencies = []
+    queue = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        for _ in queue:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, elapsed
+
+
+def run_mode(mode: str, args) -> dict:
+    env = {"DATABASE_URL": args.database_url, "DATABASE_ASYNC": "1" if mode == "async" else "0"}
+    with run_server(env, port=args.port) as base_url:
+        with httpx.Client(base_url=base_url, timeout=60.0) as client:
+            headers = register_and_login(client, f"bench-{mode}-{uuid.uuid4().hex[:8]}@example.com")
+            for index in range(args.properties):
+                client.post("/properties/", headers=headers, json={
+                    "name": f"Объект {index}", "address": f"Адрес {index}", "base_rent_rate": 25000,
+                }).raise_for_status()
+        # Прогрев, затем замер
+        asyncio.run(hammer(base_url, headers, "/properties/", min(200, args.requests), args.concurrency))
+        latencies, elapsed = asyncio.run(hammer(base_url, headers, "/properties/", args.requests, args.concurrency))
+    return {"mode": mode, **summarize(latencies, elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--properties", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    migrate(args.database_url)
+    rows = [run_mode(mode, args) for mode in args.modes.split(",")]
+    print_table(rows, ["mode", "requests", "rps", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# backend/benchmarks/seed.py
+"""Генератор синтетических данных для бенчмарков.
+
+    cd backend
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --users 200 --seed 42
+
+Создает пользователей load-<n>@example.com с паролем benchmark-password,
+объекты, историю договоров, платежи и расходы. Один и тот же --seed дает
+одни и те же данные. Схема приводится к последней миграции.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+# crud первым: app.auth и app.crud импортируют друг друга, и в обратном
+# порядке импорт падает (так же приложение загружает их в main.py)
+from app import crud, models, rollups  # noqa: F401
+from app.auth import get_password_hash
+from app.database import connect_args_for
+
+from .common import migrate
+
+PASSWORD = "benchmark-password"
+EMAIL_TEMPLATE = "load-{index}@example.com"
+INSERT_BATCH = 1000
+
+# Пропорции примерно как у реальных пользователей: у большинства 1-2
+# объекта, договор на 11 месяцев с продлением, редкие просрочки
+PROPERTIES_PER_USER = ([1, 2, 3, 5, 10], [45, 30, 15, 8, 2])
+LEASE_MONTHS = ([6, 11, 12, 24], [15, 50, 25, 10])
+MISSED_PAYMENT_RATE = 0.05
+LEGAL_TENANT_RATE = 0.2
+QUARTERLY_RATE = 0.1
+EXPENSES_PER_PROPERTY_MONTH = 0.5
+LANDLORD_TYPES = (["self_employed", "individual", "entrepreneur"], [60, 30, 10])
+PROPERTY_TYPES = ["apartment", "house", "commercial", "room"]
+
+
+def add_months(value: date, months: int) -> date:
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, min(value.day, 28))
+
+
+def _insert(db: Session, model, rows: List[dict], returning: bool = False) -> List[int]:
+    ids = []
+    for index in range(0, len(rows), INSERT_BATCH):
+        batch = rows[index:index + INSERT_BATCH]
+        if returning:
+            ids.extend(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), batch).all())
+        else:
+            db.execute(insert(model), batch)
+    return ids
+
+
+def generate_user(rng: random.Random, db: Session, index: int, hashed_password: str, today: date, months: int) -> Dict[str, int]:
+    user_id = _insert(db, models.User, [{
+        "email": EMAIL_TEMPLATE.format(index=index),
+        "hashed_password": hashed_password,
+        "full_name": f"Пользователь {index}",
+        "landlord_type": rng.choices(*LANDLORD_TYPES)[0],
+    }], returning=True)[0]
+
+    count = rng.choices(*PROPERTIES_PER_USER)[0]
+    property_rows = [{
+        "user_id": user_id,
+        "name": f"Объект {index}-{number}",
+        "address": f"г. Москва, ул. Тестовая, д. {number + 1}, кв. {rng.randint(1, 300)}",
+        "type": rng.choice(PROPERTY_TYPES),
+        "base_rent_rate": float(rng.randrange(15000, 120000, 500)),
+        "area": round(rng.uniform(20, 150), 1),
+        "rooms": rng.randint(1, 5),
+    } for number in range(count)]
+    property_ids = _insert(db, models.Property, property_rows, returning=True)
+
+    window_start = add_months(today, -months)
+    contract_rows, schedules, expenses = [], [], []
+    for property_id, prop in zip(property_ids, property_rows):
+        # Договоры идут друг за другом, последний обычно действует сейчас
+        start = add_months(window_start, rng.randint(0, 3))
+        while start < today:
+            end = add_months(start, rng.choices(*LEASE_MONTHS)[0]) - timedelta(days=1)
+            legal = rng.random() < LEGAL_TENANT_RATE
+            contract_rows.append({
+                "user_id": user_id,
+                "property_id": property_id,
+                "tenant_name": f"ООО Арендатор {rng.randint(1, 10 ** 6)}" if legal else f"Арендатор {rng.randint(1, 10 ** 6)}",
+                "tenant_type": "legal" if legal else "physical",
+                "start_date": start,
+                "end_date": end,
+                "rent_amount": prop["base_rent_rate"],
+                "payment_schedule": "quarterly" if rng.random() < QUARTERLY_RATE else "monthly",
+                "is_active": end >= today,
+                "tenant_info": {"phone": f"+7999{rng.randint(10 ** 6, 10 ** 7 - 1)}"},
+            })
+            start = end + timedelta(days=rng.choice([1, 1, 1, 15, 30]))
+        for month in range(months):
+            if rng.random() < EXPENSES_PER_PROPERTY_MONTH:
+                expenses.append({
+                    "user_id": user_id,
+                    "property_id": property_id,
+                    "amount": float(rng.randrange(500, 20000, 100)),
+                    "description": rng.choice(["Коммунальные услуги", "Ремонт", "Интернет", "Мебель"]),
+                    "date": add_months(window_start, month) + timedelta(days=rng.randint(0, 27)),
+                })
+    contract_ids = _insert(db, models.Contract, contract_rows, returning=True)
+
+    payments = []
+    for contract_id, contract in zip(contract_ids, contract_rows):
+        step = 3 if contract["payment_schedule"] == "quarterly" else 1
+        due, number = contract["start_date"], 0
+        while due <= min(contract["end_date"], today):
+            if rng.random() >= MISSED_PAYMENT_RATE:
+                payments.append({
+                    "user_id": user_id,
+                    "contract_id": contract_id,
+                    "amount": contract["rent_amount"] * step,
+                    "date": due + timedelta(days=rng.randint(-2, 5)),
+                })
+            number += 1
+            due = add_months(contract["start_date"], number * step)
+    _insert(db, models.Payment, payments)
+    _insert(db, models.Expense, expenses)
+    return {"properties": len(property_ids), "contracts": len(contract_ids), "payments": len(payments), "expenses": len(expenses)}
+
+
+def seeded_users(database_url: str) -> int:
+    engine = create_engine(database_url, connect_args=connect_args_for(database_url))
+    try:
+        with Session(engine) as db:
+            return db.scalar(select(func.count(models.User.id)).where(models.User.email.like("load-%@example.com")))
+    finally:
+        engine.dispose()
+
+
+def seed(database_url: str, users: int, seed_value: int = 42, months: int = 24, today: date = None) -> Dict[str, int]:
+    rng = random.Random(seed_value)
+    today = today or date.today()
+    engine = create_engine(database_url, connect_args=connect_args_for(database_url))
+    totals = {"users": 0, "properties": 0, "contracts": 0, "payments": 0, "expenses": 0}
+    # Один хэш на всех: PBKDF2 для каждого пользователя занял бы минуты
+    hashed_password = get_password_hash(PASSWORD)
+    try:
+        with Session(engine) as db:
+            if db.scalar(select(models.User.id).where(models.User.email == EMAIL_TEMPLATE.format(index=0))):
+                raise SystemExit("Benchmark users already exist in this database; use a fresh one")
+            for index in range(users):
+                for key, value in generate_user(rng, db, index, hashed_password, today, months).items():
+                    totals[key] += value
+                totals["users"] += 1
+                if index % 50 == 49:
+                    db.commit()
+            db.commit()
+            # Итоги для /analytics/summary, как после обычных записей
+            rollups.rebuild(db)
+    finally:
+        engine.dispose()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="fixed 'today' for fully reproducible dates")
+    args = parser.parse_args()
+
+    migrate(args.database_url)
+    started = time.perf_counter()
+    totals = seed(args.database_url, args.users, args.seed, args.months, args.today)
+    print(", ".join(f"{key}: {value}" for key, value in totals.items()) + f" ({time.perf_counter() - started:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
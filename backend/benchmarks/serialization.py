@@ -0,0 +1,115 @@
+# backend/benchmarks/serialization.py
+"""Стоимость сериализации списка договоров на строку: ORM + pydantic
+против быстрого пути (строки колонок + orjson).
+
+    cd backend
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.serialization --rows 1000,10000 --repeat 5
+
+Работает в процессе на временной SQLite-базе, без HTTP: измеряется
+только запрос и сборка тела ответа.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas, serialization
+from app.database import Base
+
+from .common import print_table
+
+ADAPTER = TypeAdapter(List[schemas.ContractDetail])
+
+
+def seed(db, rows: int) -> int:
+    user = models.User(email="bench@example.com", hashed_password="-")
+    db.add(user)
+    db.flush()
+    prop = models.Property(user_id=user.id, name="Объект", address="Адрес", base_rent_rate=25000)
+    db.add(prop)
+    db.flush()
+    start = date(2024, 1, 1)
+    db.execute(insert(models.Contract), [{
+        "user_id": user.id,
+        "property_id": prop.id,
+        "tenant_name": f"Арендатор {index}",
+        "tenant_type": "physical" if index % 3 else "legal",
+        "start_date": start + timedelta(days=index % 365),
+        "end_date": start + timedelta(days=365 + index % 365),
+        "rent_amount": 20000.0 + index % 50 * 500,
+        "payment_schedule": "monthly",
+        "is_active": True,
+        "tenant_info": {"phone": "+79990000000", "passport": "4500 123456"},
+    } for index in range(rows)])
+    db.commit()
+    return user.id
+
+
+def fastapi_default(db, user_id: int, rows: int) -> bytes:
+    # То, что делал FastAPI с response_model: валидация ORM-объектов,
+    # dump в python-структуры и json.dumps
+    items, _ = crud.get_contracts_page(db, user_id=user_id, limit=rows)
+    content = ADAPTER.dump_python(ADAPTER.validate_python(items, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False).encode()
+
+
+def pydantic_json(db, user_id: int, rows: int) -> bytes:
+    # ORM-объекты, но JSON собирает pydantic-core (CachedView.respond)
+    items, _ = crud.get_contracts_page(db, user_id=user_id, limit=rows)
+    return ADAPTER.dump_json(ADAPTER.validate_python(items, from_attributes=True))
+
+
+def fast_rows(db, user_id: int, rows: int) -> bytes:
+    items, _ = crud.get_contracts_rows(db, user_id=user_id, limit=rows)
+    return serialization.rows_to_json(items, schemas.ContractDetail)
+
+
+MODES = {"orm+json": fastapi_default, "orm+pydantic_json": pydantic_json, "rows+" + ("orjson" if serialization.orjson else "json"): fast_rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(value) for value in args.rows.split(",")):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, f'serialization-{rows}.db')}")
+            Base.metadata.create_all(engine)
+            Session = sessionmaker(bind=engine)
+            with Session() as db:
+                user_id = seed(db, rows)
+            baseline = None
+            for mode, fn in MODES.items():
+                timings = []
+                for _ in range(args.repeat + 1):
+                    with Session() as db:
+                        started = time.perf_counter()
+                        body = fn(db, user_id, rows)
+                        timings.append(time.perf_counter() - started)
+                best = min(timings[1:])  # первый прогон - прогрев
+                baseline = baseline or best
+                results.append({
+                    "rows": rows,
+                    "mode": mode,
+                    "total_ms": best * 1000,
+                    "per_row_us": best / rows * 1_000_000,
+                    "speedup": baseline / best,
+                    "body_kb": len(body) / 1024,
+                })
+            engine.dispose()
+    print_table(results, ["rows", "mode", "total_ms", "per_row_us", "speedup", "body_kb"])
+
+
+if __name__ == "__main__":
+    main()
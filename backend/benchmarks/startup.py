@@ -0,0 +1,77 @@
+# backend/benchmarks/startup.py
+"""Время холодного старта: от запуска процесса до первого ответа.
+
+    cd backend
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.startup --database-url sqlite:///./bench.db --runs 5
+
+Для каждого запуска печатает, через сколько после старта uvicorn
+ответили /health (процесс принимает запросы), /ready (база доступна)
+и первый запрос, который ходит в базу.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from .common import BACKEND_DIR, migrate, percentile, print_table
+
+
+def wait_for(client: httpx.Client, path: str, started: float, process: subprocess.Popen, timeout: float) -> float:
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() - started > timeout:
+            raise RuntimeError(f"{path} did not respond in time")
+        time.sleep(0.01)
+
+
+def run_once(args) -> dict:
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+               "--log-level", "warning"]
+    env = {**os.environ, "DATABASE_URL": args.database_url, "NOTIFICATION_SCHEDULER_ENABLED": "0"}
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=5.0) as client:
+            health = wait_for(client, "/health", started, process, args.timeout)
+            ready = wait_for(client, "/ready", started, process, args.timeout)
+            client.post("/users/", json={
+                "email": f"startup-{uuid.uuid4().hex[:8]}@example.com", "password": "benchmark-password",
+            }).raise_for_status()
+            first_query = time.perf_counter() - started
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {"health_ms": health * 1000, "ready_ms": ready * 1000, "first_query_ms": first_query * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    migrate(args.database_url)
+    rows = [{"run": index + 1, **run_once(args)} for index in range(args.runs)]
+    columns = ["health_ms", "ready_ms", "first_query_ms"]
+    rows.append({"run": "p50", **{column: percentile([row[column] for row in rows], 50) for column in columns}})
+    print_table(rows, ["run"] + columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# backend/tests/conftest.py
+# Тесты идут на SQLite-файле во временной папке; настройки читаются при
+# импорте app.config, поэтому окружение задаем до импорта приложения.
+# cd backend && pip install -r tests/requirements.txt && pytest
+import os
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+_tmp = tempfile.mkdtemp(prefix="rent-tax-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["JOB_WORKERS"] = "0"
+os.environ["NOTIFICATION_SCHEDULER_ENABLED"] = "0"
+os.environ["PASSWORD_HASH_ROUNDS"] = "1000"
+os.environ["LOGIN_IP_BURST"] = "1000"
+os.environ["LOGIN_ACCOUNT_BURST"] = "1000"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import Base, SessionLocal, get_engine
+from app.main import app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(get_engine())
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(client):
+    """Регистрирует пользователя с уникальным email: .id и .headers для запросов.
+
+    База общая на всю сессию, поэтому id не переиспользуются и кэши
+    (принципалы, ответы по версии данных) между тестами не путаются.
+    """
+    def _make(landlord_type: str = "individual") -> SimpleNamespace:
+        email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+        response = client.post("/users/", json={
+            "email": email, "password": "test-password", "full_name": "Тест", "landlord_type": landlord_type,
+        })
+        assert response.status_code == 200, response.text
+        token = client.post("/token", data={"username": email, "password": "test-password"}).json()["access_token"]
+        return SimpleNamespace(id=response.json()["id"], email=email, headers={"Authorization": f"Bearer {token}"})
+    return _make
+
+
+@pytest.fixture
+def make_contract(client):
+    """Создает объект и договор пользователя через API, возвращает JSON договора."""
+    def _make(user, **fields) -> dict:
+        prop = client.post("/properties/", headers=user.headers, json={
+            "name": "Квартира", "address": "г. Москва, ул. Тестовая, д. 1", "base_rent_rate": 30000,
+        })
+        assert prop.status_code == 200, prop.text
+        contract = {
+            "property_id": prop.json()["id"], "tenant_name": "Иванов И.И.", "start_date": "2024-01-01",
+            "end_date": "2024-12-31", "rent_amount": 30000, **fields,
+        }
+        response = client.post("/contracts/", headers=user.headers, json=contract)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return _make
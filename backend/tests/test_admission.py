@@ -0,0 +1,60 @@
+# backend/tests/test_admission.py
+import pytest
+from fastapi import HTTPException
+
+from app import admission
+from app.config import settings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_buckets_refill_over_time():
+    clock = FakeClock()
+    buckets = admission.MemoryBuckets(clock=clock)
+    assert buckets.take("k", rate=1.0, burst=2) == 0
+    assert buckets.take("k", rate=1.0, burst=2) == 0
+    assert buckets.take("k", rate=1.0, burst=2) == pytest.approx(1.0)
+    clock.now = 1.0
+    assert buckets.take("k", rate=1.0, burst=2) == 0
+
+
+def test_rate_limiter_rejects_with_retry_after():
+    limiter = admission.RateLimiter(admission.MemoryBuckets(clock=FakeClock()))
+    limiter.check("k", per_minute=6, burst=1)
+    with pytest.raises(HTTPException) as error:
+        limiter.check("k", per_minute=6, burst=1)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "10"
+    # per_minute=0 отключает лимит
+    limiter.check("k", per_minute=0, burst=1)
+
+
+@pytest.fixture
+def strict_account_limit(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_ACCOUNT_PER_MINUTE", 0.001)
+    monkeypatch.setattr(settings, "LOGIN_ACCOUNT_BURST", 2)
+
+
+def login(client, email, password):
+    return client.post("/token", data={"username": email, "password": password})
+
+
+def test_successful_logins_do_not_exhaust_account_limit(client, make_user, strict_account_limit):
+    user = make_user()
+    for _ in range(5):
+        assert login(client, user.email, "test-password").status_code == 200
+
+
+def test_failed_logins_exhaust_account_limit(client, make_user, strict_account_limit):
+    user = make_user()
+    assert login(client, user.email, "wrong-password").status_code == 401
+    assert login(client, user.email, "wrong-password").status_code == 401
+    response = login(client, user.email, "test-password")
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
@@ -0,0 +1,70 @@
+# backend/tests/test_arrears.py
+from datetime import date
+
+from app import arrears
+
+
+def test_schedule_keeps_day_of_month_from_start():
+    dues = list(arrears.iter_schedule(date(2024, 1, 31), date(2024, 4, 30), "monthly", 100.0))
+    assert dues == [(date(2024, 1, 31), 100.0), (date(2024, 2, 29), 100.0),
+                    (date(2024, 3, 31), 100.0), (date(2024, 4, 30), 100.0)]
+
+
+def test_quarterly_schedule_charges_three_months():
+    dues = list(arrears.iter_schedule(date(2024, 1, 15), date(2024, 12, 31), "quarterly", 100.0))
+    assert [due for due, _ in dues] == [date(2024, 1, 15), date(2024, 4, 15), date(2024, 7, 15), date(2024, 10, 15)]
+    assert {amount for _, amount in dues} == {300.0}
+
+
+def test_expected_schedule_stops_at_as_of():
+    dues = arrears.expected_schedule(date(2024, 1, 1), date(2024, 12, 1), "monthly", 100.0, date(2024, 3, 15))
+    assert [due for due, _ in dues] == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+
+
+def test_match_pays_oldest_period_first():
+    dues = [(date(2024, 1, 1), 100.0), (date(2024, 2, 1), 100.0), (date(2024, 3, 1), 100.0)]
+    payments = [(date(2024, 1, 1), 100.0), (date(2024, 2, 20), 150.0)]
+    result = arrears.match(dues, payments, date(2024, 3, 31))
+
+    assert [(item["status"], item["days_late"]) for item in result["schedule"]] == [
+        ("paid", 0), ("late", 19), ("partial", 30),
+    ]
+    assert result["schedule"][2]["paid"] == 50.0
+    assert (result["expected"], result["paid"], result["arrears"], result["overpayment"]) == (300.0, 250.0, 50.0, 0.0)
+    assert result["oldest_overdue"] == date(2024, 3, 1)
+    assert result["overdue_count"] == 1
+
+
+def test_match_overpayment_covers_next_periods():
+    dues = [(date(2024, 1, 1), 100.0), (date(2024, 2, 1), 100.0)]
+    result = arrears.match(dues, [(date(2023, 12, 25), 250.0)], date(2024, 2, 10))
+    assert [item["status"] for item in result["schedule"]] == ["paid", "paid"]
+    assert result["overpayment"] == 50.0 and result["arrears"] == 0.0
+    assert result["oldest_overdue"] is None
+
+
+def test_match_without_payments():
+    dues = [(date(2024, 1, 1), 100.0)]
+    result = arrears.match(dues, [], date(2024, 1, 11))
+    assert result["schedule"][0]["status"] == "unpaid"
+    assert result["days_overdue"] == 10
+    assert result["balance"] == -100.0
+
+
+def test_portfolio_report_matches_contract_balance(client, make_user, make_contract):
+    user = make_user()
+    debtor = make_contract(user, start_date="2024-01-01", end_date="2024-12-31", rent_amount=1000)
+    paid_up = make_contract(user, start_date="2024-01-01", end_date="2024-12-31", rent_amount=500)
+    for contract, amount in ((debtor, 1000), (paid_up, 1500)):
+        response = client.post("/payments/", headers=user.headers,
+                               json={"contract_id": contract["id"], "amount": amount, "date": "2024-01-05"})
+        assert response.status_code == 200, response.text
+
+    report = client.get("/reports/arrears?as_of=2024-03-15", headers=user.headers).json()
+    assert report["contracts"] == 2
+    assert report["arrears"] == 2000.0
+    assert [row["contract_id"] for row in report["debtors"]] == [debtor["id"]]
+
+    balance = client.get(f"/contracts/{debtor['id']}/balance?as_of=2024-03-15", headers=user.headers).json()
+    assert balance["arrears"] == report["debtors"][0]["arrears"]
+    assert balance["oldest_overdue"] == "2024-02-01"
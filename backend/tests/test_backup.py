@@ -0,0 +1,108 @@
+# backend/tests/test_backup.py
+import io
+import json
+
+from app import models
+
+
+def export(client, user) -> bytes:
+    response = client.get("/export", headers=user.headers)
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def restore(client, user, content: bytes, mode: str = "empty"):
+    return client.post(f"/import?mode={mode}", headers=user.headers,
+                       files={"file": ("backup.ndjson", io.BytesIO(content), "application/x-ndjson")})
+
+
+def account_with_data(client, db, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    for day in ("2024-01-05", "2024-02-05"):
+        response = client.post("/payments/", headers=user.headers,
+                               json={"contract_id": contract["id"], "amount": 30000, "date": day})
+        assert response.status_code == 200, response.text
+    db.add(models.Notification(
+        user_id=user.id, type="payment", title="Оплата", message="Скоро оплата", priority="high",
+        action={"type": "view_contract", "contractId": contract["id"]},
+        dedupe_key=f"payment:{contract['id']}:2024-03-01",
+    ))
+    db.add(models.Notification(user_id=user.id, type="tax", title="Налог", message="Срок уплаты",
+                               dedupe_key="tax:2024-04-30"))
+    db.commit()
+    return user, contract
+
+
+def test_restore_into_empty_account_remaps_references(client, db, make_user, make_contract):
+    source, _ = account_with_data(client, db, make_user, make_contract)
+    target = make_user()
+
+    response = restore(client, target, export(client, source))
+    assert response.status_code == 200, response.text
+    assert response.json() == {"properties": 1, "contracts": 1, "payments": 2, "expenses": 0, "notifications": 2}
+
+    contracts = client.get("/contracts/", headers=target.headers).json()
+    assert len(contracts) == 1
+    new_id = contracts[0]["id"]
+    assert client.get(f"/contracts/{new_id}/balance?as_of=2024-02-28", headers=target.headers).json()["paid"] == 60000
+
+    notification = db.query(models.Notification).filter_by(user_id=target.id, type="payment").one()
+    assert notification.action["contractId"] == new_id
+    assert notification.dedupe_key == f"payment:{new_id}:2024-03-01"
+
+
+def test_restore_into_account_with_data_is_rejected(client, db, make_user, make_contract):
+    user, _ = account_with_data(client, db, make_user, make_contract)
+    content = export(client, user)
+
+    response = restore(client, user, content)
+    assert response.status_code == 409
+    assert len(client.get("/contracts/", headers=user.headers).json()) == 1
+    assert len(client.get("/payments/", headers=user.headers).json()) == 2
+
+
+def test_restore_with_replace_does_not_duplicate(client, db, make_user, make_contract):
+    user, contract = account_with_data(client, db, make_user, make_contract)
+    content = export(client, user)
+    cursor = client.get("/sync", headers=user.headers).json()["cursor"]
+
+    response = restore(client, user, content, mode="replace")
+    assert response.status_code == 200, response.text
+    assert len(client.get("/contracts/", headers=user.headers).json()) == 1
+    assert len(client.get("/payments/", headers=user.headers).json()) == 2
+    assert db.query(models.Notification).filter_by(user_id=user.id).count() == 2
+    # Клиенты синхронизации узнают об удалении старых записей
+    deleted = client.get(f"/sync?since={cursor}", headers=user.headers).json()["deleted"]
+    assert contract["id"] in deleted["contracts"]
+
+
+def test_restore_skips_notifications_already_created(client, db, make_user, make_contract):
+    source, _ = account_with_data(client, db, make_user, make_contract)
+    target = make_user()
+    # Планировщик успел создать напоминание о налоге в новом аккаунте
+    db.add(models.Notification(user_id=target.id, type="tax", title="Налог", message="Срок уплаты",
+                               dedupe_key="tax:2024-04-30"))
+    db.commit()
+
+    response = restore(client, target, export(client, source))
+    assert response.status_code == 200, response.text
+    assert response.json()["notifications"] == 1
+    assert db.query(models.Notification).filter_by(user_id=target.id).count() == 2
+
+
+def test_failed_restore_leaves_account_untouched(client, db, make_user, make_contract):
+    source, _ = account_with_data(client, db, make_user, make_contract)
+    lines = export(client, source).decode().splitlines()
+    # Битая ссылка в последней строке: все предыдущие пачки тоже откатываются
+    lines.append(json.dumps({"type": "payments", "data": {"id": 1, "contract_id": -1, "amount": 1, "date": "2024-01-01"}}))
+    target = make_user()
+
+    response = restore(client, target, "\n".join(lines).encode())
+    assert response.status_code == 400
+    assert client.get("/properties/", headers=target.headers).json() == []
+    assert db.query(models.Notification).filter_by(user_id=target.id).count() == 0
+
+
+def test_unknown_mode(client, make_user):
+    assert restore(client, make_user(), b"", mode="merge").status_code == 400
@@ -0,0 +1,118 @@
+# backend/tests/test_bank_import.py
+import io
+from datetime import date
+
+import pytest
+
+from app import bank_import
+from app.bank_import import ContractIndex, StatementError, StatementLine
+
+
+def test_csv_semicolon_with_credit_column():
+    lines = [
+        "Дата операции;Приход;Расход;Контрагент;Назначение платежа\n",
+        "05.02.2024;30 000,50;;Иванов Иван;Аренда за февраль\n",
+        "06.02.2024;;1500;ООО Ромашка;Комиссия\n",
+        "\n",
+    ]
+    assert list(bank_import.iter_csv_lines(lines)) == [
+        StatementLine(2, date(2024, 2, 5), 30000.5, "Иванов Иван", "Аренда за февраль"),
+    ]
+
+
+def test_csv_comma_with_signed_amount():
+    lines = ["date,amount,payer\n", "2024-03-01,-100,Bank\n", "2024-03-02,250.00,Петров\n"]
+    assert [(line.date, line.amount) for line in bank_import.iter_csv_lines(lines)] == [(date(2024, 3, 2), 250.0)]
+
+
+def test_csv_errors():
+    with pytest.raises(StatementError):
+        list(bank_import.iter_csv_lines(["foo;bar\n"]))
+    with pytest.raises(StatementError, match="Line 2"):
+        list(bank_import.iter_csv_lines(["дата;сумма\n", "31-31-2024;100\n"]))
+
+
+def test_1c_only_incoming_documents():
+    lines = """1CClientBankExchange
+СекцияДокумент=Платежное поручение
+Дата=01.02.2024
+Сумма=25000.00
+Плательщик1=ООО Арендатор
+ДатаПоступило=02.02.2024
+НазначениеПлатежа=Аренда
+КонецДокумента
+СекцияДокумент=Платежное поручение
+Дата=03.02.2024
+Сумма=700.00
+ПолучательСчет=40702810000000000002
+КонецДокумента
+СекцияДокумент=Платежное поручение
+Дата=04.02.2024
+Сумма=900.00
+ПолучательСчет=40702810000000000001
+Плательщик=Сидоров
+КонецДокумента
+""".splitlines()
+    parsed = list(bank_import.iter_1c_lines(lines, bank_account="40702810000000000001"))
+    assert [(line.line_no, line.date, line.amount, line.payer) for line in parsed] == [
+        (2, date(2024, 2, 2), 25000.0, "ООО Арендатор"),
+        (14, date(2024, 2, 4), 900.0, "Сидоров"),
+    ]
+
+
+def make_index():
+    return ContractIndex([
+        (1, "ООО Ромашка", 50000.0, date(2024, 1, 1), date(2024, 12, 31)),
+        (2, "Иванов Иван Иванович", 30000.0, date(2024, 1, 10), date(2024, 12, 31)),
+        (3, "Петров П.П.", 20000.0, date(2024, 1, 1), date(2024, 6, 30)),
+        (4, "Сидоров С.С.", 20000.0, date(2024, 1, 1), date(2024, 12, 31)),
+    ])
+
+
+def line(payer: str, amount: float, on: date = date(2024, 3, 10)) -> StatementLine:
+    return StatementLine(1, on, amount, payer, "")
+
+
+def test_contract_index_matches_by_name_and_amount():
+    index = make_index()
+    assert index.match(line("ООО \"Ромашка\"", 50000.0)) == (1, "name")
+    # Фамилия без инициалов
+    assert index.match(line("ИВАНОВ И.", 30000.0)) == (2, "name")
+    assert index.match(line("Неизвестный", 30000.0)) == (2, "amount")
+    assert index.match(line("Неизвестный", 20000.0)) == (None, "ambiguous amount")
+    # После окончания договора Петрова сумма снова однозначна
+    assert index.match(line("Неизвестный", 20000.0, date(2024, 9, 1))) == (4, "amount")
+    assert index.match(line("Неизвестный", 1.0)) == (None, "no matching contract")
+
+
+def upload(client, user, content: str):
+    return client.post("/payments/import", headers=user.headers,
+                       files={"file": ("statement.csv", io.BytesIO(content.encode()), "text/csv")})
+
+
+def test_import_skips_duplicates(client, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user, tenant_name="Козлов Андрей", rent_amount=25000)
+    statement = (
+        "Дата;Сумма;Плательщик\n"
+        "10.01.2024;25000;Козлов А.\n"
+        "10.01.2024;25000;Козлов А.\n"
+        "10.02.2024;25000;Козлов А.\n"
+        "11.02.2024;777;Кто-то\n"
+    )
+    first = upload(client, user, statement).json()
+    assert (first["credits"], first["matched"], first["duplicates"], first["unmatched_count"]) == (4, 2, 1, 1)
+
+    # Повторный импорт ничего не добавляет, даже если выписка шире
+    second = upload(client, user, statement + "10.03.2024;25000;Козлов А.\n").json()
+    assert (second["matched"], second["duplicates"]) == (1, 3)
+
+    payments = client.get(f"/payments/?contract_id={contract['id']}", headers=user.headers).json()
+    assert sorted(payment["date"] for payment in payments) == ["2024-01-10", "2024-02-10", "2024-03-10"]
+
+
+def test_import_does_not_match_other_users_contracts(client, make_user, make_contract):
+    owner, user = make_user(), make_user()
+    make_contract(owner, tenant_name="Зайцев Олег", rent_amount=15000)
+    report = upload(client, user, "Дата;Сумма;Плательщик\n10.01.2024;15000;Зайцев О.\n").json()
+    assert report["matched"] == 0 and report["unmatched_count"] == 1
@@ -0,0 +1,95 @@
+# backend/tests/test_batch.py
+from app import models
+
+PROPERTY = {"name": "Квартира", "address": "ул. Пакетная, д. 1", "base_rent_rate": 25000}
+CONTRACT = {"tenant_name": "Сидоров С.С.", "start_date": "2024-01-01", "end_date": "2024-12-31", "rent_amount": 25000}
+
+
+def _batch(client, user, operations, atomic=True):
+    return client.post("/batch", headers=user.headers, json={"operations": operations, "atomic": atomic})
+
+
+def test_operations_reference_parents_created_in_same_batch(client, db, make_user):
+    user = make_user()
+    response = _batch(client, user, [
+        # Порядок в пачке не важен: родители создаются раньше детей
+        {"entity": "payments", "data": {"contract_id": "$c1", "amount": 25000, "date": "2024-01-05"}},
+        {"entity": "contracts", "ref": "c1", "data": {**CONTRACT, "property_id": "$p1"}},
+        {"entity": "properties", "ref": "p1", "data": PROPERTY},
+        {"entity": "expenses", "data": {"property_id": "$p1", "amount": 900, "date": "2024-01-07"}},
+    ])
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [item["status"] for item in results] == ["created"] * 4
+    payment_id, contract_id, property_id, expense_id = (item["id"] for item in results)
+    assert results[1]["ref"] == "c1"
+
+    assert db.get(models.Contract, contract_id).property_id == property_id
+    assert db.get(models.Payment, payment_id).contract_id == contract_id
+    assert db.get(models.Expense, expense_id).property_id == property_id
+
+
+def test_bad_refs_are_rejected(client, make_user):
+    user = make_user()
+    response = _batch(client, user, [
+        {"entity": "properties", "ref": "p1", "data": PROPERTY},
+        {"entity": "properties", "ref": "p1", "data": PROPERTY},
+        {"entity": "payments", "data": {"contract_id": "$p1", "amount": 1, "date": "2024-01-05"}},
+        {"entity": "expenses", "data": {"property_id": "$nope", "amount": 1, "date": "2024-01-05"}},
+    ], atomic=False)
+    results = response.json()["results"]
+    assert results[0]["status"] == "created"
+    assert results[1]["error"] == "Duplicate ref: p1"
+    assert results[2]["error"] == "Unknown contracts ref: $p1"
+    assert results[3]["error"] == "Unknown properties ref: $nope"
+
+
+def test_child_of_failed_parent_fails(client, make_user):
+    user, other = make_user(), make_user()
+    foreign = client.post("/properties/", headers=other.headers, json=PROPERTY).json()
+    response = _batch(client, user, [
+        {"entity": "contracts", "ref": "c1", "data": {**CONTRACT, "property_id": foreign["id"]}},
+        {"entity": "payments", "data": {"contract_id": "$c1", "amount": 1, "date": "2024-01-05"}},
+    ], atomic=False)
+    results = response.json()["results"]
+    assert results[0]["error"] == f"properties #{foreign['id']} not found"
+    assert results[1]["error"] == "contracts $c1 failed"
+
+
+def test_atomic_batch_rolls_back_everything(client, db, make_user, make_contract):
+    user, other = make_user(), make_user()
+    foreign = make_contract(other)
+    operations = [
+        {"entity": "properties", "data": PROPERTY},
+        {"entity": "payments", "data": {"contract_id": foreign["id"], "amount": 100, "date": "2024-01-05"}},
+    ]
+
+    response = _batch(client, user, operations)
+    assert response.status_code == 400
+    body = response.json()
+    assert body["committed"] is False
+    assert body["results"][0] == {**body["results"][0], "status": "skipped", "id": None}
+    assert body["results"][1]["error"] == f"contracts #{foreign['id']} not found"
+    assert db.query(models.Property).filter(models.Property.user_id == user.id).count() == 0
+
+
+def test_savepoint_batch_keeps_valid_operations(client, db, make_user, make_contract):
+    user, other = make_user(), make_user()
+    own, foreign = make_contract(user), make_contract(other)
+    response = _batch(client, user, [
+        {"entity": "properties", "data": PROPERTY},
+        {"entity": "expenses", "data": {"property_id": foreign["property_id"], "amount": 100, "date": "2024-01-05"}},
+        {"entity": "contracts", "op": "update", "id": own["id"], "data": {**CONTRACT, "property_id": foreign["property_id"]}},
+        {"entity": "payments", "op": "delete", "id": 999999999},
+    ], atomic=False)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["committed"] is True
+    assert [item["status"] for item in body["results"]] == ["created", "error", "error", "error"]
+    assert body["results"][1]["error"] == f"properties #{foreign['property_id']} not found"
+    assert body["results"][3]["error"] == "payments #999999999 not found"
+
+    db.expire_all()
+    assert db.get(models.Property, body["results"][0]["id"]).user_id == user.id
+    assert db.get(models.Contract, own["id"]).property_id == own["property_id"]
+    assert db.query(models.Expense).filter(models.Expense.user_id == user.id).count() == 0
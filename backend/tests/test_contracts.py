@@ -0,0 +1,70 @@
+# backend/tests/test_contracts.py
+import asyncio
+from datetime import date
+
+import pytest
+
+from app import crud, crud_async, models, schemas
+from app.database import AsyncSessionLocal, get_async_engine
+
+
+def _contract_body(contract: dict, **fields) -> dict:
+    keys = ("property_id", "tenant_name", "tenant_type", "start_date", "end_date", "rent_amount")
+    return {**{key: contract[key] for key in keys}, **fields}
+
+
+def test_contract_on_foreign_property_rejected(client, db, make_user, make_contract):
+    owner, intruder = make_user(), make_user()
+    foreign = make_contract(owner)
+
+    response = client.post("/contracts/", headers=intruder.headers, json=_contract_body(foreign))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Property not found"
+    assert db.query(models.Contract).filter(models.Contract.user_id == intruder.id).count() == 0
+
+    own = make_contract(intruder)
+    response = client.put(f"/contracts/{own['id']}", headers=intruder.headers, json=_contract_body(own, property_id=foreign["property_id"]))
+    assert response.status_code == 404
+    assert db.get(models.Contract, own["id"]).property_id == own["property_id"]
+
+
+def test_update_missing_contract_is_404(client, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    response = client.put("/contracts/999999999", headers=user.headers, json=_contract_body(contract))
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Contract not found"
+
+
+def test_includes_do_not_leak_foreign_rows(client, db, make_user, make_contract):
+    owner, intruder = make_user(), make_user()
+    foreign = make_contract(owner)
+    # Старая запись, созданная до проверки владельца: договор ссылается на чужой объект
+    legacy = models.Contract(user_id=intruder.id, property_id=foreign["property_id"], tenant_name="Петров П.П.",
+                             start_date=date(2024, 1, 1), end_date=date(2024, 12, 31), rent_amount=1000)
+    db.add(legacy)
+    db.commit()
+
+    response = client.get(f"/contracts/{legacy.id}?include=property", headers=intruder.headers)
+    assert response.status_code == 200
+    assert response.json()["property"] is None
+
+    response = client.get(f"/properties/{foreign['property_id']}?include=contracts", headers=owner.headers)
+    assert [item["id"] for item in response.json()["contracts"]] == [foreign["id"]]
+
+
+def test_async_crud_rejects_foreign_property(make_user, make_contract):
+    owner, intruder = make_user(), make_user()
+    foreign = make_contract(owner)
+    contract = schemas.ContractCreate(**_contract_body(foreign))
+
+    async def scenario():
+        try:
+            async with AsyncSessionLocal() as session:
+                with pytest.raises(crud.OwnershipError):
+                    await crud_async.create_contract(session, contract, user_id=intruder.id)
+                assert await crud_async.create_contract(session, contract, user_id=owner.id) is not None
+        finally:
+            await get_async_engine().dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+# backend/tests/test_hashing.py
+import asyncio
+import threading
+
+from app.hashing import HashingPool
+
+
+def test_pool_never_runs_more_than_workers_at_once():
+    pool = HashingPool(2)
+    lock = threading.Lock()
+    active, peak = 0, 0
+    release = threading.Event()
+
+    def work(n):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        release.wait(5)
+        with lock:
+            active -= 1
+        return n * 2
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(pool.run(work, n)) for n in range(6)]
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if pool.stats()["running"] == 2:
+                break
+        stats = pool.stats()
+        release.set()
+        return stats, await asyncio.gather(*tasks)
+
+    stats, results = asyncio.run(scenario())
+    assert stats["running"] == 2
+    assert stats["queue_depth"] == 4
+    assert peak == 2
+    assert results == [0, 2, 4, 6, 8, 10]
+
+    final = pool.stats()
+    assert final["queue_depth"] == 0 and final["running"] == 0
+    assert final["completed"] == 6
+    assert final["peak_queue_depth"] >= 4
+
+
+def test_exception_releases_worker_slot():
+    pool = HashingPool(1)
+
+    def boom():
+        raise ValueError("bad hash")
+
+    async def scenario():
+        try:
+            await pool.run(boom)
+        except ValueError:
+            pass
+        return await pool.run(lambda: "ok")
+
+    assert asyncio.run(scenario()) == "ok"
+    assert pool.stats()["running"] == 0
+    assert pool.stats()["completed"] == 2
@@ -0,0 +1,104 @@
+# backend/tests/test_jobs.py
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app import jobs, models
+from app.config import settings
+
+
+def _run_queue(db, job_id):
+    """Выполняет очередь по порядку, пока не дойдет до нужной задачи."""
+    while True:
+        claimed = jobs.claim(db)
+        assert claimed is not None, "job was not queued"
+        jobs.run_job(claimed)
+        if claimed == job_id:
+            break
+    db.expire_all()
+    return db.get(models.Job, job_id)
+
+
+def test_job_lifecycle_and_reuse(client, db, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": 30000, "date": "2024-03-10"})
+
+    response = client.post("/jobs", headers=user.headers, json={"kind": "annual_report", "params": {"year": 2024}})
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["status"], job["progress"], job["attempts"]) == ("queued", 0, 0)
+
+    # Та же задача по тем же данным не ставится второй раз
+    again = client.post("/jobs", headers=user.headers, json={"kind": "annual_report", "params": {"year": 2024}})
+    assert again.status_code == 200 and again.json()["id"] == job["id"]
+
+    done = _run_queue(db, job["id"])
+    assert (done.status, done.progress, done.attempts, done.error) == ("done", 100, 1, None)
+    assert done.started_at is not None and done.finished_at is not None
+
+    detail = client.get(f"/jobs/{job['id']}", headers=user.headers).json()
+    assert detail["result"]["income"] == 30000
+    assert client.post("/jobs", headers=user.headers, json={"kind": "annual_report", "params": {"year": 2024}}).json()["id"] == job["id"]
+
+    stream = client.get(f"/jobs/{job['id']}/stream", headers=user.headers)
+    assert stream.text.startswith("event: done\n")
+
+    # После записи данных готовый результат устарел: ставится новая задача
+    client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": 100, "date": "2024-04-10"})
+    fresh = client.post("/jobs", headers=user.headers, json={"kind": "annual_report", "params": {"year": 2024}})
+    assert fresh.status_code == 202 and fresh.json()["id"] != job["id"]
+
+
+def test_failed_handler_marks_job_failed(client, db, monkeypatch, make_user):
+    def broken(db, user, params, progress):
+        progress(30)
+        raise ValueError("no data for year")
+
+    monkeypatch.setitem(jobs.HANDLERS, "broken", broken)
+    user = make_user()
+    job = client.post("/jobs", headers=user.headers, json={"kind": "broken", "params": {}}).json()
+
+    failed = _run_queue(db, job["id"])
+    assert failed.status == "failed"
+    assert failed.error == "ValueError: no data for year"
+    assert failed.result is None
+    assert client.get(f"/jobs/{job['id']}/stream", headers=user.headers).text.startswith("event: failed\n")
+
+
+def test_unknown_kind_and_foreign_job(client, make_user):
+    owner, other = make_user(), make_user()
+    assert client.post("/jobs", headers=owner.headers, json={"kind": "nope"}).status_code == 400
+    job = client.post("/jobs", headers=owner.headers, json={"kind": "ndfl_3", "params": {"year": 2023}}).json()
+    assert client.get(f"/jobs/{job['id']}", headers=other.headers).status_code == 404
+    assert client.get("/jobs/", headers=other.headers).json() == []
+
+
+def test_claim_takes_each_job_once(db, make_user):
+    user = make_user()
+    job, _ = jobs.submit(db, user.id, "ndfl_3", {"year": 2022})
+    while (claimed := jobs.claim(db)) != job.id:
+        assert claimed is not None
+        jobs.run_job(claimed)
+    db.expire_all()
+    assert db.get(models.Job, job.id).status == "running"
+    # Уже взятая задача другим воркером не берется
+    assert jobs.claim(db) != job.id
+    jobs.run_job(job.id)
+
+
+def test_maintain_requeues_stale_jobs_and_gives_up(db, make_user):
+    user = make_user()
+    retry, _ = jobs.submit(db, user.id, "ndfl_3", {"year": 2021})
+    give_up, _ = jobs.submit(db, user.id, "ndfl_3", {"year": 2020})
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS + 60)
+    db.execute(update(models.Job).where(models.Job.id == retry.id).values(status="running", started_at=stale, attempts=1))
+    db.execute(update(models.Job).where(models.Job.id == give_up.id).values(
+        status="running", started_at=stale, attempts=settings.JOB_MAX_ATTEMPTS
+    ))
+    db.commit()
+
+    jobs.maintain(db)
+    db.expire_all()
+    assert db.get(models.Job, retry.id).status == "queued"
+    assert (db.get(models.Job, give_up.id).status, db.get(models.Job, give_up.id).error) == ("failed", "Timed out")
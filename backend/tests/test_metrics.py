@@ -0,0 +1,68 @@
+# backend/tests/test_metrics.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.metrics import MetricsMiddleware, RequestStats, Registry, registry
+
+
+def _sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_middleware_counts_sql_statements_per_route(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_QUERY_BUDGET", 2)
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item_id}")
+    def handler(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        client.get("/metrics-test/1")
+        client.get("/metrics-test/3")
+        client.get("/metrics-test/missing")
+    body = registry.render()
+
+    # Серия по шаблону пути, а не по конкретному id
+    labels = '{method="GET",route="/metrics-test/{item_id}"}'
+    assert _sample(body, f"http_request_sql_queries_count{labels}") == 3
+    assert _sample(body, f"http_request_sql_queries_sum{labels}") == 4
+    assert _sample(body, 'http_request_sql_queries_bucket{method="GET",route="/metrics-test/{item_id}",le="1"}') == 2
+    assert _sample(body, 'http_responses_total{method="GET",route="/metrics-test/{item_id}",status="200"}') == 2
+    assert _sample(body, 'http_responses_total{method="GET",route="/metrics-test/{item_id}",status="422"}') == 1
+    assert _sample(body, f"http_requests_over_query_budget_total{labels}") == 1
+
+
+def test_metrics_endpoint_exposes_app_routes(client, make_user):
+    user = make_user()
+    client.get("/properties/", headers=user.headers)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert _sample(response.text, 'http_request_duration_seconds_count{method="GET",route="/properties/"}') >= 1
+    assert 'db_pool_checkouts{engine="sync"}' in response.text
+    # Сам /metrics в статистику не попадает
+    assert 'route="/metrics"' not in response.text
+
+
+def test_render_escapes_labels_and_accumulates_buckets():
+    local = Registry()
+    stats = RequestStats()
+    stats.queries = 5
+    local.observe("GET", '/a"b', 200, 0.02, stats)
+    local.observe("GET", '/a"b', 200, 3.0, stats)
+    body = local.render()
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a\\"b",le="0.025"} 1' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a\\"b",le="+Inf"} 2' in body
+    assert 'http_request_sql_queries_bucket{method="GET",route="/a\\"b",le="5"} 2' in body
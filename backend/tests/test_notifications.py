@@ -0,0 +1,42 @@
+# backend/tests/test_notifications.py
+from datetime import date, datetime, timedelta, timezone
+
+from app import models, notifications
+
+
+def test_claim_scan_once_per_interval(db):
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    assert notifications.claim_scan(db, 3600, now=start)
+    # Второй воркер в том же интервале не сканирует
+    assert not notifications.claim_scan(db, 3600, now=start + timedelta(seconds=10))
+    assert not notifications.claim_scan(db, 3600, now=start + timedelta(seconds=3599))
+    assert notifications.claim_scan(db, 3600, now=start + timedelta(seconds=3600))
+
+
+def test_poll_new_notifications_only_for_subscribed_users(db, make_user):
+    watched, other = make_user(), make_user()
+    _, after_id = notifications.poll_new_notifications([watched.id], None)
+
+    db.add_all([
+        models.Notification(user_id=other.id, type="tax", title="Налог", message="Срок", dedupe_key="tax:x"),
+        models.Notification(user_id=watched.id, type="tax", title="Налог", message="Срок", dedupe_key="tax:x"),
+    ])
+    db.commit()
+
+    user_ids, latest = notifications.poll_new_notifications([watched.id], after_id)
+    assert user_ids == {watched.id}
+    assert latest > after_id
+    # Курсор сдвинулся: повторный опрос никого не будит
+    assert notifications.poll_new_notifications([watched.id], latest) == (set(), latest)
+
+
+def test_run_once_does_not_duplicate(db, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user, start_date="2024-01-10", end_date="2024-02-05")
+    today = date(2024, 1, 25)
+    assert user.id in notifications.run_once(db, today)
+    count = db.query(models.Notification).filter_by(user_id=user.id).count()
+    notifications.run_once(db, today)
+    assert db.query(models.Notification).filter_by(user_id=user.id).count() == count
+    keys = {n.dedupe_key for n in db.query(models.Notification).filter_by(user_id=user.id)}
+    assert f"contract:{contract['id']}:2024-02-05" in keys
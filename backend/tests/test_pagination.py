@@ -0,0 +1,83 @@
+# backend/tests/test_pagination.py
+from datetime import date
+
+import pytest
+
+from app import models
+from app.pagination import CursorError, decode_cursor, encode_cursor
+
+
+def walk(client, user, path: str, **params):
+    """Все страницы по X-Next-Cursor; возвращает id и размеры страниц."""
+    ids, sizes, after = [], [], None
+    while True:
+        query = {**params, **({"after": after} if after else {})}
+        response = client.get(path, headers=user.headers, params=query)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids += [item["id"] for item in page]
+        sizes.append(len(page))
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            return ids, sizes
+
+
+def test_cursor_round_trip_with_dates():
+    columns = [models.Payment.date, models.Payment.id]
+    cursor = encode_cursor([date(2024, 2, 29), 17])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, columns) == [date(2024, 2, 29), 17]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    encode_cursor([1, 2, 3]),  # лишняя колонка
+    encode_cursor(["not-a-date", 1]),
+    "W10",  # пустой список
+])
+def test_malformed_cursor(cursor):
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, [models.Payment.date, models.Payment.id])
+
+
+@pytest.mark.parametrize("params", [{}, {"include": "contracts"}])
+def test_property_pages_cover_list_once(client, make_user, params):
+    user = make_user()
+    for index in range(5):
+        client.post("/properties/", headers=user.headers,
+                    json={"name": f"Объект {index}", "address": "адрес", "base_rent_rate": 1000})
+    everything = [item["id"] for item in client.get("/properties/", headers=user.headers).json()]
+
+    ids, sizes = walk(client, user, "/properties/", limit=2, **params)
+    assert ids == everything
+    assert sizes == [2, 2, 1]
+
+
+def test_exact_last_page_has_no_cursor(client, make_user):
+    user = make_user()
+    for index in range(2):
+        client.post("/properties/", headers=user.headers, json={"name": f"{index}", "address": "a", "base_rent_rate": 1})
+    response = client.get("/properties/?limit=2", headers=user.headers)
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_payment_pages_break_ties_on_date_by_id(client, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    for day in ("2024-01-05", "2024-01-05", "2024-01-05", "2024-01-06", "2024-01-04"):
+        client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": 1, "date": day})
+
+    full = client.get("/payments/", headers=user.headers).json()
+    assert [item["date"] for item in full] == ["2024-01-04"] + ["2024-01-05"] * 3 + ["2024-01-06"]
+    ids, sizes = walk(client, user, "/payments/", limit=2)
+    assert ids == [item["id"] for item in full]
+    assert sizes == [2, 2, 1]
+
+
+@pytest.mark.parametrize("path", ["/properties/", "/contracts/", "/payments/"])
+def test_malformed_after_is_400(client, make_user, path):
+    user = make_user()
+    response = client.get(path, headers=user.headers, params={"after": "definitely-not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
@@ -0,0 +1,119 @@
+# backend/tests/test_payments.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import routes_async
+from app.database import get_async_engine
+
+
+@pytest.fixture(scope="module")
+def async_client():
+    # Тот же набор маршрутов, что при DATABASE_ASYNC=1, поверх той же базы
+    app = FastAPI()
+    app.include_router(routes_async.router)
+    with TestClient(app) as test_client:
+        yield test_client
+        test_client.portal.call(get_async_engine().dispose)
+
+
+@pytest.fixture(params=["sync", "async"])
+def api(request, client, async_client):
+    return client if request.param == "sync" else async_client
+
+
+def _pay(api, user, contract_id, amount, day):
+    response = api.post("/payments/", headers=user.headers, json={"contract_id": contract_id, "amount": amount, "date": day})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_payment_filters_and_cursor(api, make_user, make_contract):
+    user = make_user()
+    first, second = make_contract(user), make_contract(user)
+    for day in ("2024-01-31", "2024-02-01", "2024-02-01", "2024-02-29", "2024-03-01"):
+        _pay(api, user, first["id"], 100, day)
+    _pay(api, user, second["id"], 700, "2024-02-15")
+
+    response = api.get("/payments/?date_from=2024-02-01&date_to=2024-02-29", headers=user.headers)
+    assert [item["date"] for item in response.json()] == ["2024-02-01", "2024-02-01", "2024-02-15", "2024-02-29"]
+
+    response = api.get(f"/payments/?property_id={second['property_id']}", headers=user.headers)
+    assert [item["amount"] for item in response.json()] == [700]
+    response = api.get(f"/payments/?contract_id={first['id']}&date_to=2024-02-01", headers=user.headers)
+    assert len(response.json()) == 3
+
+    # Курсор по (date, id): платежи одного дня не теряются на границе страниц
+    seen, after = [], None
+    while True:
+        url = "/payments/?limit=2" + (f"&after={after}" if after else "")
+        response = api.get(url, headers=user.headers)
+        seen += [item["id"] for item in response.json()]
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            break
+    everything = api.get("/payments/", headers=user.headers).json()
+    assert seen == [item["id"] for item in everything]
+    assert len(seen) == 6
+
+    assert api.get("/payments/?after=broken", headers=user.headers).status_code == 400
+
+    totals = api.get("/payments/totals?period=month&date_from=2024-02-01", headers=user.headers).json()
+    assert totals["total"] == 1100 and totals["count"] == 5
+    assert [item["period"] for item in totals["periods"]] == ["2024-02", "2024-03"]
+
+
+def test_expense_filters(api, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    for amount, day in ((100, "2023-12-31"), (200, "2024-01-01"), (300, "2024-06-30")):
+        response = api.post("/expenses/", headers=user.headers, json={"property_id": contract["property_id"], "amount": amount, "date": day})
+        assert response.status_code == 200
+    response = api.get(f"/expenses/?date_from=2024-01-01&property_id={contract['property_id']}", headers=user.headers)
+    assert [item["amount"] for item in response.json()] == [200, 300]
+    totals = api.get("/expenses/totals?period=year", headers=user.headers).json()
+    assert [(item["period"], item["amount"]) for item in totals["periods"]] == [("2023", 100), ("2024", 500)]
+
+
+def test_foreign_records_are_not_found(api, make_user, make_contract):
+    owner, intruder = make_user(), make_user()
+    contract = make_contract(owner)
+    own_contract = make_contract(intruder)
+    payment = _pay(api, owner, contract["id"], 100, "2024-01-10")
+    expense = api.post("/expenses/", headers=owner.headers, json={"property_id": contract["property_id"], "amount": 50, "date": "2024-01-10"}).json()
+
+    body = {"contract_id": contract["id"], "amount": 1, "date": "2024-01-10"}
+    assert api.post("/payments/", headers=intruder.headers, json=body).status_code == 404
+    assert api.get(f"/payments/{payment['id']}", headers=intruder.headers).status_code == 404
+    assert api.put(f"/payments/{payment['id']}", headers=intruder.headers, json={**body, "contract_id": own_contract["id"]}).status_code == 404
+    assert api.delete(f"/payments/{payment['id']}", headers=intruder.headers).status_code == 404
+    assert api.get(f"/payments/?contract_id={contract['id']}", headers=intruder.headers).json() == []
+
+    body = {"property_id": contract["property_id"], "amount": 1, "date": "2024-01-10"}
+    assert api.post("/expenses/", headers=intruder.headers, json=body).status_code == 404
+    assert api.get(f"/expenses/{expense['id']}", headers=intruder.headers).status_code == 404
+    assert api.put(f"/expenses/{expense['id']}", headers=intruder.headers, json={**body, "property_id": own_contract["property_id"]}).status_code == 404
+    assert api.delete(f"/expenses/{expense['id']}", headers=intruder.headers).status_code == 404
+
+    # Владелец по-прежнему видит свои записи
+    assert api.get(f"/payments/{payment['id']}", headers=owner.headers).json()["amount"] == 100
+    assert api.get(f"/expenses/{expense['id']}", headers=owner.headers).json()["amount"] == 50
+
+
+@pytest.mark.parametrize("path", ["payments", "expenses", "contracts", "properties"])
+def test_delete_returns_no_content(api, make_user, make_contract, path):
+    user = make_user()
+    contract = make_contract(user)
+    if path == "payments":
+        record_id = _pay(api, user, contract["id"], 100, "2024-01-10")["id"]
+    elif path == "expenses":
+        record_id = api.post("/expenses/", headers=user.headers, json={"property_id": contract["property_id"], "amount": 1, "date": "2024-01-10"}).json()["id"]
+    elif path == "contracts":
+        record_id = contract["id"]
+    else:
+        record_id = api.post("/properties/", headers=user.headers, json={"name": "Гараж", "address": "ул. Тестовая", "base_rent_rate": 1}).json()["id"]
+
+    response = api.delete(f"/{path}/{record_id}", headers=user.headers)
+    assert response.status_code == 204
+    assert response.content == b""
+    assert api.delete(f"/{path}/{record_id}", headers=user.headers).status_code == 404
@@ -0,0 +1,62 @@
+# backend/tests/test_principal_cache.py
+from app import crud, schemas
+from app.cache import MemoryBackend, PrincipalCache, principal_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_and_lru_eviction():
+    clock = FakeClock()
+    cache = PrincipalCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", {"id": 1})
+    cache.set("b", {"id": 2})
+    assert cache.get("a") == {"id": 1}
+    cache.set("c", {"id": 3})  # вытесняет b: a только что читали
+    assert cache.get("b") is None
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_backend_invalidation_reaches_other_process():
+    backend = MemoryBackend()
+    first, second = PrincipalCache(backend=backend), PrincipalCache(backend=backend)
+    first.set("user@example.com", {"id": 1, "full_name": "Old"})
+    assert second.get("user@example.com") == {"id": 1, "full_name": "Old"}
+    assert second.stats()["shared_hits"] == 1
+
+    first.invalidate("user@example.com")
+    assert backend.get("user@example.com") is None
+
+
+def test_profile_update_invalidates_cached_principal(client, db, make_user):
+    user = make_user()
+    assert client.get("/users/me/", headers=user.headers).json()["full_name"] == "Тест"
+    assert principal_cache.get(user.email) is not None
+
+    crud.update_user(db, user.id, schemas.UserUpdate(email=user.email, full_name="Новое имя", landlord_type="individual"))
+    assert principal_cache.get(user.email) is None
+    assert client.get("/users/me/", headers=user.headers).json()["full_name"] == "Новое имя"
+
+
+def test_email_change_revokes_tokens_for_old_email(client, db, make_user):
+    user = make_user()
+    assert client.get("/users/me/", headers=user.headers).status_code == 200
+
+    crud.update_user(db, user.id, schemas.UserUpdate(email=f"new-{user.email}", landlord_type="individual"))
+    assert client.get("/users/me/", headers=user.headers).status_code == 401
+
+
+def test_password_change_invalidates_cached_principal(client, db, make_user):
+    user = make_user()
+    client.get("/users/me/", headers=user.headers)
+    crud.update_user(db, user.id, schemas.UserUpdate(email=user.email, password="another-password", landlord_type="individual"))
+    assert principal_cache.get(user.email) is None
+    assert client.post("/token", data={"username": user.email, "password": "test-password"}).status_code == 401
+    assert client.post("/token", data={"username": user.email, "password": "another-password"}).status_code == 200
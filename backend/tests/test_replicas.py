@@ -0,0 +1,136 @@
+# backend/tests/test_replicas.py
+import pytest
+from sqlalchemy import exc
+
+from app import replicas, versioning
+from app.config import settings
+from app.pool_metrics import PoolMetrics, replica_pool_metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeSession:
+    def __init__(self, index: int, version: int = 0, error: bool = False):
+        self.index = index
+        self.version = version
+        self.error = error
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_versions(monkeypatch):
+    def get_version(session, user_id):
+        if session.error:
+            raise exc.OperationalError("SELECT", {}, Exception("connection refused"))
+        return session.version
+    monkeypatch.setattr(versioning, "get_version", get_version)
+    monkeypatch.setattr(settings, "REPLICA_STICKY_SECONDS", 5)
+    monkeypatch.setattr(settings, "REPLICA_RETRY_SECONDS", 30)
+
+
+def make_router(sessions, clock):
+    opened = []
+
+    def open_session(index):
+        session = sessions[index]()
+        opened.append(session)
+        return session
+    return replicas.ReplicaRouter(len(sessions), open_session=open_session, clock=clock), opened
+
+
+def test_routes_round_robin_to_up_to_date_replicas(fake_versions):
+    router, _ = make_router([lambda: FakeSession(0, 3), lambda: FakeSession(1, 3)], FakeClock())
+    indexes = [router.open(1, lambda: 3).index for _ in range(4)]
+    assert indexes == [0, 1, 0, 1]
+    assert router.stats()["routed"]["replica"] == 4
+
+
+def test_sticky_after_write_then_replica(fake_versions):
+    clock = FakeClock()
+    router, opened = make_router([lambda: FakeSession(0, 7)], clock)
+    router.note_write([1])
+
+    assert router.open(1, lambda: 7) is None
+    assert opened == []  # в окне после записи реплику даже не открываем
+    assert router.open(2, lambda: 7) is not None  # другого пользователя окно не касается
+
+    clock.now += 5
+    assert router.open(1, lambda: 7).index == 0
+    assert router.stats()["routed"]["sticky"] == 1
+
+
+def test_lagging_replica_falls_back_to_primary(fake_versions):
+    router, opened = make_router([lambda: FakeSession(0, 4), lambda: FakeSession(1, 4)], FakeClock())
+    assert router.open(1, lambda: 5) is None
+    assert len(opened) == 2 and all(session.closed for session in opened)
+    assert router.stats()["routed"]["lagging"] == 1
+    # Отставание не выводит реплику из ротации
+    assert router.stats()["down"] == []
+
+
+def test_down_replica_is_skipped_until_retry(fake_versions):
+    clock = FakeClock()
+    healthy = {"value": False}
+    router, opened = make_router(
+        [lambda: FakeSession(0, 1, error=not healthy["value"]), lambda: FakeSession(1, 1)], clock,
+    )
+    assert router.open(1, lambda: 1).index == 1
+    assert opened[0].closed
+    assert router.stats()["down"] == [0]
+
+    # Пока не истек REPLICA_RETRY_SECONDS, упавшую реплику не трогаем
+    opened.clear()
+    assert [router.open(1, lambda: 1).index for _ in range(3)] == [1, 1, 1]
+    assert all(session.index == 1 for session in opened)
+
+    healthy["value"] = True
+    clock.now += 30
+    assert {router.open(1, lambda: 1).index for _ in range(2)} == {0, 1}
+
+
+def test_all_replicas_down(fake_versions):
+    router, _ = make_router([lambda: FakeSession(0, error=True)], FakeClock())
+    assert router.open(1, lambda: 0) is None
+    assert router.stats()["routed"]["unavailable"] == 1
+
+
+def test_no_replicas_configured(fake_versions):
+    router = replicas.ReplicaRouter(0, open_session=None, clock=FakeClock())
+    assert router.open(1, lambda: 0) is None
+
+
+def test_metrics_include_replica_pools(client):
+    metrics = PoolMetrics("replica0")
+    metrics.pool = object()
+    replica_pool_metrics.append(metrics)
+    try:
+        body = client.get("/metrics").text
+    finally:
+        replica_pool_metrics.remove(metrics)
+    assert 'db_pool_checkouts{engine="replica0"} 0' in body
+
+
+def test_routed_counters_are_exact_under_threads(fake_versions):
+    from concurrent.futures import ThreadPoolExecutor
+
+    router, _ = make_router([lambda: FakeSession(0, 5)], FakeClock())
+    router.note_write([1])
+
+    def hammer(user_id):
+        for _ in range(2000):
+            router.open(user_id, lambda: 5)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(hammer, [1, 2] * 4))
+    routed = router.stats()["routed"]
+    assert routed["sticky"] == 4 * 2000
+    assert routed["replica"] == 4 * 2000
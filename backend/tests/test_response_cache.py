@@ -0,0 +1,91 @@
+# backend/tests/test_response_cache.py
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.cache import PrincipalCache, principal_cache
+from app.database import get_engine
+from app.response_cache import response_cache
+
+PROPERTY = {"name": "Дача", "address": "пос. Тестовый, д. 2", "base_rent_rate": 20000}
+
+
+@contextmanager
+def recorded_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_etag_and_not_modified(client, make_user):
+    user = make_user()
+    client.post("/properties/", headers=user.headers, json=PROPERTY)
+    first = client.get("/properties/", headers=user.headers)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    for tag in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get("/properties/", headers={**user.headers, "If-None-Match": tag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    # Другие параметры - другой ETag
+    other = client.get("/properties/?limit=1", headers={**user.headers, "If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_write_changes_etag_and_cached_body(client, make_user):
+    user = make_user()
+    client.post("/properties/", headers=user.headers, json=PROPERTY)
+    first = client.get("/properties/", headers=user.headers)
+    assert len(first.json()) == 1
+
+    client.post("/properties/", headers=user.headers, json={**PROPERTY, "name": "Гараж"})
+    response = client.get("/properties/", headers={**user.headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert [item["name"] for item in response.json()] == ["Дача", "Гараж"]
+
+
+def test_cached_get_runs_no_queries(client, make_user):
+    user = make_user()
+    client.post("/properties/", headers=user.headers, json=PROPERTY)
+    client.get("/properties/", headers=user.headers)
+
+    hits = response_cache.stats()["hits"]
+    with recorded_statements() as statements:
+        response = client.get("/properties/", headers=user.headers)
+        not_modified = client.get("/properties/", headers={**user.headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 200 and not_modified.status_code == 304
+    assert response_cache.stats()["hits"] == hits + 1
+    # Ни пользователя, ни data_version: версия пришла с принципалом из кэша
+    assert statements == []
+
+
+def test_write_bumps_cached_principal_version(client, make_user):
+    user = make_user()
+    client.get("/users/me/", headers=user.headers)
+    before = principal_cache.get(user.email)["data_version"]
+    client.post("/properties/", headers=user.headers, json=PROPERTY)
+    assert principal_cache.get(user.email)["data_version"] == before + 1
+
+
+def test_stale_principal_does_not_roll_back_version():
+    cache = PrincipalCache()
+    cache.set("user@example.com", {"id": 1, "data_version": 3})
+    cache.bump_version("user@example.com", 4)
+    # Запрос, прочитавший пользователя до записи, пишет в кэш старую версию
+    cache.set("user@example.com", {"id": 1, "data_version": 3})
+    assert cache.get("user@example.com")["data_version"] == 4
+    cache.bump_version("user@example.com", 2)
+    assert cache.get("user@example.com")["data_version"] == 4
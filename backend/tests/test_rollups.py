@@ -0,0 +1,83 @@
+# backend/tests/test_rollups.py
+from app import models, rollups, tax
+
+
+def _rollup_rows(db, user_id):
+    db.expire_all()
+    rows = db.query(models.MonthlyRollup).filter(models.MonthlyRollup.user_id == user_id)
+    return {
+        (row.property_id, row.month.year, row.month.month): (row.income_physical, row.income_legal, row.expenses)
+        for row in rows
+    }
+
+
+def _raw_sums(db, user_id):
+    return {
+        (property_id, year, month): tuple(values)
+        for (_, property_id, year, month), values in tax.aggregate_ledger(db, [user_id]).items()
+        if any(values)
+    }
+
+
+def test_rollups_follow_payment_and_expense_changes(client, db, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    property_id = contract["property_id"]
+
+    payments = [
+        client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": amount, "date": day}).json()
+        for amount, day in ((30000, "2024-01-10"), (15000, "2024-01-25"), (30000, "2024-02-10"))
+    ]
+    expense = client.post("/expenses/", headers=user.headers, json={
+        "property_id": property_id, "amount": 5000, "description": "Ремонт", "date": "2024-02-03",
+    }).json()
+    assert _rollup_rows(db, user.id) == _raw_sums(db, user.id) == {
+        (property_id, 2024, 1): (45000.0, 0.0, 0.0),
+        (property_id, 2024, 2): (30000.0, 0.0, 5000.0),
+    }
+
+    # Перенос платежа в другой месяц пересчитывает и старый, и новый месяц
+    response = client.put(f"/payments/{payments[1]['id']}", headers=user.headers, json={
+        "contract_id": contract["id"], "amount": 20000, "date": "2024-03-05",
+    })
+    assert response.status_code == 200
+    client.put(f"/expenses/{expense['id']}", headers=user.headers, json={
+        "property_id": property_id, "amount": 7000, "description": "Ремонт", "date": "2024-02-03",
+    })
+    assert _rollup_rows(db, user.id) == _raw_sums(db, user.id) == {
+        (property_id, 2024, 1): (30000.0, 0.0, 0.0),
+        (property_id, 2024, 2): (30000.0, 0.0, 7000.0),
+        (property_id, 2024, 3): (20000.0, 0.0, 0.0),
+    }
+
+    # Удаление последнего платежа месяца убирает строку итогов целиком
+    client.delete(f"/payments/{payments[0]['id']}", headers=user.headers)
+    client.delete(f"/expenses/{expense['id']}", headers=user.headers)
+    assert _rollup_rows(db, user.id) == _raw_sums(db, user.id) == {
+        (property_id, 2024, 2): (30000.0, 0.0, 0.0),
+        (property_id, 2024, 3): (20000.0, 0.0, 0.0),
+    }
+
+
+def test_tenant_type_change_moves_income_between_columns(client, db, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": 30000, "date": "2024-04-10"})
+
+    update = {key: contract[key] for key in ("property_id", "tenant_name", "start_date", "end_date", "rent_amount")}
+    response = client.put(f"/contracts/{contract['id']}", headers=user.headers, json={**update, "tenant_type": "legal"})
+    assert response.status_code == 200, response.text
+    assert _rollup_rows(db, user.id) == _raw_sums(db, user.id) == {
+        (contract["property_id"], 2024, 4): (0.0, 30000.0, 0.0),
+    }
+
+
+def test_rebuild_matches_incremental_rollups(client, db, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    for day in ("2024-05-10", "2024-06-10"):
+        client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": 30000, "date": day})
+    incremental = _rollup_rows(db, user.id)
+
+    rollups.rebuild(db, [user.id])
+    assert _rollup_rows(db, user.id) == incremental == _raw_sums(db, user.id)
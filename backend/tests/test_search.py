@@ -0,0 +1,78 @@
+# backend/tests/test_search.py
+import json
+
+import pytest
+
+from app import search
+
+
+@pytest.fixture
+def portfolio(client, make_user):
+    user = make_user()
+    ids = {}
+    for name in ("Office 100% ready", "Office 1000 sq", "flat_a", "flatXa", "Loft!deal", "Loft deal"):
+        response = client.post("/properties/", headers=user.headers, json={"name": name, "address": "Tverskaya 1", "base_rent_rate": 1})
+        ids[name] = response.json()["id"]
+    return user, ids
+
+
+def _names(client, user, q):
+    response = client.get("/search", headers=user.headers, params={"q": q})
+    assert response.status_code == 200, response.text
+    return sorted(item["name"] for item in response.json()["properties"])
+
+
+def test_like_wildcards_are_literal(client, portfolio):
+    user, _ = portfolio
+    assert _names(client, user, "100%") == ["Office 100% ready"]
+    assert _names(client, user, "flat_") == ["flat_a"]
+    assert _names(client, user, "t!d") == ["Loft!deal"]
+    assert _names(client, user, "%") == ["Office 100% ready"]
+    assert _names(client, user, "OFFICE") == ["Office 100% ready", "Office 1000 sq"]
+
+
+def test_prefix_matches_come_first(client, make_user):
+    user = make_user()
+    for name in ("Big garage", "Garage north"):
+        client.post("/properties/", headers=user.headers, json={"name": name, "address": "Lenina 5", "base_rent_rate": 1})
+    response = client.get("/search", headers=user.headers, params={"q": "garage"})
+    assert [item["name"] for item in response.json()["properties"]] == ["Garage north", "Big garage"]
+
+
+def test_search_is_scoped_to_user(client, portfolio, make_user):
+    other = make_user()
+    assert _names(client, other, "Office") == []
+
+
+def test_json_filters(client, make_user, make_contract):
+    user = make_user()
+    match = make_contract(user, tenant_info={"inn": "7701234567", "phone": "+79990001122"}, additional_terms={"utilities": "included"})
+    make_contract(user, tenant_info={"inn": "7709999999"}, additional_terms={"utilities": "separate"})
+
+    response = client.get("/search", headers=user.headers, params={"inn": "7701234567"})
+    assert [item["id"] for item in response.json()["contracts"]] == [match["id"]]
+    response = client.get("/search", headers=user.headers, params={"terms": json.dumps({"utilities": "included"})})
+    assert [item["id"] for item in response.json()["contracts"]] == [match["id"]]
+
+
+@pytest.mark.parametrize("terms, detail", [
+    ('{"bad key": 1}', "Invalid filter key: bad key"),
+    ('{"a\') or 1=1 --": 1}', "Invalid filter key"),
+    ('{"$.x": 1}', "Invalid filter key"),
+    ('["utilities"]', "terms must be a JSON object"),
+    ("{not json", "terms must be a JSON object"),
+])
+def test_invalid_json_filters_rejected(client, make_user, terms, detail):
+    user = make_user()
+    response = client.get("/search", headers=user.headers, params={"terms": terms})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith(detail)
+
+
+def test_empty_search_rejected(client, make_user):
+    user = make_user()
+    assert client.get("/search", headers=user.headers, params={"q": "  "}).status_code == 400
+
+
+def test_escape_like():
+    assert search._escape_like("50%_!") == "50!%!_!!"
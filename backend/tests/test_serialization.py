@@ -0,0 +1,53 @@
+# backend/tests/test_serialization.py
+import json
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app import schemas, serialization
+from app.config import settings
+
+
+@pytest.mark.parametrize("path", ["/properties/", "/contracts/", "/payments/", "/expenses/"])
+def test_fast_path_matches_pydantic_response(client, monkeypatch, make_user, make_contract, path):
+    user = make_user()
+    contract = make_contract(user, tenant_type="legal", additional_terms={"utilities": "included", "pets": False})
+    client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": 30000.5, "date": "2024-02-10"})
+    client.post("/expenses/", headers=user.headers, json={"property_id": contract["property_id"], "amount": 1200, "date": "2024-02-11"})
+
+    monkeypatch.setattr(settings, "FAST_LIST_RESPONSES", True)
+    fast = client.get(path, headers=user.headers)
+    monkeypatch.setattr(settings, "FAST_LIST_RESPONSES", False)
+    # Другой limit - другой ключ кэша ответов, иначе вернулся бы тот же JSON
+    slow = client.get(f"{path}?limit=99", headers=user.headers)
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.json() == slow.json()
+    assert fast.json()
+
+
+Row = namedtuple("Row", ["id", "user_id", "contract_id", "amount", "date", "created_at", "updated_at"])
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_rows_to_json_matches_type_adapter(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    rows = [
+        Row(1, 7, 3, 30000.0, date(2024, 1, 10), datetime(2024, 1, 10, 9, 30, 15, 123456, tzinfo=timezone.utc), None),
+        Row(2, 7, 3, 1500.25, date(2024, 2, 29), datetime(2024, 2, 29, 23, 59), datetime(2024, 3, 1, 8, 0)),
+    ]
+    adapter = TypeAdapter(List[schemas.Payment])
+    expected = adapter.dump_json(adapter.validate_python([row._asdict() for row in rows]))
+    assert json.loads(serialization.rows_to_json(rows, schemas.Payment)) == json.loads(expected)
+
+
+def test_missing_relations_get_schema_defaults():
+    Prop = namedtuple("Prop", list(schemas.Property.model_fields))
+    row = Prop(**{name: None for name in schemas.Property.model_fields})._replace(id=1, user_id=2, name="Дом", address="ул. Летняя", base_rent_rate=10.0)
+    item = json.loads(serialization.rows_to_json([row], schemas.PropertyDetail))[0]
+    assert item["contracts"] is None and item["expenses"] is None
+    assert serialization.rows_to_json([], schemas.Property) == b"[]"
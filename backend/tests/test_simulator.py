@@ -0,0 +1,89 @@
+# backend/tests/test_simulator.py
+import pytest
+
+from app import models, tax
+
+
+@pytest.fixture
+def ledger(client, make_user, make_contract):
+    """Два года: договор с физлицом, договор с юрлицом и расходы."""
+    user = make_user("individual_entrepreneur")
+    physical = make_contract(user, rent_amount=30000)
+    legal = make_contract(user, tenant_type="legal", rent_amount=50000, start_date="2023-01-01")
+    for contract, amount, days in (
+        (physical, 30000, ("2023-11-10", "2024-01-10", "2024-02-10")),
+        (legal, 50000, ("2023-06-05", "2024-03-05")),
+    ):
+        for day in days:
+            client.post("/payments/", headers=user.headers, json={"contract_id": contract["id"], "amount": amount, "date": day})
+    for amount, day in ((12000, "2023-07-01"), (200000, "2024-05-01")):
+        client.post("/expenses/", headers=user.headers, json={"property_id": physical["property_id"], "amount": amount, "date": day})
+    return user, physical, legal
+
+
+def _simulate(client, user, **body):
+    response = client.post("/tax/simulate", headers=user.headers, json=body)
+    assert response.status_code == 200, response.text
+    return response.json()["scenarios"]
+
+
+def test_baseline_matches_tax_module(client, db, ledger):
+    user, _, _ = ledger
+    baseline = _simulate(client, user)[0]
+    assert [row["year"] for row in baseline["years"]] == [2023, 2024]
+
+    db_user = db.get(models.User, user.id)
+    for regime in tax.REGIMES:
+        report = tax.calculate_for_user(db, db_user, period="year", regime=regime)
+        expected = {row["period"]: row["tax"] for row in report["rows"] if row["property_id"] is None}
+        assert {str(row["year"]): row["taxes"][regime] for row in baseline["years"]} == pytest.approx(expected)
+        assert baseline["totals"][regime] == pytest.approx(report["totals"][regime])
+
+    # 2024: расходы больше дохода, УСН "доходы минус расходы" дает ноль
+    year_2024 = baseline["years"][1]
+    assert year_2024["income"] == 110000 and year_2024["expenses"] == 200000
+    assert year_2024["taxes"]["usn_profit"] == 0
+    assert year_2024["current_tax"] == 0 and year_2024["best_tax"] == 0
+
+
+def test_rent_changes_scale_contract_income(client, ledger):
+    user, physical, legal = ledger
+    baseline, raised = _simulate(client, user, scenarios=[{
+        "name": "raise", "rent_changes": [
+            {"contract_id": physical["id"], "rent_amount": 45000},
+            {"contract_id": legal["id"], "multiplier": 2},
+        ],
+    }])
+    for before, after in zip(baseline["years"], raised["years"]):
+        assert after["income"] > before["income"]
+    # 2024: физлицо 60000 * 1.5, юрлицо 50000 * 2
+    income_physical, income_legal = 90000, 100000
+    assert raised["years"][1]["income"] == income_physical + income_legal
+    assert raised["years"][1]["taxes"]["npd"] == pytest.approx(tax.compute_tax("npd", income_physical, income_legal, 200000)[1])
+
+
+def test_hypothetical_contract_adds_income(client, ledger):
+    user, _, _ = ledger
+    scenarios = _simulate(client, user, years=[2025], scenarios=[{
+        "contracts": [{"rent_amount": 10000, "start_date": "2025-02-01", "end_date": "2025-12-31", "payment_schedule": "quarterly"}],
+    }])
+    # Квартальные платежи в феврале, мае, августе и ноябре
+    assert scenarios[1]["years"][0]["income"] == 4 * 30000
+    assert scenarios[1]["years"][0]["taxes"]["usn_income"] == pytest.approx(120000 * tax.USN_INCOME_RATE)
+
+
+def test_rent_amount_for_contract_without_rent_is_rejected(client, db, ledger):
+    user, physical, _ = ledger
+    db.get(models.Contract, physical["id"]).rent_amount = 0
+    db.commit()
+
+    response = client.post("/tax/simulate", headers=user.headers, json={
+        "scenarios": [{"rent_changes": [{"contract_id": physical["id"], "rent_amount": 40000}]}],
+    })
+    assert response.status_code == 400
+    assert f"Contract {physical['id']} has no rent amount" in response.json()["detail"]
+
+    # Множитель по-прежнему допустим: он применяется к фактическим платежам
+    assert client.post("/tax/simulate", headers=user.headers, json={
+        "scenarios": [{"rent_changes": [{"contract_id": physical["id"], "multiplier": 1.5}]}],
+    }).status_code == 200
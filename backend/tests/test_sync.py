@@ -0,0 +1,58 @@
+# backend/tests/test_sync.py
+
+
+def push(client, user, *changes):
+    response = client.post("/sync", headers=user.headers, json={"changes": list(changes)})
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+
+def test_push_creates_and_pull_returns_changes(client, make_user, make_contract):
+    user = make_user()
+    contract = make_contract(user)
+    results = push(client, user, {"entity": "payments", "client_id": "p1",
+                                  "data": {"contract_id": contract["id"], "amount": 30000, "date": "2024-02-01"}})
+    assert results[0]["status"] == "created" and results[0]["client_id"] == "p1"
+
+    pulled = client.get("/sync", headers=user.headers).json()
+    assert [payment["id"] for payment in pulled["payments"]] == [results[0]["id"]]
+
+
+def test_push_rejects_payment_for_foreign_contract(client, make_user, make_contract):
+    owner, intruder = make_user(), make_user()
+    contract = make_contract(owner)
+
+    results = push(client, intruder, {"entity": "payments",
+                                      "data": {"contract_id": contract["id"], "amount": 999999, "date": "2024-02-01"}})
+    assert results[0]["status"] == "rejected"
+    assert results[0]["error"] == f"contracts #{contract['id']} not found"
+
+    balance = client.get(f"/contracts/{contract['id']}/balance", headers=owner.headers).json()
+    assert balance["paid"] == 0 and balance["overpayment"] == 0
+
+
+def test_push_rejects_contract_moved_to_foreign_property(client, make_user, make_contract):
+    owner, intruder = make_user(), make_user()
+    foreign = make_contract(owner)
+    own = make_contract(intruder)
+
+    data = {**{key: own[key] for key in ("tenant_name", "start_date", "end_date", "rent_amount")},
+            "property_id": foreign["property_id"]}
+    created, updated = push(client, intruder, {"entity": "contracts", "data": data},
+                            {"entity": "contracts", "id": own["id"], "data": data})
+    assert created["status"] == "rejected" and updated["status"] == "rejected"
+
+    contracts = client.get("/contracts/?include=property", headers=intruder.headers).json()
+    assert [(c["id"], c["property"]["id"]) for c in contracts] == [(own["id"], own["property_id"])]
+
+
+def test_rejected_change_does_not_block_the_rest(client, make_user, make_contract):
+    owner, user = make_user(), make_user()
+    foreign = make_contract(owner)
+    contract = make_contract(user)
+    results = push(
+        client, user,
+        {"entity": "payments", "data": {"contract_id": foreign["id"], "amount": 1, "date": "2024-02-01"}},
+        {"entity": "payments", "data": {"contract_id": contract["id"], "amount": 1, "date": "2024-02-01"}},
+    )
+    assert [result["status"] for result in results] == ["rejected", "created"]
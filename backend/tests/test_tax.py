@@ -0,0 +1,53 @@
+# backend/tests/test_tax.py
+import pytest
+
+from app import tax
+
+
+def test_compute_tax_profit_regimes_clamp_loss():
+    assert tax.compute_tax("usn_profit", 100.0, 0.0, 150.0) == (0.0, 0.0)
+    assert tax.compute_tax("ndfl_actual", 1000.0, 0.0, 200.0) == (800.0, pytest.approx(104.0))
+
+
+def test_compute_tax_npd_rates_by_tenant_type():
+    base, amount = tax.compute_tax("npd", 1000.0, 1000.0, 500.0)
+    assert base == 2000.0
+    assert amount == pytest.approx(40.0 + 60.0)
+
+
+def test_compute_tax_unknown_regime():
+    with pytest.raises(ValueError):
+        tax.compute_tax("flat", 1.0, 0.0, 0.0)
+
+
+def test_build_reports_totals_offset_losses_within_year():
+    # Q1: доход 1000, расходы 0; Q2: доход 0, расходы 600
+    buckets = {
+        (1, 10, 2024, 2): [1000.0, 0.0, 0.0],
+        (1, 10, 2024, 5): [0.0, 0.0, 600.0],
+    }
+    report = tax.build_reports(buckets, {1: "individual_entrepreneur"}, period="quarter")[1]
+    quarters = {row["period"]: row["tax"] for row in report["rows"]
+                if row["property_id"] is None and row["regime"] == "usn_profit"}
+    assert quarters == {"2024-Q1": 150.0, "2024-Q2": 0.0}
+    # Убыток второго квартала уменьшает годовую базу: (1000 - 600) * 15%
+    assert report["totals"]["usn_profit"] == 60.0
+    assert report["totals"]["usn_income"] == 60.0
+
+
+def test_build_reports_totals_do_not_carry_losses_across_years():
+    buckets = {
+        (1, 10, 2023, 12): [0.0, 0.0, 5000.0],
+        (1, 10, 2024, 1): [1000.0, 0.0, 0.0],
+    }
+    report = tax.build_reports(buckets, {1: "individual"}, period="year")[1]
+    assert report["totals"]["ndfl_actual"] == 130.0
+
+
+def test_build_reports_property_rows_and_total_row():
+    buckets = {
+        (1, 10, 2024, 1): [1000.0, 0.0, 0.0],
+        (1, 11, 2024, 1): [0.0, 0.0, 400.0],
+    }
+    rows = tax.build_reports(buckets, {1: "individual"}, period="month", regime="ndfl_actual")[1]["rows"]
+    assert [(row["property_id"], row["tax"]) for row in rows] == [(10, 130.0), (11, 0.0), (None, 78.0)]